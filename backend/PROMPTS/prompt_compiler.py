@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Prompt Compiler
+Builds a compact variant of each agent prompt for degraded (slow) connections:
+example/sample/checklist sections dropped, decoration and whitespace stripped.
+Run `python -m PROMPTS.prompt_compiler` from backend/ to print the token count of every variant.
+"""
+
+import importlib.util
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict
+
+from PROMPTS.triage_prompt import Triage_Agent_Prompt
+from PROMPTS.tutor_agent_prompt import Tutor_Agent_Prompt
+from PROMPTS.feedback_agent_prompt import Feedback_Agent_Prompt
+from PROMPTS.safety_agent_prompt import Safety_Agent_Prompt
+from PROMPTS.assessment_agent_prompt import Assessment_Agent_Prompt
+
+AGENT_PROMPTS: Dict[str, str] = {
+    "triage": Triage_Agent_Prompt,
+    "tutor": Tutor_Agent_Prompt,
+    "feedback": Feedback_Agent_Prompt,
+    "safety": Safety_Agent_Prompt,
+    "assessment": Assessment_Agent_Prompt,
+}
+
+# Sections whose heading matches are illustration, not instruction - dropped from compact prompts
+DROP_SECTION = re.compile(
+    r"sample|example|testing|checklist|implementation tips|continuous improvement|templates?\b",
+    re.IGNORECASE,
+)
+# "## Heading" / "### Heading", or an ALL-CAPS line such as "GUARDRAILS:" or "ROLE"
+HEADING = re.compile(r"^(#{1,4})\s+(.+)$|^([A-Z][A-Z0-9 &/_\-,.']{2,}(?:\s*\([^)]*\))?):?\s*$")
+INVISIBLE = re.compile("[\u200b\u200c\u200d\u2060\ufeff]")
+RULE_LINE = re.compile(r"^\s*[-=_*]{3,}\s*$")
+
+# tiktoken is optional (pip install tiktoken); without it counts are estimated
+TIKTOKEN_AVAILABLE = importlib.util.find_spec("tiktoken") is not None
+
+def count_tokens(text: str) -> int:
+    """Token count of text (cl100k_base when tiktoken is installed, else ~4 chars per token)"""
+    if TIKTOKEN_AVAILABLE:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    return len(text) // 4
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """One agent prompt in full and compact form, with token counts"""
+    name: str
+    full: str
+    compact: str
+    full_tokens: int
+    compact_tokens: int
+
+    def variant(self, compact: bool) -> str:
+        return self.compact if compact else self.full
+
+def compact_prompt(text: str) -> str:
+    """Drop example/sample/testing sections and strip decoration and extra whitespace"""
+    lines = []
+    drop_level = None  # Heading level of the section being dropped
+    for raw_line in INVISIBLE.sub("", text).splitlines():
+        line = raw_line.strip()
+        heading = HEADING.match(line)
+        if heading:
+            level = len(heading.group(1)) if heading.group(1) else 2  # ALL-CAPS headings are top level
+            title = heading.group(2) or heading.group(3)
+            if drop_level is not None and level > drop_level:
+                continue  # Sub-heading of a dropped section
+            drop_level = level if DROP_SECTION.search(title) else None
+        if drop_level is not None or RULE_LINE.match(line):
+            continue
+        line = re.sub(r"\*\*(.+?)\*\*", r"\1", line)  # Bold markers carry no meaning for the model
+        line = re.sub(r"^[•*]\s+", "- ", line)
+        line = re.sub(r"[ \t]{2,}", " ", line)
+        lines.append(line)
+    compact = "\n".join(lines)
+    return re.sub(r"\n{2,}", "\n", compact).strip()
+
+@lru_cache(maxsize=None)
+def compile_prompt(name: str) -> CompiledPrompt:
+    """Compile one agent prompt by name (cached - prompts are static)"""
+    full = AGENT_PROMPTS[name]
+    compact = compact_prompt(full)
+    return CompiledPrompt(name, full, compact, count_tokens(full), count_tokens(compact))
+
+def compile_all() -> Dict[str, CompiledPrompt]:
+    return {name: compile_prompt(name) for name in AGENT_PROMPTS}
+
+def main():
+    """Print full vs compact token counts for every agent prompt"""
+    print(f"{'prompt':<12}{'full':>8}{'compact':>10}{'saved':>8}")
+    for name, compiled in compile_all().items():
+        saved = 1 - compiled.compact_tokens / compiled.full_tokens if compiled.full_tokens else 0.0
+        print(f"{name:<12}{compiled.full_tokens:>8}{compiled.compact_tokens:>10}{saved:>8.0%}")
+
+if __name__ == "__main__":
+    main()
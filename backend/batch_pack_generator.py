@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Batch Learning Pack Generator
+Generates learning packs for a whole class from a manifest of
+(student, subject, chapter, level) rows. Identical (subject, chapter, level)
+work is generated once and shared, packs flow through a staged pipeline
+(pack_pipeline.py) so content fetch and quiz generation overlap, and progress
+is journaled so an interrupted nightly run resumes where it stopped (the
+journal is removed once a run finishes without failures, so the next night
+regenerates everything). When a
+run replaces an existing pack, a delta (pack_delta.py) is written to deltas/
+for devices that already hold the old version.
+
+Usage:
+    python batch_pack_generator.py manifest.csv [--backend openai|gemini|ollama] [--concurrency 4] [--quiz-workers 4] [--output-dir learning_packs] [--format json|tpk] [--no-resume]
+
+Manifest: CSV with student_id,subject,chapter,level columns, or a JSON list of
+objects with the same keys.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Tuple
+
+from pack_pipeline import PackPipeline, PIPELINE_QUIZ_WORKERS, PIPELINE_QUEUE_SIZE
+from pack_format import write_pack, load_pack
+from pack_delta import write_delta
+
+BATCH_PACK_CONCURRENCY = int(os.getenv("BATCH_PACK_CONCURRENCY", "4"))
+BATCH_PACK_OUTPUT_DIR = os.getenv(
+    "BATCH_PACK_OUTPUT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "learning_packs"),
+)
+
+PackKey = Tuple[str, int, str]  # (subject, chapter, level)
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Read manifest rows from CSV or JSON"""
+    with open(path, encoding="utf-8") as f:
+        rows = json.load(f) if path.endswith(".json") else list(csv.DictReader(f))
+    entries = []
+    for row in rows:
+        entries.append({
+            "student_id": str(row["student_id"]).strip(),
+            "subject": str(row["subject"]).strip(),
+            "chapter": int(row["chapter"]),
+            "level": str(row.get("level") or "beginner").strip().lower(),
+        })
+    return entries
+
+def pack_filename(key: PackKey, pack_format: str = "json") -> str:
+    subject, chapter, level = key
+    return f"{subject.lower().replace(' ', '_')}_ch{chapter:03d}_{level}.{pack_format}"
+
+@dataclass
+class BatchReport:
+    """Throughput summary of one batch run"""
+    students: int = 0
+    unique_packs: int = 0
+    resumed: int = 0
+    generated: int = 0
+    deltas: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    pack_seconds: List[float] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.pack_seconds)
+        return {
+            "students": self.students,
+            "unique_packs": self.unique_packs,
+            "deduplicated": self.students - self.unique_packs,
+            "resumed": self.resumed,
+            "generated": self.generated,
+            "deltas": self.deltas,
+            "failed": self.failed,
+            "elapsed_seconds": round(self.elapsed_seconds, 2),
+            "packs_per_minute": round(self.generated / self.elapsed_seconds * 60, 2) if self.elapsed_seconds else 0.0,
+            "p50_pack_seconds": round(statistics.median(latencies), 2) if latencies else 0.0,
+            "p95_pack_seconds": round(latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else 0.0,
+        }
+
+class BatchPackGenerator:
+    """Generates deduplicated learning packs through the stage pipeline with a resumable progress journal"""
+
+    def __init__(self, generator=None, concurrency: int = BATCH_PACK_CONCURRENCY,
+                 output_dir: str = BATCH_PACK_OUTPUT_DIR, resume: bool = True,
+                 quiz_workers: int = PIPELINE_QUIZ_WORKERS, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 pack_format: str = "json"):
+        if generator is None:
+            from enhanced_learning_pack_generator import EnhancedLearningPackGenerator
+            generator = EnhancedLearningPackGenerator()
+        self.generator = generator
+        self.concurrency = concurrency
+        # concurrency sizes the content stage; quiz generation gets its own workers
+        self.pipeline = PackPipeline(generator, content_workers=concurrency,
+                                     quiz_workers=quiz_workers, queue_size=queue_size)
+        self.output_dir = output_dir
+        self.resume = resume
+        self.pack_format = pack_format  # "tpk": compressed containers for low-end devices (pack_format.py)
+        self.progress_path = os.path.join(output_dir, "progress.jsonl")
+        self.assignments_path = os.path.join(output_dir, "assignments.json")
+
+    async def run(self, entries: List[Dict[str, Any]]) -> BatchReport:
+        """Generate packs for every manifest entry; returns the throughput report"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        report = BatchReport(students=len(entries))
+        started = time.perf_counter()
+
+        # One job per unique (subject, chapter, level)
+        students_by_key: Dict[PackKey, List[str]] = {}
+        for entry in entries:
+            key = (entry["subject"], entry["chapter"], entry["level"])
+            students_by_key.setdefault(key, []).append(entry["student_id"])
+        report.unique_packs = len(students_by_key)
+
+        done = self._completed_keys() if self.resume else set()
+        pending = [key for key in students_by_key if key not in done]
+        report.resumed = len(students_by_key) - len(pending)
+        if report.resumed:
+            print(f"⏩ Resuming: {report.resumed} packs already generated")
+
+        async def on_pack(key: PackKey, pack: Dict[str, Any], seconds: float):
+            subject, chapter, level = key
+            path = os.path.join(self.output_dir, pack_filename(key, self.pack_format))
+            if os.path.exists(path):
+                # Refresh of a pack devices already have - they can download just the delta
+                delta_path = await asyncio.to_thread(self._write_delta, path, pack)
+                if delta_path:
+                    report.deltas += 1
+            if self.pack_format == "tpk":
+                await asyncio.to_thread(write_pack, pack, path)
+            else:
+                await asyncio.to_thread(self._write_json, path, pack)
+            report.generated += 1
+            report.pack_seconds.append(seconds)
+            self._record_progress(key, path, seconds)
+            print(f"✅ {subject} Chapter {chapter} ({level}) in {seconds:.1f}s")
+
+        async def on_error(key: PackKey, error: Exception):
+            subject, chapter, level = key
+            report.failed += 1
+            print(f"❌ Failed {subject} Chapter {chapter} ({level}): {error}")
+
+        await self.pipeline.run(pending, on_pack, on_error)
+
+        self._write_assignments(students_by_key)
+        if not report.failed and os.path.exists(self.progress_path):
+            # Finished cleanly - resume only ever covers an interrupted or failed run
+            os.remove(self.progress_path)
+        report.elapsed_seconds = time.perf_counter() - started
+        return report
+
+    def _completed_keys(self) -> set:
+        """Keys journaled as done whose pack file still exists"""
+        done = set()
+        if not os.path.exists(self.progress_path):
+            return done
+        with open(self.progress_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Partial line from an interrupted run
+                if os.path.exists(record["path"]):
+                    done.add((record["subject"], record["chapter"], record["level"]))
+        return done
+
+    def _record_progress(self, key: PackKey, path: str, seconds: float):
+        subject, chapter, level = key
+        record = {"subject": subject, "chapter": chapter, "level": level, "path": path,
+                  "seconds": round(seconds, 3), "finished_at": time.time()}
+        # One small append per pack - the journal survives a crash mid-batch
+        with open(self.progress_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _write_assignments(self, students_by_key: Dict[PackKey, List[str]]):
+        """student_id -> pack file, for delivering packs to each student"""
+        assignments = {}
+        for key, student_ids in students_by_key.items():
+            path = os.path.join(self.output_dir, pack_filename(key, self.pack_format))
+            if os.path.exists(path):
+                for student_id in student_ids:
+                    assignments[student_id] = path
+        self._write_json(self.assignments_path, assignments)
+
+    def _write_delta(self, path: str, pack: Dict[str, Any]) -> str:
+        try:
+            return write_delta(load_pack(path), pack, path, os.path.join(self.output_dir, "deltas"))
+        except Exception as e:
+            print(f"⚠️ No delta for {os.path.basename(path)}: {e}")
+            return None
+
+    def _write_json(self, path: str, data: Any):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)  # Never leave a half-written pack behind
+
+async def main():
+    parser = argparse.ArgumentParser(description="Generate learning packs for a class from a manifest")
+    parser.add_argument("manifest", help="CSV or JSON manifest of student_id, subject, chapter, level")
+    parser.add_argument("--backend", default=None, choices=["openai", "gemini", "ollama"],
+                        help="Model backend (default: PACK_MODEL_BACKEND)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_PACK_CONCURRENCY, help="Content stage workers")
+    parser.add_argument("--quiz-workers", type=int, default=PIPELINE_QUIZ_WORKERS, help="Quiz stage workers")
+    parser.add_argument("--queue-size", type=int, default=PIPELINE_QUEUE_SIZE, help="Bound on each stage queue")
+    parser.add_argument("--output-dir", default=BATCH_PACK_OUTPUT_DIR)
+    parser.add_argument("--format", choices=["json", "tpk"], default="json", help="Pack file format")
+    parser.add_argument("--no-resume", action="store_true", help="Regenerate packs an interrupted run already finished")
+    args = parser.parse_args()
+
+    entries = load_manifest(args.manifest)
+    print(f"📚 Batch generating packs for {len(entries)} students (concurrency {args.concurrency})")
+    from enhanced_learning_pack_generator import EnhancedLearningPackGenerator
+    from pack_engine import get_model_backend, PACK_MODEL_BACKEND
+    generator = EnhancedLearningPackGenerator(backend=get_model_backend(args.backend or PACK_MODEL_BACKEND))
+    batch = BatchPackGenerator(generator, concurrency=args.concurrency, output_dir=args.output_dir, resume=not args.no_resume,
+                               quiz_workers=args.quiz_workers, queue_size=args.queue_size, pack_format=args.format)
+    try:
+        report = await batch.run(entries)
+    finally:
+        await batch.generator.close()
+
+    print("\n📊 Throughput report")
+    for name, value in report.summary().items():
+        print(f"  {name:<20} {value}")
+    print("\n🔀 Pipeline stages")
+    for name, stage in batch.pipeline.metrics().items():
+        print(f"  {name:<20} {stage}")
+    cache = getattr(batch.generator, "cache", None)
+    if cache:
+        print(f"\n🗄️ Pack cache: {cache.stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark
+Measures how long a fresh interpreter takes to import the orchestrator and build a
+MultiAgentOrchestrator (what every Chainlit worker and CLI run pays at startup).
+
+Usage:
+    python benchmarks/import_benchmark.py [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet runs in a fresh interpreter so module caches don't hide the cost
+SNIPPETS = {
+    "import main_orchestrator": (
+        "import time; t = time.perf_counter(); "
+        "import companion_agents.main_orchestrator; "
+        "print(time.perf_counter() - t)"
+    ),
+    "import + MultiAgentOrchestrator()": (
+        "import time; t = time.perf_counter(); "
+        "from companion_agents.main_orchestrator import MultiAgentOrchestrator; "
+        "MultiAgentOrchestrator(session_id='bench'); "
+        "print(time.perf_counter() - t)"
+    ),
+}
+
+def time_snippet(snippet: str) -> float:
+    """Run a snippet in a fresh interpreter and return the time it reports"""
+    result = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The timing is the last line; anything before it is startup chatter
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark orchestrator import/startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    print(f"⏱️ Import benchmark ({args.runs} runs each)")
+    print("=" * 60)
+    for label, snippet in SNIPPETS.items():
+        timings = [time_snippet(snippet) for _ in range(args.runs)]
+        print(f"{label:<36} median {statistics.median(timings) * 1000:8.1f} ms"
+              f"   min {min(timings) * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+MCP connection benchmark
+Per-pack MCP overhead of the old setup (a new MCPServerStreamableHttp connected
+for every pack and never closed) versus the persistent MCPConnectionManager.
+Needs the local MCP server running (python Mcp_Tools/main.py).
+
+Usage:
+    python benchmarks/mcp_connection_benchmark.py [--packs 20] [--url http://localhost:8000/mcp]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.mcp import MCPServerStreamableHttp
+from mcp_connection import MCPConnectionManager, LOCAL_MCP_SERVER_URL
+
+async def per_pack_new_connection(url: str, packs: int):
+    """Old behaviour: connect a fresh server for every pack (connections are leaked)"""
+    timings, leaked = [], []
+    for _ in range(packs):
+        started = time.perf_counter()
+        server = MCPServerStreamableHttp(
+            name="StudentDataToolbox",
+            params={"url": url, "timeout": 10},
+            cache_tools_list=True,
+            max_retry_attempts=3,
+        )
+        await server.connect()
+        await server.list_tools()
+        timings.append(time.perf_counter() - started)
+        leaked.append(server)
+    open_connections = len(leaked)
+    for server in leaked:
+        await server.cleanup()  # Clean up after measuring so the benchmark itself doesn't leak
+    return timings, open_connections
+
+async def per_pack_managed_connection(url: str, packs: int):
+    """New behaviour: one managed connection reused by every pack"""
+    manager = MCPConnectionManager("StudentDataToolbox", url)
+    timings = []
+    try:
+        for _ in range(packs):
+            started = time.perf_counter()
+            server = await manager.get()
+            await server.list_tools()
+            timings.append(time.perf_counter() - started)
+    finally:
+        await manager.close()
+    return timings, manager.stats["connects"]
+
+def describe(label: str, timings: list, connections: int):
+    ordered = sorted(timings)
+    p95 = ordered[int(0.95 * (len(ordered) - 1))]
+    print(f"{label:<24} mean {statistics.mean(timings) * 1000:8.1f} ms   "
+          f"p95 {p95 * 1000:8.1f} ms   connections opened {connections}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-pack MCP connection overhead")
+    parser.add_argument("--packs", type=int, default=20, help="Packs to simulate")
+    parser.add_argument("--url", default=LOCAL_MCP_SERVER_URL)
+    args = parser.parse_args()
+
+    print(f"MCP server: {args.url}, {args.packs} packs\n")
+    describe("before (connect per pack)", *await per_pack_new_connection(args.url, args.packs))
+    describe("after (persistent)", *await per_pack_managed_connection(args.url, args.packs))
+
+if __name__ == "__main__":
+    asyncio.run(main())
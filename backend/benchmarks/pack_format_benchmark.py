@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Learning pack format benchmark
+Size on disk and time to first study screen for a pack stored as pretty-printed
+JSON (today), compact JSON, and the .tpk container with each available codec.
+"First screen" is what OfflineLearningAgent.start_study_session needs:
+pack_info plus study_material.
+
+Usage:
+    python benchmarks/pack_format_benchmark.py [learning_pack.json ...] [--runs 200]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+from pack_format import load_pack, write_pack, ZSTD_AVAILABLE
+
+def time_it(fn, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+def first_screen(path: str):
+    pack = load_pack(path)
+    return pack["pack_info"]["title"], pack["study_material"]["key_concepts"]
+
+def full_load(path: str):
+    pack = load_pack(path)
+    return [pack[name] for name in pack]
+
+def benchmark(json_path: str, runs: int):
+    with open(json_path, encoding="utf-8") as f:
+        pack = json.load(f)
+    workdir = tempfile.mkdtemp()
+    variants = {"json (indent=2)": json_path}
+    compact_path = os.path.join(workdir, "compact.json")
+    with open(compact_path, "w", encoding="utf-8") as f:
+        json.dump(pack, f, ensure_ascii=False, separators=(",", ":"))
+    variants["json (compact)"] = compact_path
+    for codec in (["zstd"] if ZSTD_AVAILABLE else []) + ["gzip"]:
+        variants[f"tpk ({codec})"] = write_pack(pack, os.path.join(workdir, f"pack.{codec}.tpk"), codec)
+
+    baseline = os.path.getsize(json_path)
+    print(f"\n{json_path}")
+    print(f"{'format':<18} {'bytes':>10} {'size':>6} {'first screen':>14} {'full load':>12}")
+    for label, path in variants.items():
+        size = os.path.getsize(path)
+        print(f"{label:<18} {size:>10,} {size / baseline:>6.0%} "
+              f"{time_it(lambda: first_screen(path), runs) * 1e6:>11.0f} µs "
+              f"{time_it(lambda: full_load(path), runs) * 1e6:>9.0f} µs")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark learning pack storage formats")
+    parser.add_argument("packs", nargs="*", default=[os.path.join(BACKEND_DIR, "learning_pack.json")])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    if not ZSTD_AVAILABLE:
+        print("ℹ️ zstandard not installed - benchmarking gzip only (pip install zstandard)")
+    for path in args.packs:
+        benchmark(path, args.runs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Book Content Extraction
+Reads chapter text straight from the MCP PDF tools (pdf_reader_computer7,
+pdf_reader_english7) without an LLM in the loop: one tool call per book,
+a regex split on chapter/unit headings, and a check that rejects error or
+"unable to access" text so it never ends up in a learning pack.
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, Optional
+
+# MCP tool serving each subject's textbook (Mcp_Tools/main.py), by subject keyword
+SUBJECT_PDF_TOOLS = {
+    "computer": "pdf_reader_computer7",
+    "english": "pdf_reader_english7",
+}
+BOOK_CHAPTER_MAX_CHARS = int(os.getenv("BOOK_CHAPTER_MAX_CHARS", "12000"))
+BOOK_CHAPTER_MIN_CHARS = int(os.getenv("BOOK_CHAPTER_MIN_CHARS", "200"))
+
+CHAPTER_HEADING = re.compile(r"^\s*(?:unit|chapter|lesson)\s*(?:no\.?\s*)?[-:#]?\s*(\d{1,2})\b", re.IGNORECASE | re.MULTILINE)
+UNAVAILABLE_TEXT = re.compile(
+    r"unable to (?:access|find|read|open)|(?:can ?not|can't|couldn't|could not) (?:access|find|read|open)"
+    r"|pdf (?:file )?(?:is |seems to be )?missing|pdf_not_found|failed_open_pdf",
+    re.IGNORECASE,
+)
+
+# Full book text per tool - a textbook doesn't change while the process runs
+_book_text: Dict[str, str] = {}
+
+def pdf_tool_for(subject: str) -> Optional[str]:
+    """MCP tool name for a subject, or None when there is no textbook for it"""
+    for keyword, tool_name in SUBJECT_PDF_TOOLS.items():
+        if keyword in subject.lower():
+            return tool_name
+    return None
+
+def is_usable_text(text: str) -> bool:
+    """True for real chapter text; False for empty, too short or error/"unable to access" text"""
+    if not text or len(text.strip()) < BOOK_CHAPTER_MIN_CHARS:
+        return False
+    return not UNAVAILABLE_TEXT.search(text[:1000])
+
+def tool_payload(result: Any) -> Dict[str, Any]:
+    """The dict a PDF tool returned, from an MCP CallToolResult"""
+    structured = getattr(result, "structuredContent", None)
+    if isinstance(structured, dict):
+        # FastMCP wraps non-object return values in {"result": ...}
+        return structured if "result" in structured or "error" in structured else {"result": structured}
+    for item in getattr(result, "content", None) or []:
+        text = getattr(item, "text", None)
+        if text:
+            try:
+                payload = json.loads(text)
+            except json.JSONDecodeError:
+                return {"result": text}
+            return payload if isinstance(payload, dict) else {"result": payload}
+    return {"error": "empty_result"}
+
+def extract_chapter(book_text: str, chapter: int) -> Optional[str]:
+    """Text from the chapter's first heading up to the next chapter's heading"""
+    headings = [(int(match.group(1)), match.start()) for match in CHAPTER_HEADING.finditer(book_text)]
+    # The table of contents lists every heading too - the body's occurrence is the last one
+    starts = [position for number, position in headings if number == chapter]
+    if not starts:
+        return None
+    start = starts[-1]
+    end = next((position for number, position in headings if position > start and number != chapter), len(book_text))
+    return book_text[start:end].strip()[:BOOK_CHAPTER_MAX_CHARS]
+
+async def fetch_book_text(server, tool_name: str) -> Optional[str]:
+    """Whole book text from a PDF tool (one MCP call per book per process)"""
+    if tool_name not in _book_text:
+        payload = tool_payload(await server.call_tool(tool_name, {"action": "get_all"}))
+        if "error" in payload:
+            print(f"⚠️ {tool_name}: {payload.get('message') or payload['error']}")
+            return None
+        text = payload.get("result")
+        if not isinstance(text, str) or not is_usable_text(text):
+            return None
+        _book_text[tool_name] = text
+    return _book_text[tool_name]
+
+async def fetch_chapter_text(server, subject: str, chapter: int) -> Optional[str]:
+    """Exact chapter text from the subject's textbook, or None when it can't be read"""
+    tool_name = pdf_tool_for(subject)
+    if tool_name is None:
+        return None
+    book_text = await fetch_book_text(server, tool_name)
+    if book_text is None:
+        return None
+    chapter_text = extract_chapter(book_text, chapter)
+    if chapter_text is None:
+        print(f"⚠️ No heading for chapter {chapter} in {tool_name}")
+        return None
+    return chapter_text if is_usable_text(chapter_text) else None
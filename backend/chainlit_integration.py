@@ -17,18 +17,11 @@ from openai.types.responses import ResponseTextDeltaEvent
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'companion_agents'))
 
-from companion_agents.main_orchestrator import MultiAgentOrchestrator, hybrid_agent
-from enhanced_learning_pack_generator import EnhancedLearningPackGenerator
-from offline_learning_agent import OfflineLearningAgent
-# Global orchestrator instance
-orchestrator = None
-
+from companion_agents.main_orchestrator import MultiAgentOrchestrator, start_ollama_warmup
+from token_sinks import ChainlitSink
 async def get_orchestrator():
-    """Get or create the orchestrator instance"""
-    global orchestrator
-    if orchestrator is None:
-        orchestrator = MultiAgentOrchestrator()
-    return orchestrator
+    """Create the orchestrator for this Chainlit session (per-student state stays isolated)"""
+    return MultiAgentOrchestrator(session_id=cl.user_session.get("id"))
 
 async def cleanup_mcp_servers(mcp_servers):
     """Cleanup MCP servers"""
@@ -48,14 +41,24 @@ async def start():
         # Get orchestrator
         orch = await get_orchestrator()
         
+        # Pin the local Ollama model in memory (first session only, runs in background)
+        start_ollama_warmup()
+        
+        # Authenticated users can carry a student record (grade_level, subject, ...) in their metadata
+        user = cl.user_session.get("user")
+        if user and getattr(user, "metadata", None):
+            orch.student_context.update_profile(user.metadata)
+        
         # Store in session
         cl.user_session.set("orchestrator", orch)
         cl.user_session.set("current_phase", "triage")  # Start with triage
         cl.user_session.set("history", [])
         cl.user_session.set("offline_mode", False)
         
-        # Get network status
-        speed_mbps, is_degrade = orch.hybrid_agent.bandwidth_monitor.get_network_status(force_check=True)
+        # Get network status (probe runs off the event loop so other sessions keep streaming)
+        speed_mbps, is_degrade = await asyncio.to_thread(
+            orch.hybrid_agent.bandwidth_monitor.get_network_status, force_check=True
+        )
         
         # Display system status
         status_message = f"""
@@ -98,6 +101,9 @@ async def end():
                     await server.disconnect()
         except Exception as e:
             print(f"⚠️ Error during cleanup: {e}")
+        
+        # Release this student's agent from the session pool
+        orch.close()
     
     print("🔌 Chat session ended and cleaned up")
 
@@ -218,15 +224,14 @@ async def handle_offline_command(orch, user_input):
 
 async def handle_feedback(orch):
     """Handle feedback request"""
-    msg = cl.Message(content="🔄 Getting feedback...")
+    msg = cl.Message(content="")
     await msg.send()
     
     try:
-        response = await orch.get_hybrid_response(
+        await stream_response(msg, orch.stream_hybrid_response(
             "Please provide feedback on my learning progress. Give me encouragement and suggestions for improvement.", 
             "Feedback Agent"
-        )
-        await msg.update(content=response)
+        ))
     except Exception as e:
         await msg.update(content=f"❌ Error getting feedback: {e}")
 
@@ -236,11 +241,11 @@ async def handle_triage_phase(orch, user_input):
     await msg.send()
     
     try:
-        # Use hybrid system for response
-        response = await orch.get_hybrid_response(user_input, "Olivia")
+        # Grade and subject come from the student's answers - the Olivia persona never writes a handoff JSON
+        orch.student_context.update_from_student_message(user_input)
         
-        # Stream the response
-        await stream_response(msg, response)
+        # Forward tokens from the hybrid system as the model produces them, screened for safety in parallel
+        response = await stream_screened_response(orch, msg, orch.stream_hybrid_response(user_input, "Olivia"), "Triage response")
         
         # Check if should move to tutoring phase
         if "handoff" in response.lower() or "tutor" in response.lower():
@@ -262,11 +267,8 @@ async def handle_tutoring_phase(orch, user_input):
     await msg.send()
     
     try:
-        # Use hybrid system for response
-        response = await orch.get_hybrid_response(user_input, "Tutor")
-        
-        # Stream the response
-        await stream_response(msg, response)
+        # Forward tokens from the hybrid system as the model produces them, screened for safety in parallel
+        response = await stream_screened_response(orch, msg, orch.stream_hybrid_response(user_input, "Tutor"), "Tutor response")
         
         # Update history
         history = cl.user_session.get("history", [])
@@ -277,20 +279,37 @@ async def handle_tutoring_phase(orch, user_input):
     except Exception as e:
         await msg.update(content=f"❌ Error in tutoring phase: {e}")
 
-async def stream_response(msg, response):
-    """Stream response character by character"""
+async def stream_response(msg, token_stream):
+    """Forward model tokens to the message as they arrive; returns the full response"""
+    sink = ChainlitSink(msg)
+    response = ""
+    async with aclosing(token_stream) as tokens:
+        async for token in tokens:
+            await sink.write(token)
+            response += token
+    
     if not response:
         await msg.update(content="(no response)")
-        return
+        return response
+    
+    await sink.close()
+    return response
+
+async def stream_screened_response(orch, msg, token_stream, context):
+    """Stream a response while the Safety Agent screens it; retract the message unless it is safe"""
+    screen = orch.create_safety_screen(context)
+    response = await stream_response(msg, screen.screen(token_stream))
+    orch.report_prompt_cache(orch.hybrid_agent.last_usage)
     
-    # Simulate streaming by sending chunks
-    chunk_size = 3
-    for i in range(0, len(response), chunk_size):
-        chunk = response[i:i + chunk_size]
-        await msg.stream_token(chunk)
-        await asyncio.sleep(0.02)  # Small delay for streaming effect
+    verdict = await screen.verdict()
+    if verdict["status"] != "safe":
+        # Blocked, warning, and unknown (a failed check) are all retracted
+        print(f"⚠️ Safety agent flagged a response ({verdict['status']}): {verdict['message']}")
+        response = orch.retract_last_response()
+        msg.content = response
+        await msg.update()
     
-    await msg.update()
+    return response
 
 # Run the Chainlit app
 if __name__ == "__main__":
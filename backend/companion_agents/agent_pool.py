@@ -0,0 +1,108 @@
+import os
+import time
+from collections import OrderedDict
+
+# Session pool Configuration
+MAX_SESSION_AGENTS = int(os.getenv("MAX_SESSION_AGENTS", "200"))           # Upper bound on live per-student agents
+SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))  # Evict agents idle longer than this
+
+class HybridAgentPool:
+    """Bounded pool of per-session agents with idle-TTL eviction.
+
+    ``agent_factory(session_id)`` builds a new agent; it is expected to hand the
+    agent the shared heavyweight clients so that only conversation state is
+    per-session. Entries are kept in least-recently-used order, so expired
+    sessions are always at the front of the pool. Evicted sessions leave their
+    rolling summary behind, so a student who comes back keeps the gist of the
+    conversation.
+    """
+
+    def __init__(self, agent_factory, max_sessions: int = MAX_SESSION_AGENTS,
+                 idle_ttl_seconds: float = SESSION_IDLE_TTL_SECONDS):
+        self.agent_factory = agent_factory
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self._agents = OrderedDict()  # session_id -> (agent, last_used)
+        self._summaries = OrderedDict()  # session_id -> summary of an evicted session
+        self.created = 0
+        self.evicted = 0   # Dropped to stay under max_sessions
+        self.expired = 0   # Idle past the TTL
+        self.released = 0  # Ended by the caller
+
+    def __len__(self):
+        return len(self._agents)
+
+    def __contains__(self, session_id):
+        return session_id in self._agents
+
+    def get(self, session_id: str):
+        """Return the agent for a session, creating it on first use"""
+        now = time.monotonic()
+        self.evict_idle(now)
+
+        entry = self._agents.get(session_id)
+        if entry is not None:
+            agent = entry[0]
+            self._agents[session_id] = (agent, now)
+            self._agents.move_to_end(session_id)
+            return agent
+
+        agent = self.agent_factory(session_id)
+        summary = self._summaries.pop(session_id, None)
+        memory = getattr(agent, "memory", None)
+        if summary and memory is not None:
+            memory.summary = summary  # Returning student - pick up where the evicted session left off
+        self._agents[session_id] = (agent, now)
+        self.created += 1
+
+        # Keep the pool bounded - drop the least recently used sessions
+        while len(self._agents) > self.max_sessions:
+            old_session_id, (old_agent, last_used) = self._agents.popitem(last=False)
+            print(f"⚠️ Session pool full ({self.max_sessions}) - evicting session {old_session_id} "
+                  f"(idle {now - last_used:.0f}s); its summary is kept for when it returns")
+            self.evicted += 1
+            self._dispose(old_session_id, old_agent)
+        return agent
+
+    def release(self, session_id: str):
+        """Drop a session's agent (e.g. when the chat ends)"""
+        entry = self._agents.pop(session_id, None)
+        self._summaries.pop(session_id, None)
+        if entry is not None:
+            self.released += 1
+            self._dispose(session_id, entry[0], keep_summary=False)
+
+    def evict_idle(self, now: float = None):
+        """Evict sessions idle for longer than the TTL"""
+        now = time.monotonic() if now is None else now
+        while self._agents:
+            session_id, (agent, last_used) = next(iter(self._agents.items()))
+            if now - last_used < self.idle_ttl_seconds:
+                break
+            del self._agents[session_id]
+            self.expired += 1
+            self._dispose(session_id, agent)
+
+    def stats(self):
+        """Pool size and lifetime counters"""
+        return {
+            "active_sessions": len(self._agents),
+            "max_sessions": self.max_sessions,
+            "created": self.created,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "released": self.released,
+            "saved_summaries": len(self._summaries),
+        }
+
+    def _dispose(self, session_id: str, agent, keep_summary: bool = True):
+        memory = getattr(agent, "memory", None)
+        if memory is None:
+            return
+        if keep_summary:
+            summary = memory.snapshot()
+            if summary:
+                self._summaries[session_id] = summary
+                while len(self._summaries) > self.max_sessions:
+                    self._summaries.popitem(last=False)
+        memory.clear()  # Cancels any pending background summarization
@@ -8,24 +8,15 @@ from agents import Agent, AsyncOpenAI, OpenAIChatCompletionsModel, Runner, Model
 # Load environment variables
 load_dotenv()
 
-# Disable extra tracing/logging for cleaner output
-set_tracing_disabled(True)
-
-# Create API provider
-Provider = AsyncOpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
-
-# Set up the chat completion model
-model = OpenAIChatCompletionsModel(
-    model="gemini-2.0-flash",
-    openai_client=Provider,
-)
+# Set up the chat completion model lazily (no client is built at import time)
+def get_model():
+    """Gemini chat completion model on the shared connection pool (created on first use)"""
+    return get_gemini_model()
 
 # Import assessment prompt
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PROMPTS.assessment_agent_prompt import Assessment_Agent_Prompt
+from llm_clients import get_gemini_model
 
 async def extract_json_payload(run_result: RunResult) -> str:
     """Custom output extractor for Assessment Agent. Extracts JSON payload from the agent's output."""
@@ -59,12 +50,15 @@ def create_assessment_agent():
     return Agent(
         name="AssessmentAgent",
         instructions=Assessment_Agent_Prompt,
-        model=model,
+        model=get_model(),
         model_settings=ModelSettings(temperature=0.3),
     )
 
 async def main():
     """Test the Assessment Agent independently"""
+    # Disable extra tracing/logging for cleaner output
+    set_tracing_disabled(True)
+    
     session = SQLiteSession(session_id="test_assessment")
     assessment_agent = create_assessment_agent()
     
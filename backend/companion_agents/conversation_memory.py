@@ -0,0 +1,130 @@
+import asyncio
+import os
+from collections import deque
+
+# History budget Configuration
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "1200"))  # Verbatim recent turns (Ollama runs with num_ctx 2048)
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "256"))   # Rolling summary of older turns
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token plus per-message overhead)"""
+    return len(text or "") // 4 + 4
+
+class ConversationMemory:
+    """Token-budgeted conversation window that folds older turns into a rolling summary.
+
+    Recent messages are kept verbatim while they fit in ``token_budget``. Older
+    messages are evicted into a pending batch that a background task folds into
+    ``summary`` using the ``summarizer`` coroutine (falls back to an extractive
+    summary when no summarizer is set or it fails).
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET, summary_token_budget: int = SUMMARY_TOKEN_BUDGET,
+                 summarizer=None, min_recent_messages: int = 2):
+        self.token_budget = token_budget
+        self.summary_token_budget = summary_token_budget
+        self.summarizer = summarizer  # async (previous_summary, messages) -> str
+        self.min_recent_messages = min_recent_messages
+        self.recent = deque()
+        self.recent_tokens = 0
+        self.summary = ""
+        self._pending = []
+        self._summary_task = None
+
+    def __len__(self):
+        return len(self.recent)
+
+    def add(self, role: str, content: str):
+        """Record a message and evict the oldest turns if over budget"""
+        message = {"role": role, "content": content or ""}
+        self.recent.append(message)
+        self.recent_tokens += estimate_tokens(message["content"])
+        self._trim()
+
+    def replace_last_reply(self, content: str):
+        """Replace the latest assistant reply (or record one if the reply was cut off)"""
+        if self.recent and self.recent[-1]["role"] == "assistant":
+            message = self.recent.pop()
+            self.recent_tokens -= estimate_tokens(message["content"])
+        self.add("assistant", content)
+
+    def messages(self, system_prompt: str = None) -> list:
+        """Build the prompt messages: system prompt, rolling summary, then recent turns"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"})
+        messages.extend(self.recent)
+        return messages
+
+    def snapshot(self) -> str:
+        """Rolling summary with the unsummarized and recent turns folded in (extractively)"""
+        return self._truncate(self._extractive_summary(self.summary, self._pending + list(self.recent)))
+
+    def clear(self):
+        """Forget all turns and the summary"""
+        self.recent.clear()
+        self.recent_tokens = 0
+        self.summary = ""
+        self._pending = []
+        if self._summary_task and not self._summary_task.done():
+            self._summary_task.cancel()
+        self._summary_task = None
+
+    async def flush(self):
+        """Wait for any background summarization to finish"""
+        while self._summary_task and not self._summary_task.done():
+            await self._summary_task
+
+    def _trim(self):
+        evicted = False
+        while self.recent_tokens > self.token_budget and len(self.recent) > self.min_recent_messages:
+            message = self.recent.popleft()
+            self.recent_tokens -= estimate_tokens(message["content"])
+            self._pending.append(message)
+            evicted = True
+        if evicted:
+            self._schedule_summary()
+
+    def _schedule_summary(self):
+        if self._summary_task and not self._summary_task.done():
+            return  # Running task picks up the new pending messages
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (sync caller) - fold synchronously without the LLM
+            self._fold_extractive()
+            return
+        self._summary_task = loop.create_task(self._fold_pending())
+
+    async def _fold_pending(self):
+        while self._pending:
+            batch, self._pending = self._pending, []
+            new_summary = None
+            if self.summarizer:
+                try:
+                    new_summary = await self.summarizer(self.summary, batch)
+                except Exception:
+                    new_summary = None  # Fall back to extractive summary
+            if not new_summary:
+                new_summary = self._extractive_summary(self.summary, batch)
+            self.summary = self._truncate(new_summary.strip())
+
+    def _fold_extractive(self):
+        batch, self._pending = self._pending, []
+        self.summary = self._truncate(self._extractive_summary(self.summary, batch))
+
+    def _extractive_summary(self, previous_summary: str, batch: list) -> str:
+        """Keep the first sentence of each evicted message"""
+        parts = [previous_summary] if previous_summary else []
+        for message in batch:
+            first_sentence = message["content"].strip().split("\n")[0].split(". ")[0]
+            if first_sentence:
+                parts.append(f"{message['role']}: {first_sentence[:160]}")
+        return " | ".join(parts)
+
+    def _truncate(self, text: str) -> str:
+        # Keep the most recent part of the summary when it outgrows its budget
+        max_chars = self.summary_token_budget * 4
+        return text if len(text) <= max_chars else text[-max_chars:]
@@ -2,14 +2,18 @@ import asyncio
 import os
 import sys
 import json
+import re
 import time
 import urllib.request
 import signal
+from contextlib import aclosing
 from dataclasses import dataclass
+from functools import cached_property
 from dotenv import load_dotenv, find_dotenv
-from agents import Agent, AsyncOpenAI, OpenAIChatCompletionsModel, Runner, ModelSettings, SQLiteSession, set_tracing_disabled, set_tracing_export_api_key, trace
+from agents import Agent, AsyncOpenAI, OpenAIChatCompletionsModel, Runner, ModelSettings, SQLiteSession, set_tracing_disabled, set_tracing_export_api_key, trace, custom_span
 from agents.mcp import MCPServerStreamableHttp
 from ollama import AsyncClient
+from openai.types.responses import ResponseTextDeltaEvent
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -19,24 +23,63 @@ from triage_agent import create_triage_agent
 from tutor_agent import create_tutor_agent_with_tools
 from feedback_agent import create_feedback_agent
 from safety_agent import create_safety_agent, check_content_safety
+from conversation_memory import ConversationMemory, estimate_tokens
+from agent_pool import HybridAgentPool
+from token_sinks import TokenSink, NullSink, StdoutSink
+from session_store import get_session_store
+from safety_pipeline import StreamingSafetyScreen, SAFE_REPLACEMENT
+from response_cache import response_cache
+from prompt_cache_stats import prompt_cache_stats
 
-# Import learning pack system
-import sys
+# Learning pack system is imported on first use (keeps orchestrator import fast)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from learning_pack_generator import LearningPackGenerator
-from enhanced_learning_pack_generator import EnhancedLearningPackGenerator
-from offline_learning_agent import OfflineLearningAgent
+from llm_scheduler import llm_scheduler, agent_backend, BATCH
+from mcp_connection import close_all_mcp_connections
+from llm_clients import client_factory, get_openai_client, get_gemini_model, get_ollama_client
+from ollama_profiles import OLLAMA_MODEL, OLLAMA_KEEP_ALIVE, OLLAMA_LOAD_OPTIONS, build_ollama_options, select_ollama_profile
+from PROMPTS.prompt_compiler import compile_prompt
+from PROMPTS.hybrid_persona_prompts import HYBRID_PERSONA_PROMPTS
 
 # Load environment variables
 _ = load_dotenv(find_dotenv())
 
-# Set up tracing with API key from environment
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if OPENAI_API_KEY:
-    set_tracing_export_api_key(OPENAI_API_KEY)
+_tracing_configured = False
+
+# Chat model for hybrid turns, and the model families with provider-side prompt caching
+HYBRID_OPENAI_MODEL = os.getenv("HYBRID_OPENAI_MODEL", "gpt-3.5-turbo")
+PROMPT_CACHING_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+
+def get_system_prompt(agent_name: str):
+    """Short persona for a hybrid turn (the full agent prompts assume tools and a JSON output contract)"""
+    return HYBRID_PERSONA_PROMPTS.get(agent_name)
+
+def supports_prompt_caching(model: str) -> bool:
+    """True for models whose provider caches repeated prompt prefixes"""
+    return model.startswith(PROMPT_CACHING_MODELS)
 
-# Enable tracing for workflow monitoring
-set_tracing_disabled(False)
+def network_adaptive_instructions(prompt_name: str, bandwidth_monitor):
+    """Agent instructions resolved on every run: the compact variant while the network is degraded"""
+    compiled = compile_prompt(prompt_name)
+
+    def instructions(run_context, agent) -> str:
+        return compiled.variant(compact=bandwidth_monitor.is_degrade_mode())
+    return instructions
+
+# Smallest reply budget kept when a local turn is trimmed to fit num_ctx
+OLLAMA_MIN_PREDICT = int(os.getenv("OLLAMA_MIN_PREDICT", "256"))
+
+def configure_tracing():
+    """Set up tracing with API key from environment (once, on first orchestrator use)"""
+    global _tracing_configured
+    if _tracing_configured:
+        return
+    if OPENAI_API_KEY:
+        set_tracing_export_api_key(OPENAI_API_KEY)
+    
+    # Enable tracing for workflow monitoring
+    set_tracing_disabled(False)
+    _tracing_configured = True
 
 # MCP Server Configuration
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
@@ -48,6 +91,10 @@ LOCAL_MCP_SERVER_URL = os.getenv("LOCAL_MCP_SERVER_URL", "http://localhost:8000/
 # Degrade Mode Configuration
 DEGRADE_THRESHOLD_MBPS = float(os.getenv("DEGRADE_THRESHOLD_MBPS", "130.0"))  # Switch to degrade mode below this speed
 
+# Ollama stream resume attempts before giving up on a broken stream
+OLLAMA_MAX_RESUMES = int(os.getenv("OLLAMA_MAX_RESUMES", "2"))
+OLLAMA_RESUME_BACKOFF_SECONDS = float(os.getenv("OLLAMA_RESUME_BACKOFF_SECONDS", "0.5"))  # Doubled on each retry
+
 class BandwidthMonitor:
     """Monitors network bandwidth and determines degrade mode status"""
     
@@ -140,100 +187,148 @@ class AdaptiveModelSettings:
 
 class OllamaAgent:
     """Handles local Ollama model interactions with streaming support"""
-    def __init__(self, model_name: str, host: str = "http://127.0.0.1:11434"):
+    def __init__(self, model_name: str, host: str = "http://127.0.0.1:11434", memory: ConversationMemory = None,
+                 client: AsyncClient = None):
         self.model_name = model_name
         self.host = host
-        self.client = AsyncClient(host=host)
-        self.conversation_history = []
+        self.client = client or get_ollama_client(host)  # Shared connection pool
+        self.memory = memory or ConversationMemory()
+        self.profile = "balanced"  # Option profile, updated per turn by HybridAgent
+        self.last_usage = None     # Prompt token counts of the last reply
+
+    @property
+    def conversation_history(self):
+        """Messages currently sent to the model (summary + recent turns)"""
+        return self.memory.messages()
 
-    async def chat(self, user_input: str, temperature: float = 0.7, max_tokens: int = 5000):
+    async def chat(self, user_input: str, temperature: float = 0.7, max_tokens: int = 5000, sink: TokenSink = None):
         """Chat with Ollama model using streaming with optimized settings"""
         # Add user message to history
-        self.conversation_history.append({"role": "user", "content": user_input})
-        
-        # Get response from Ollama with streaming and optimized settings
+        self.memory.add("user", user_input)
+        return await self.respond(temperature=temperature, max_tokens=max_tokens, sink=sink)
+
+    async def respond(self, temperature: float = 0.7, max_tokens: int = 5000, profile: str = None,
+                      sink: TokenSink = None):
+        """Generate a reply to the conversation in memory and record it (tokens go to sink)"""
+        sink = sink or NullSink()
         full_response = ""
+        async for token in self.stream_response(temperature=temperature, max_tokens=max_tokens, profile=profile):
+            await sink.write(token)
+            full_response += token
+        
+        await sink.close()
+        return full_response
+
+    async def stream_response(self, temperature: float = 0.7, max_tokens: int = 5000, profile: str = None,
+                              partial: str = "", system_prompt: str = None):
+        """Stream a reply to the conversation in memory token by token, then record it.
+
+        ``partial`` is text already shown to the student (e.g. from a failed
+        OpenAI stream); the model continues it instead of starting over.
+        ``system_prompt`` goes first so the loaded model reuses its KV cache for it.
+        Prompt plus reply budget is kept within num_ctx: the reply budget shrinks
+        first, and the system prompt is left out only if even that isn't enough.
+        """
+        messages = self.memory.messages(system_prompt)
+        self.last_usage = None
+        options = build_ollama_options(profile or self.profile, temperature=temperature, max_tokens=max_tokens)
+        num_ctx, budget = options["num_ctx"], options["num_predict"]
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        if system_prompt and prompt_tokens + min(budget, OLLAMA_MIN_PREDICT) > num_ctx:
+            messages = self.memory.messages()  # Even a short reply wouldn't fit with it
+            prompt_tokens -= estimate_tokens(system_prompt)
+        options["num_predict"] = min(budget, max(OLLAMA_MIN_PREDICT, num_ctx - prompt_tokens))
+        num_predict = options["num_predict"]  # Budget for the whole reply, resumes included
+        
+        # Stream the response; if the stream breaks, resume from the partial text
+        # instead of regenerating the whole answer
+        full_response = partial
+        resumes = 0
+        while True:
+            request_messages = messages
+            if full_response:
+                # A trailing assistant message makes Ollama continue it
+                request_messages = messages + [{"role": "assistant", "content": full_response}]
+                options["num_predict"] = max(1, num_predict - estimate_tokens(full_response))
+            try:
+                chat_stream = await self.client.chat(
+                    model=self.model_name,
+                    messages=request_messages,
+                    stream=True,
+                    options=options,
+                    keep_alive=OLLAMA_KEEP_ALIVE,
+                )
+                async for chunk in chat_stream:
+                    if hasattr(chunk, 'message') and chunk.message and chunk.message.content:
+                        full_response += chunk.message.content
+                        yield chunk.message.content
+                    if getattr(chunk, "done", False):
+                        # Measured by Ollama: prompt tokens not reused from the KV cache, and their eval time
+                        self.last_usage = {
+                            "backend": "ollama",
+                            "prompt_eval_count": getattr(chunk, "prompt_eval_count", 0) or 0,
+                            "prompt_eval_ms": (getattr(chunk, "prompt_eval_duration", 0) or 0) / 1e6,
+                        }
+                break
+            except Exception as e:
+                resumes += 1
+                if resumes > OLLAMA_MAX_RESUMES:
+                    if not full_response:
+                        raise
+                    print(f"\n⚠️ Ollama streaming error: {e} - keeping partial response")
+                    break
+                print(f"\n⚠️ Ollama streaming error: {e} - resuming")
+                await asyncio.sleep(OLLAMA_RESUME_BACKOFF_SECONDS * 2 ** (resumes - 1))
+        
+        # Add assistant response to history
+        self.memory.add("assistant", full_response)
+
+    async def warmup(self):
+        """Load the model and pin it in memory so the first turn isn't a cold start"""
         try:
-            # Await the chat method first, then iterate
-            chat_stream = await self.client.chat(
+            # An empty prompt only loads the model; same load options as chat so it isn't reloaded
+            await self.client.generate(
                 model=self.model_name,
-                messages=self.conversation_history,
-                stream=True,
-                options={
-                    "temperature": temperature,
-                    "num_predict": max_tokens,
-                    "num_ctx": 2048,  # Reduce context window for faster processing
-                    "num_batch": 512,  # Optimize batch size
-                    "num_thread": 4,   # Use 4 threads for faster processing
-                    "repeat_penalty": 1.1,  # Slight penalty to avoid repetition
-                    "top_k": 40,       # Limit vocabulary for faster generation
-                    "top_p": 0.9,      # Nucleus sampling for faster generation
-                    "tfs_z": 1.0,      # Tail free sampling
-                    "typical_p": 1.0,  # Typical sampling
-                    "mirostat": 0,     # Disable mirostat for speed
-                    "mirostat_eta": 0.1,
-                    "mirostat_tau": 5.0,
-                    "repeat_last_n": 64,  # Reduce repetition context
-                    "penalize_newline": True,  # Penalize newlines for faster responses
-                    "stop": ["\n\n", "Human:", "User:"]  # Stop tokens for faster completion
-                }
+                prompt="",
+                options=dict(OLLAMA_LOAD_OPTIONS),
+                keep_alive=OLLAMA_KEEP_ALIVE,
             )
-            
-            async for chunk in chat_stream:
-                if hasattr(chunk, 'message') and chunk.message and chunk.message.content:
-                    print(chunk.message.content, end="", flush=True)
-                    full_response += chunk.message.content
+            print(f"✅ Ollama model {self.model_name} warmed up (keep_alive={OLLAMA_KEEP_ALIVE})")
+            return True
         except Exception as e:
-            print(f"⚠️ Ollama streaming error: {e}")
-            # Fallback to non-streaming with same optimized settings
-            resp = await self.client.chat(
-                model=self.model_name,
-                messages=self.conversation_history,
-                stream=False,
-                options={
-                    "temperature": temperature,
-                    "num_predict": max_tokens,
-                    "num_ctx": 2048,
-                    "num_batch": 512,
-                    "num_thread": 4,
-                    "repeat_penalty": 1.1,
-                    "top_k": 40,
-                    "top_p": 0.9,
-                    "tfs_z": 1.0,
-                    "typical_p": 1.0,
-                    "mirostat": 0,
-                    "mirostat_eta": 0.1,
-                    "mirostat_tau": 5.0,
-                    "repeat_last_n": 64,
-                    "penalize_newline": True,
-                    "stop": ["\n\n", "Human:", "User:"]
-                }
-            )
-            full_response = resp.message.content
-        
-        print()  # New line after streaming
-        # Add assistant response to history
-        self.conversation_history.append({"role": "assistant", "content": full_response})
-        
-        return full_response
+            print(f"⚠️ Ollama warmup skipped: {e}")
+            return False
 
 class HybridAgent:
     """Hybrid agent that uses OpenAI with Ollama fallback and bandwidth-aware degrade mode"""
-    def __init__(self, ollama_model_name: str = "llama3.1", openai_api_key: str = None):
-        self.ollama_agent = OllamaAgent(model_name=ollama_model_name)
+    def __init__(self, ollama_model_name: str = OLLAMA_MODEL, openai_api_key: str = None, openai_client: AsyncOpenAI = None,
+                 ollama_client: AsyncClient = None, bandwidth_monitor: BandwidthMonitor = None,
+                 session_id: str = "default"):
+        self.session_id = session_id  # Fair-queuing lane in the LLM scheduler
+        # Shared memory between models: recent turns within a token budget plus a rolling summary
+        self.memory = ConversationMemory(summarizer=self._summarize)
+        self.ollama_agent = OllamaAgent(model_name=ollama_model_name, memory=self.memory, client=ollama_client)
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
         self.use_openai = False
         self.openai_client = None
         self.openai_model = None
-        self.conversation_history = []  # Shared memory between models
-        self.bandwidth_monitor = BandwidthMonitor()  # Add bandwidth monitoring
+        self.bandwidth_monitor = bandwidth_monitor or BandwidthMonitor()  # Add bandwidth monitoring
+        self.last_usage = None  # Prompt/cached token counts of the last turn
         
+        # Reuse a shared OpenAI client when the caller provides one
+        if openai_client is not None:
+            self.openai_client = openai_client
+            self.openai_model = OpenAIChatCompletionsModel(
+                model=HYBRID_OPENAI_MODEL,
+                openai_client=self.openai_client
+            )
+            self.use_openai = True
         # Initialize OpenAI if API key is available
-        if self.openai_api_key:
+        elif self.openai_api_key:
             try:
-                self.openai_client = AsyncOpenAI(api_key=self.openai_api_key)
+                self.openai_client = get_openai_client(self.openai_api_key)
                 self.openai_model = OpenAIChatCompletionsModel(
-                    model="gpt-3.5-turbo",
+                    model=HYBRID_OPENAI_MODEL,
                     openai_client=self.openai_client
                 )
                 self.use_openai = True
@@ -243,31 +338,78 @@ class HybridAgent:
                 print("🔄 Falling back to Ollama local model")
                 self.use_openai = False
 
-    async def chat(self, user_input: str):
-        """Chat using hybrid system with bandwidth-aware degrade mode"""
-        # Check network status on every command (force check)
-        speed_mbps, is_degrade = self.bandwidth_monitor.get_network_status(force_check=True)
+    @property
+    def conversation_history(self):
+        """Messages currently sent to the model (summary + recent turns)"""
+        return self.memory.messages()
+
+    async def _summarize(self, previous_summary: str, messages: list) -> str:
+        """Fold evicted turns into the rolling summary (runs in the background)"""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = (
+            "Update the running summary of a tutoring conversation. Keep the student's name, "
+            "level, learning style, topics covered and open questions. Reply with the summary only, "
+            f"in at most {self.memory.summary_token_budget} tokens.\n\n"
+            f"Current summary: {previous_summary or '(none)'}\n\nNew turns:\n{transcript}"
+        )
+        # Background work - queued behind interactive turns
+        if self.use_openai and self.openai_client:
+            async with llm_scheduler.slot("openai", self.session_id, priority=BATCH, key=self.openai_api_key):
+                resp = await self.openai_client.chat.completions.create(
+                    model=HYBRID_OPENAI_MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.2,
+                    max_tokens=self.memory.summary_token_budget
+                )
+            return resp.choices[0].message.content
+        async with llm_scheduler.slot("ollama", self.session_id, priority=BATCH):
+            resp = await self.ollama_agent.client.chat(
+                model=self.ollama_agent.model_name,
+                messages=[{"role": "user", "content": prompt}],
+                stream=False,
+                options=build_ollama_options("fast", temperature=0.2, max_tokens=self.memory.summary_token_budget),
+                keep_alive=OLLAMA_KEEP_ALIVE,
+            )
+        return resp.message.content
+
+    async def chat(self, user_input: str, sink: TokenSink = None):
+        """Chat using hybrid system with bandwidth-aware degrade mode (tokens go to sink)"""
+        sink = sink or NullSink()
+        full_response = ""
+        async for token in self.stream(user_input):
+            await sink.write(token)
+            full_response += token
+        
+        await sink.close()
+        return full_response
+
+    async def stream(self, user_input: str, agent_name: str = "Agent"):
+        """Stream a reply token by token as the model produces it (OpenAI, or Ollama fallback)"""
+        self.last_usage = None
+        # Network status is cached by the monitor and probed off the event loop
+        speed_mbps, is_degrade = await asyncio.to_thread(self.bandwidth_monitor.get_network_status)
         
-        # Add user message to history
-        self.conversation_history.append({"role": "user", "content": user_input})
+        # Short persona only - the full agent prompts would add ~1-3k tokens to every turn
+        system_prompt = get_system_prompt(agent_name)
         
-        # Sync memory with Ollama agent
-        self.ollama_agent.conversation_history = self.conversation_history.copy()
+        # Add user message to shared memory (the Ollama agent reads the same memory)
+        self.memory.add("user", user_input)
         
         # Try to reconnect to OpenAI if we're currently using Ollama and network is good
         if not self.use_openai and self.openai_api_key and not is_degrade and speed_mbps > 0:
             try:
-                # Test OpenAI connection
-                test_client = AsyncOpenAI(api_key=self.openai_api_key)
-                await test_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": "test"}],
-                    max_tokens=1
-                )
+                # Test OpenAI connection (reuse the existing client's connection pool)
+                test_client = self.openai_client or get_openai_client(self.openai_api_key)
+                async with llm_scheduler.slot("openai", self.session_id, key=self.openai_api_key):
+                    await test_client.chat.completions.create(
+                        model=HYBRID_OPENAI_MODEL,
+                        messages=[{"role": "user", "content": "test"}],
+                        max_tokens=1
+                    )
                 # If successful, switch back to OpenAI
                 self.openai_client = test_client
                 self.openai_model = OpenAIChatCompletionsModel(
-                    model="gpt-3.5-turbo",
+                    model=HYBRID_OPENAI_MODEL,
                     openai_client=self.openai_client
                 )
                 self.use_openai = True
@@ -275,6 +417,9 @@ class HybridAgent:
                 # OpenAI still not available, continue with Ollama
                 pass
         
+        # Text already streamed to the student before an OpenAI failure
+        partial = ""
+        
         # Use OpenAI if available and network conditions allow
         if self.use_openai and self.openai_client and speed_mbps > 0:
             try:
@@ -290,37 +435,56 @@ class HybridAgent:
                     max_tokens = 4096
                     top_p = 1.0
                 
-                # Try OpenAI with appropriate settings and streaming
-                full_response = ""
-                stream = await self.openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=self.conversation_history,
-                    temperature=temperature,
-                    max_tokens=max_tokens,
-                    top_p=top_p,
-                    stream=True
-                )
+                # Route requests sharing the static prefix to the same prompt cache (caching models only)
+                extra_body = None
+                if supports_prompt_caching(HYBRID_OPENAI_MODEL):
+                    extra_body = {"prompt_cache_key": f"tutor-hybrid-{agent_name}"}
                 
-                async for chunk in stream:
-                    if chunk.choices[0].delta.content:
-                        print(chunk.choices[0].delta.content, end="", flush=True)
-                        full_response += chunk.choices[0].delta.content
+                # Try OpenAI with appropriate settings and streaming (slot held for the whole stream)
+                async with llm_scheduler.slot("openai", self.session_id, key=self.openai_api_key):
+                    stream = await self.openai_client.chat.completions.create(
+                        model=HYBRID_OPENAI_MODEL,
+                        messages=self.memory.messages(system_prompt),
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        top_p=top_p,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        extra_body=extra_body,
+                    )
+                    
+                    async for chunk in stream:
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            partial += chunk.choices[0].delta.content
+                            yield chunk.choices[0].delta.content
+                        if chunk.usage:
+                            details = chunk.usage.prompt_tokens_details
+                            self.last_usage = {
+                                "backend": "openai",
+                                "prompt_tokens": chunk.usage.prompt_tokens,
+                                "cached_tokens": (details.cached_tokens or 0) if details else 0,
+                            }
                 
-                print()  # New line after streaming
-                self.conversation_history.append({"role": "assistant", "content": full_response})
-                return full_response
+                self.memory.add("assistant", partial)
+                return
                 
             except Exception as e:
                 # OpenAI API error, switching to Ollama
                 self.use_openai = False
-                # Fall through to Ollama
-        
-        # Use Ollama when offline or low network (no degrade mode for Ollama)
+                # Fall through to Ollama (continuing any text already streamed)
         
-        response = await self.ollama_agent.chat(user_input, temperature=0.7, max_tokens=5000)
-        # Sync memory back from Ollama
-        self.conversation_history = self.ollama_agent.conversation_history.copy()
-        return response
+        # Use Ollama when offline or low network, with an option profile for the current conditions
+        # The user turn is already in the shared memory, so only generate the reply
+        self.ollama_agent.profile = select_ollama_profile(speed_mbps, self.bandwidth_monitor.threshold_mbps)
+        async with llm_scheduler.slot("ollama", self.session_id):
+            async for token in self.ollama_agent.stream_response(temperature=0.7, max_tokens=5000, partial=partial,
+                                                                  system_prompt=system_prompt):
+                yield token
+        self.last_usage = self.ollama_agent.last_usage
+
+# The student's own triage answers, for the profile the hybrid persona never writes out as JSON
+GRADE_PATTERN = re.compile(r"\b(?:grade|class)\s*(\d{1,2})\b|\b(\d{1,2})(?:st|nd|rd|th)\s+(?:grade|class)\b", re.IGNORECASE)
+SUBJECT_KEYWORDS = {"computer": "Computer Science", "cs": "Computer Science", "english": "English"}
 
 class StudentContext:
     """Shared context that all agents can access and update."""
@@ -335,64 +499,187 @@ class StudentContext:
         self.progress = {}
         self.assessment_results = []
 
-# Initialize Hybrid System after class definitions
-hybrid_agent = HybridAgent(ollama_model_name="llama3.1")
-
-# Create API provider for Gemini (backup)
-Provider = AsyncOpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
-
-# Set up the chat completion model (use hybrid system)
-if hybrid_agent.use_openai:
-    model = hybrid_agent.openai_model
-else:
-    # Use Gemini as fallback if OpenAI is not available
-    model = OpenAIChatCompletionsModel(
-        model="gemini-2.0-flash",
-        openai_client=Provider,
+    def update_profile(self, profile: dict):
+        """Fill the profile from a student record (handoff student_data, Chainlit user metadata)"""
+        fields = {"name": "student_name", "subject": "subject", "grade_level": "grade_level",
+                  "learning_style": "learning_style", "language": "language"}
+        for key, attribute in fields.items():
+            value = profile.get(key)
+            if value and "|" not in str(value):  # Skip unfilled template values ("visual|aural|...")
+                setattr(self, attribute, str(value))
+
+    def update_from_student_message(self, text: str) -> bool:
+        """Pick up grade and subject from the student's own triage answers ("I'm in grade 7, computer")"""
+        updated = False
+        match = GRADE_PATTERN.search(text or "")
+        if match:
+            grade = int(match.group(1) or match.group(2))
+            if 1 <= grade <= 12:
+                self.grade_level = str(grade)
+                updated = True
+        for keyword, subject in SUBJECT_KEYWORDS.items():
+            if re.search(rf"\b{keyword}\b", text or "", re.IGNORECASE):
+                self.subject = subject
+                updated = True
+                break
+        return updated
+
+    def update_from_handoff(self, text: str) -> bool:
+        """Fill the profile from the triage agent's handoff JSON (its student_data), if text contains one"""
+        decoder = json.JSONDecoder()
+        for start in (i for i, char in enumerate(text or "") if char == "{"):
+            try:
+                data, _ = decoder.raw_decode(text, start)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(data, dict) or not isinstance(data.get("student_data"), dict):
+                continue
+            self.update_profile(data["student_data"])
+            return True
+        return False
+
+# Heavyweight clients shared by every per-student HybridAgent (created on first use)
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+_shared_clients = None
+_global_model = None
+
+def get_shared_clients():
+    """Create the shared OpenAI/Ollama clients and bandwidth monitor on first use"""
+    global _shared_clients
+    if _shared_clients is None:
+        openai_client = None
+        if OPENAI_API_KEY:
+            try:
+                openai_client = get_openai_client(OPENAI_API_KEY)
+                print("✅ OpenAI API connected - using OpenAI for responses")
+            except Exception as e:
+                print(f"⚠️ OpenAI API connection failed: {e}")
+                print("🔄 Falling back to Ollama local model")
+        _shared_clients = {
+            "openai": openai_client,
+            "ollama": get_ollama_client(OLLAMA_HOST),
+            "bandwidth_monitor": BandwidthMonitor(),
+        }
+    return _shared_clients
+
+def create_session_agent(session_id: str) -> HybridAgent:
+    """Create an isolated HybridAgent for one student session using the shared clients"""
+    clients = get_shared_clients()
+    return HybridAgent(
+        ollama_model_name=OLLAMA_MODEL,
+        openai_client=clients["openai"],
+        ollama_client=clients["ollama"],
+        bandwidth_monitor=clients["bandwidth_monitor"],
+        session_id=session_id,
     )
 
-# Make model available globally
-global_model = model
+# Per-session Hybrid agents (bounded, idle sessions evicted on a TTL)
+agent_pool = HybridAgentPool(create_session_agent)
+
+_ollama_warmup_task = None
+
+def start_ollama_warmup():
+    """Warm up the shared Ollama model once per process, in the background"""
+    global _ollama_warmup_task
+    if _ollama_warmup_task is None:
+        warmup_agent = OllamaAgent(model_name=OLLAMA_MODEL, client=get_shared_clients()["ollama"])
+        _ollama_warmup_task = asyncio.get_running_loop().create_task(warmup_agent.warmup())
+    return _ollama_warmup_task
+
+def get_global_model():
+    """Chat completion model shared by the agents (OpenAI, or Gemini as fallback), built on first use"""
+    global _global_model
+    if _global_model is None:
+        openai_client = get_shared_clients()["openai"]
+        if openai_client:
+            _global_model = OpenAIChatCompletionsModel(
+                model="gpt-3.5-turbo",
+                openai_client=openai_client
+            )
+        else:
+            # Use Gemini as fallback if OpenAI is not available
+            _global_model = get_gemini_model()
+    return _global_model
 
 class MultiAgentOrchestrator:
     """Orchestrates the multi-agent tutoring system with hybrid OpenAI/Ollama fallback."""
     
-    def __init__(self):
-        self.session = SQLiteSession(session_id="student_session")
+    def __init__(self, session_id: str = "cli", token_sink: TokenSink = None):
+        configure_tracing()
+        self.session_id = session_id
+        self.token_sink = token_sink or NullSink()  # Where streamed tokens go (StdoutSink for the CLI)
+        # Durable per-student session (WAL SQLite, history capped per session)
+        self.session = get_session_store().get_session(f"student_{session_id}")
         self.student_context = StudentContext()
+        self.student_context.session_id = session_id
         self.current_agent = None
-        self.hybrid_agent = hybrid_agent  # Use the global hybrid agent
         
-        # Create all agents
-        self.triage_agent = self._create_triage_agent()
-        self.tutor_agent = create_tutor_agent_with_tools()
-        self.feedback_agent = create_feedback_agent()
-        self.safety_agent = create_safety_agent()
+        # Agents, models and the learning pack generator are created on first use
         
         # Disable MCP servers to avoid ID conflicts
         self.mcp_servers = []
         print("⚠️ MCP servers disabled to avoid ID conflicts")
         
         # Initialize learning pack system
-        self.learning_pack_generator = EnhancedLearningPackGenerator()
         self.offline_agent = None
         self.current_chapter = 1
         self.current_subject = "Mathematics"
+        self._last_cache_entry = None  # Response cache entry written by the last streamed turn
+        self.last_agent_usage = None   # Prompt/cached token counts of the last agent run
+    
+    @cached_property
+    def triage_agent(self):
+        """Triage Agent (created on first use)"""
+        return self._create_triage_agent()
+    
+    @cached_property
+    def tutor_agent(self):
+        """Tutor Agent with tools (created on first use)"""
+        tutor_agent = create_tutor_agent_with_tools()
+        tutor_agent.instructions = network_adaptive_instructions("tutor", self.hybrid_agent.bandwidth_monitor)
+        return tutor_agent
+    
+    @cached_property
+    def feedback_agent(self):
+        """Feedback Agent (created on first use)"""
+        feedback_agent = create_feedback_agent()
+        feedback_agent.instructions = network_adaptive_instructions("feedback", self.hybrid_agent.bandwidth_monitor)
+        return feedback_agent
+    
+    @cached_property
+    def safety_agent(self):
+        """Safety Agent (created on first use)"""
+        return create_safety_agent()
+    
+    @cached_property
+    def learning_pack_generator(self):
+        """Enhanced learning pack generator (imported and created on first use)"""
+        from enhanced_learning_pack_generator import EnhancedLearningPackGenerator
+        return EnhancedLearningPackGenerator()
+    
+    @property
+    def hybrid_agent(self) -> HybridAgent:
+        """This student's HybridAgent (created on demand, evicted from the pool when idle)"""
+        return agent_pool.get(self.session_id)
+    
+    def close(self):
+        """Release this student's per-session state"""
+        agent_pool.release(self.session_id)
     
     def _create_triage_agent(self):
         """Create the Triage Agent with adaptive settings"""
-        # Get current network status for adaptive settings (force check)
-        speed_mbps, is_degrade = self.hybrid_agent.bandwidth_monitor.get_network_status(force_check=True)
+        # Get current network status for adaptive settings (cached by the shared monitor)
+        speed_mbps, _ = self.hybrid_agent.bandwidth_monitor.get_network_status()
         adaptive_settings = AdaptiveModelSettings.create_for_network_condition(speed_mbps)
         
         # Create triage agent using the imported function
         triage_agent = create_triage_agent()
         
         # Update the model to use the global model
-        triage_agent.model = global_model
+        triage_agent.model = get_global_model()
+        
+        # Compact instructions while degraded (fewer bytes over the slow link), chosen on every run
+        triage_agent.instructions = network_adaptive_instructions("triage", self.hybrid_agent.bandwidth_monitor)
         
         # Apply adaptive settings
         triage_agent.model_settings = ModelSettings(
@@ -449,13 +736,101 @@ class MultiAgentOrchestrator:
     
     async def get_hybrid_response(self, user_input: str, agent_name: str = "Agent"):
         """Get response using hybrid system (OpenAI with Ollama fallback)"""
+        # Same path as streaming (including the response cache), tokens go to the token sink
+        response = ""
+        async with aclosing(self.stream_hybrid_response(user_input, agent_name)) as tokens:
+            async for token in tokens:
+                await self.token_sink.write(token)
+                response += token
+        await self.token_sink.close()
+        self.report_prompt_cache(self.hybrid_agent.last_usage)
+        return response
+    
+    def report_prompt_cache(self, usage: dict):
+        """Record and log one turn's prompt-cache usage (totals in prompt_cache_stats.stats())"""
+        prompt_cache_stats.record(usage)
+    
+    async def stream_hybrid_response(self, user_input: str, agent_name: str = "Agent"):
+        """Stream the hybrid system's response token by token (for Chainlit's msg.stream_token)"""
+        self._last_cache_entry = None
+        bucket = self._cache_bucket(agent_name)
+        cacheable = bucket is not None and response_cache.is_cacheable(user_input)
+        if cacheable:
+            cached = response_cache.lookup(*bucket, user_input)
+            if cached:
+                # Marks the hit in the active trace (the CLI workflow trace); a no-op without one
+                with custom_span("response_cache_hit", data={"agent": agent_name, "similarity": round(cached["similarity"], 3)}):
+                    memory = self.hybrid_agent.memory
+                    memory.add("user", user_input)
+                    memory.add("assistant", cached["response"])
+                # Cache hits stream straight away in a few large chunks
+                for start in range(0, len(cached["response"]), 256):
+                    yield cached["response"][start:start + 256]
+                return
+        
+        response = ""
         try:
-            # Use hybrid agent for response
-            response = await self.hybrid_agent.chat(user_input)
-            return response
+            async for token in self.hybrid_agent.stream(user_input, agent_name):
+                response += token
+                yield token
         except Exception as e:
             print(f"⚠️ Hybrid system error: {e}")
-            return "I apologize, but I'm experiencing technical difficulties. Please try again."
+            yield "I apologize, but I'm experiencing technical difficulties. Please try again."
+            return
+        
+        if cacheable and response:
+            self._last_cache_entry = (bucket, response_cache.store(*bucket, user_input, response))
+    
+    def _cache_bucket(self, agent_name: str):
+        """(agent, topic, grade) bucket for cached responses; None until the student's grade is known"""
+        context = self.student_context
+        if not context.grade_level:
+            return None  # Never share answers across grade levels
+        topic = context.current_topic or f"{context.subject or self.current_subject}:{self.current_chapter}"
+        return (agent_name, topic, context.grade_level)
+    
+    def create_safety_screen(self, context: str = "") -> StreamingSafetyScreen:
+        """Safety screen that checks a response stream concurrently with generation"""
+        return StreamingSafetyScreen(self.safety_agent, context=context)
+    
+    def retract_last_response(self, replacement: str = SAFE_REPLACEMENT):
+        """Replace a flagged reply in this student's memory so the model doesn't build on it"""
+        self.hybrid_agent.memory.replace_last_reply(replacement)
+        if self._last_cache_entry:
+            bucket, key = self._last_cache_entry
+            response_cache.discard(*bucket, key)  # Never serve a flagged answer to other students
+            self._last_cache_entry = None
+        return replacement
+    
+    async def stream_agent_response(self, agent, user_input: str):
+        """Stream an agent's text output token by token via Runner.run_streamed"""
+        # Refresh the (cached) network status so the agent's instructions match the current link
+        await asyncio.to_thread(self.hybrid_agent.bandwidth_monitor.get_network_status)
+        async with llm_scheduler.slot(agent_backend(), self.session_id):
+            result = Runner.run_streamed(agent, user_input, session=self.session)
+            async for event in result.stream_events():
+                if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                    yield event.data.delta
+        
+        # Agent instructions are static, so the provider can cache them as the prompt prefix
+        usage = result.context_wrapper.usage
+        details = getattr(usage, "input_tokens_details", None)
+        self.last_agent_usage = {
+            "backend": agent_backend(),
+            "prompt_tokens": usage.input_tokens,
+            "cached_tokens": (getattr(details, "cached_tokens", 0) or 0) if details else 0,
+        }
+    
+    async def _run_agent_streamed(self, agent, user_input: str) -> str:
+        """Run an agent, sending tokens to the token sink as they arrive; returns the full response"""
+        response = ""
+        async with aclosing(self.stream_agent_response(agent, user_input)) as tokens:
+            async for token in tokens:
+                await self.token_sink.write(token)
+                response += token
+        await self.token_sink.close()
+        self.report_prompt_cache(self.last_agent_usage)
+        return response
     
     async def generate_learning_pack(self, subject: str = None, chapter: int = None, user_input: str = None):
         """Generate enhanced learning pack for next day's study using MCP tools"""
@@ -487,12 +862,30 @@ class MultiAgentOrchestrator:
         print("🔍 Using MCP tools to extract book content...")
         
         try:
-            learning_pack = await self.learning_pack_generator.generate_enhanced_learning_pack(
+            from pack_engine import select_pack_backend, has_placeholder_content
+            
+            # Offline or degraded: write the pack on the local Ollama model
+            speed_mbps, is_degrade = await asyncio.to_thread(self.hybrid_agent.bandwidth_monitor.get_network_status)
+            backend = select_pack_backend(speed_mbps, is_degrade)
+            generator = self.learning_pack_generator
+            if generator.backend is None or generator.backend.name != backend.name:
+                generator.use_backend(backend)
+                print(f"🔀 Learning packs now generated with {backend.name} ({backend.model})")
+            
+            learning_pack = await generator.generate_enhanced_learning_pack(
                 subject=subject,
                 chapter_number=chapter,
                 student_level="beginner"
             )
             
+            if has_placeholder_content(learning_pack):
+                # Study material or quiz came back as a placeholder - queue it for the overnight local drain
+                from offline_pack_queue import OfflinePackQueue
+                queue = OfflinePackQueue()
+                queue.enqueue(subject, chapter, "beginner")
+                queue.close()
+                print("🌙 Pack has placeholder content - queued for overnight generation (python offline_pack_queue.py drain)")
+            
             # Save the learning pack
             file_path = self.learning_pack_generator.save_learning_pack(learning_pack)
             
@@ -502,6 +895,7 @@ class MultiAgentOrchestrator:
                 print(f"📖 Subject: {subject}")
                 print(f"📝 Chapter: {chapter}")
                 print(f"📚 Source: {learning_pack['pack_info']['source']}")
+                print(f"❓ Quiz Source: {learning_pack['pack_info']['quiz_source']}")
                 print(f"❓ Quiz Questions: {learning_pack['assessment']['total_questions']}")
                 return file_path
             else:
@@ -518,6 +912,7 @@ class MultiAgentOrchestrator:
             # Use the main learning_pack.json file
             learning_pack_path = "/Users/mac/tutor_agent/backend/learning_pack.json"
         
+        from offline_learning_agent import OfflineLearningAgent
         self.offline_agent = OfflineLearningAgent(learning_pack_path)
         
         if self.offline_agent.learning_pack:
@@ -548,14 +943,8 @@ class MultiAgentOrchestrator:
         # Use the actual triage agent instead of generic hybrid response
         try:
             # Use the triage agent with the existing session
-            result = await Runner.run(
-                self.triage_agent,
-                "Hello! I'm a new student. Please help me get started with my learning assessment.",
-                session=self.session
-            )
-            
-            # Print the response
-            print(result.final_output)
+            # Stream tokens to the terminal as the model produces them
+            response = await self._run_agent_streamed(self.triage_agent, "Hello! I'm a new student. Please help me get started with my learning assessment.")
             print("\n")
             
         except Exception as e:
@@ -594,16 +983,9 @@ class MultiAgentOrchestrator:
             print("Olivia: ", end="", flush=True)
             try:
                 # Use the triage agent with existing session
-                result = await Runner.run(
-                    self.triage_agent,
-                    user_input,
-                    session=self.session
-                )
-                
-                # Print the response
-                print(result.final_output)
+                # Stream tokens to the terminal as the model produces them
+                response = await self._run_agent_streamed(self.triage_agent, user_input)
                 print("\n")
-                response = result.final_output
                 
             except Exception as e:
                 print(f"⚠️ Triage agent error: {e}")
@@ -611,6 +993,10 @@ class MultiAgentOrchestrator:
                 response = await self.get_hybrid_response(user_input, "Olivia")
                 print("\n")
             
+            # The student's answers carry grade and subject (keys for the response cache);
+            # agent runs also end with the handoff JSON, hybrid persona replies never do
+            self.student_context.update_from_student_message(user_input)
+            self.student_context.update_from_handoff(response)
             if "handoff" in response.lower() or "tutor" in response.lower():
                 return True
     
@@ -628,14 +1014,8 @@ class MultiAgentOrchestrator:
         
         # Use the tutor agent with curriculum content
         try:
-            result = await Runner.run(
-                self.tutor_agent,
-                "Hello! I'm your AI tutor. I'm ready to help you learn with personalized teaching methods. I have access to the official Grade 7 curriculum, web search, and assessment tools. What would you like to learn about today?",
-                session=self.session
-            )
-            
-            # Print the response
-            print(result.final_output)
+            # Stream tokens to the terminal as the model produces them
+            response = await self._run_agent_streamed(self.tutor_agent, "Hello! I'm your AI tutor. I'm ready to help you learn with personalized teaching methods. I have access to the official Grade 7 curriculum, web search, and assessment tools. What would you like to learn about today?")
             print("\n")
             
         except Exception as e:
@@ -677,16 +1057,9 @@ class MultiAgentOrchestrator:
                 print("Tutor: ", end="", flush=True)
                 try:
                     # Use the tutor agent with existing session (MCP servers already disabled)
-                    result = await Runner.run(
-                        self.tutor_agent,
-                        user_input,
-                        session=self.session
-                    )
-                    
-                    # Print the response
-                    print(result.final_output)
+                    # Stream tokens to the terminal as the model produces them
+                    response = await self._run_agent_streamed(self.tutor_agent, user_input)
                     print("\n")
-                    response = result.final_output
                     
                 except Exception as e:
                     print(f"⚠️ Tutor agent error: {e}")
@@ -700,16 +1073,9 @@ class MultiAgentOrchestrator:
         print("\nFeedback Agent: ", end="", flush=True)
         try:
             # Use the feedback agent with existing session
-            result = await Runner.run(
-                self.feedback_agent,
-                "Please provide feedback on my learning progress. Give me encouragement and suggestions for improvement.",
-                session=self.session
-            )
-            
-            # Print the response
-            print(result.final_output)
+            # Stream tokens to the terminal as the model produces them
+            response = await self._run_agent_streamed(self.feedback_agent, "Please provide feedback on my learning progress. Give me encouragement and suggestions for improvement.")
             print("\n")
-            response = result.final_output
             
         except Exception as e:
             print(f"⚠️ Feedback agent error: {e}")
@@ -740,15 +1106,30 @@ class MultiAgentOrchestrator:
                             pass  # Ignore individual server cleanup errors
                 except Exception:
                     pass  # Ignore cleanup errors
+                
+                # Close the persistent MCP connections used for learning packs
+                await close_all_mcp_connections()
+                
+                # Close the shared HTTP connection pools
+                await client_factory.aclose()
+                
+                if prompt_cache_stats.metrics:
+                    print(f"🧠 Prompt cache: {prompt_cache_stats.stats()}")
 
 async def main():
     """Main entry point with hybrid system, degrade mode, and learning packs"""
+    orchestrator = MultiAgentOrchestrator(session_id="cli", token_sink=StdoutSink())
+    hybrid_agent = orchestrator.hybrid_agent
+    
+    # Pin the local model in memory while the network check runs
+    start_ollama_warmup()
+    
     print("🎓 AI Tutor System with Hybrid OpenAI/Ollama Fallback + Degrade Mode + Learning Packs")
     print("=" * 80)
     print(f"🔄 Hybrid System Status: {'OpenAI Primary' if hybrid_agent.use_openai else 'Ollama Local'}")
     
-    # Check initial network status (force check)
-    speed_mbps, is_degrade = hybrid_agent.bandwidth_monitor.get_network_status(force_check=True)
+    # Check initial network status (force check, off the event loop so the warmup can proceed)
+    speed_mbps, is_degrade = await asyncio.to_thread(hybrid_agent.bandwidth_monitor.get_network_status, force_check=True)
     if speed_mbps == 0.0:
         print(f"🌐 Network Status: Offline (0.0 Mbps) - Using Ollama")
     elif is_degrade:
@@ -764,7 +1145,6 @@ async def main():
     print("   • 'offline' - Start offline learning session")
     print("=" * 80)
     
-    orchestrator = MultiAgentOrchestrator()
     await orchestrator.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,105 @@
+import hashlib
+import os
+import re
+from collections import OrderedDict
+
+# Moderation Configuration
+SAFETY_CACHE_SIZE = int(os.getenv("SAFETY_CACHE_SIZE", "2048"))  # Cached verdicts (LRU)
+SAFE_MAX_CHARS = 40             # Only short messages can be settled SAFE locally
+
+# Tier 1a: compiled patterns that are unacceptable in tutoring output regardless of context
+BLOCK_PATTERNS = re.compile("|".join([
+    r"\b(kill|hurt|harm|cut)\s+(yourself|themselves|himself|herself)\b",
+    r"\bhow\s+to\s+(make|build)\s+(a\s+)?(bomb|explosive|weapon|poison)s?\b",
+    r"\b(you('re| are)|ur)\s+(stupid|dumb|an?\s+idiot|worthless|hopeless|terrible at)\b",
+    r"\b(give up now|you('ll| will) never (understand|learn|get it))\b",
+    r"\b(send|tell|give)\s+me\s+your\s+(home\s+address|password|phone\s+number)\b",
+]), re.IGNORECASE)
+
+# Tier 1b: positive benign signal. Having no risky words is not evidence of safety ("nobody likes
+# you, end it all" has none), so only short greetings, acknowledgements and bare answers (an option
+# letter, or one short number - never a digit string like a phone number) are a clear SAFE;
+# everything else goes to the Safety Agent
+SAFE_PHRASES = frozenset({
+    "hi", "hello", "hey", "good morning", "good afternoon", "good evening", "bye", "goodbye",
+    "thanks", "thank you", "thank you so much", "ok", "okay", "yes", "no", "yes please", "no thanks",
+    "i understand", "i don't understand", "i dont understand", "i don't know", "i dont know",
+    "got it", "next", "next question", "continue", "please continue", "can you explain again",
+    "great job", "well done", "good job", "correct", "that's correct", "not quite", "try again",
+})
+SAFE_ANSWER = re.compile(r"^\(?[A-Da-d]\)?\.?$|^-?\d{1,4}(\.\d{1,3})?%?$")
+
+def normalize_phrase(content: str) -> str:
+    """Lowercase words only - "Thank you!! 😊" and "thank you" are the same phrase"""
+    return " ".join(re.sub(r"[^\w\s']", " ", content.lower()).split())
+
+class ModerationEngine:
+    """Tiered moderation in front of the Safety Agent.
+
+    Tier 1 settles clear cases locally: the compiled block patterns are the only
+    local BLOCK, and only short allowlisted greetings, acknowledgements and bare
+    answers are a local SAFE. Everything else - curriculum text, and harm with no
+    obvious keywords - is ambiguous, so ``check()`` returns ``None`` and it goes
+    to the LLM; its verdict is then stored with ``record()``. Verdicts are cached
+    by content hash with LRU eviction.
+    """
+
+    def __init__(self, cache_size: int = SAFETY_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.metrics = {"checks": 0, "cache_hits": 0, "local_safe": 0, "local_block": 0, "escalated": 0}
+
+    def check(self, content: str, context: str = ""):
+        """Return a verdict if it can be decided locally (or from cache), else None"""
+        self.metrics["checks"] += 1
+        key = self._key(content, context)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.metrics["cache_hits"] += 1
+            return {**self._cache[key], "tier": "cache"}
+
+        match = BLOCK_PATTERNS.search(content)
+        if match:
+            self.metrics["local_block"] += 1
+            return self._store(key, {"status": "blocked", "message": f"Blocked by local rule: '{match.group(0)}'", "tier": "rules"})
+
+        if self.is_clearly_safe(content):
+            self.metrics["local_safe"] += 1
+            return self._store(key, {"status": "safe", "message": "Content is safe (local allowlist)", "tier": "allowlist"})
+
+        self.metrics["escalated"] += 1
+        return None
+
+    def record(self, content: str, context: str, verdict: dict) -> dict:
+        """Cache a verdict from the Safety Agent (unknown verdicts aren't cached)"""
+        if verdict["status"] != "unknown":
+            self._store(self._key(content, context), verdict)
+        return verdict
+
+    def is_clearly_safe(self, content: str) -> bool:
+        """True only for short allowlisted phrases and bare answers"""
+        text = content.strip()
+        if not text or len(text) > SAFE_MAX_CHARS:
+            return False
+        return bool(SAFE_ANSWER.match(text)) or normalize_phrase(text) in SAFE_PHRASES
+
+    def stats(self) -> dict:
+        checks = self.metrics["checks"]
+        return {
+            **self.metrics,
+            "cached_verdicts": len(self._cache),
+            "escalation_rate": self.metrics["escalated"] / checks if checks else 0.0,
+        }
+
+    def _key(self, content: str, context: str) -> str:
+        return hashlib.sha256(f"{context}\0{content}".encode("utf-8")).hexdigest()
+
+    def _store(self, key: str, verdict: dict) -> dict:
+        self._cache[key] = verdict
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return verdict
+
+# Shared by every check in the process
+moderation_engine = ModerationEngine()
@@ -0,0 +1,57 @@
+import logging
+import os
+
+# One line per turn on the server log (CLI and Chainlit alike); PROMPT_CACHE_LOG_LEVEL=WARNING silences it
+PROMPT_CACHE_LOG_LEVEL = os.getenv("PROMPT_CACHE_LOG_LEVEL", "INFO")
+
+logger = logging.getLogger("prompt_cache")
+logger.setLevel(PROMPT_CACHE_LOG_LEVEL)
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+class PromptCacheStats:
+    """Running prompt-cache totals per backend, recorded and logged once per turn.
+
+    OpenAI/Gemini report ``cached_tokens`` directly. Ollama reports no cache hits,
+    only the measured ``prompt_eval_count`` and ``prompt_eval_duration`` (prompt
+    tokens it had to evaluate, and how long that took); those are recorded as-is -
+    a small count on a long conversation is the KV cache at work.
+    """
+
+    def __init__(self):
+        self.metrics = {}  # backend -> running totals
+
+    def record(self, usage: dict):
+        """Add and log one turn's usage (ignored when the backend reported none)"""
+        if not usage:
+            return
+        backend = usage["backend"]
+        if backend == "ollama":
+            totals = self.metrics.setdefault(backend, {"turns": 0, "prompt_eval_count": 0, "prompt_eval_ms": 0.0})
+            totals["prompt_eval_count"] += usage["prompt_eval_count"]
+            totals["prompt_eval_ms"] += usage["prompt_eval_ms"]
+            logger.info(f"🧠 ollama: {usage['prompt_eval_count']} prompt tokens evaluated in {usage['prompt_eval_ms']:.0f} ms")
+        else:
+            totals = self.metrics.setdefault(backend, {"turns": 0, "prompt_tokens": 0, "cached_tokens": 0})
+            totals["prompt_tokens"] += usage["prompt_tokens"]
+            totals["cached_tokens"] += usage["cached_tokens"]
+            share = usage["cached_tokens"] / usage["prompt_tokens"] if usage["prompt_tokens"] else 0.0
+            logger.info(f"🧠 {backend}: {usage['cached_tokens']}/{usage['prompt_tokens']} prompt tokens cached ({share:.0%})")
+        totals["turns"] += 1
+
+    def stats(self) -> dict:
+        report = {}
+        for backend, totals in self.metrics.items():
+            if backend == "ollama":
+                report[backend] = {**totals, "prompt_eval_ms": round(totals["prompt_eval_ms"], 1),
+                                   "avg_prompt_eval_ms": round(totals["prompt_eval_ms"] / totals["turns"], 1)}
+            else:
+                prompt_tokens = totals["prompt_tokens"]
+                report[backend] = {**totals, "cached_share": totals["cached_tokens"] / prompt_tokens if prompt_tokens else 0.0}
+        return report
+
+# Shared by every session in the process
+prompt_cache_stats = PromptCacheStats()
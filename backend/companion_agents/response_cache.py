@@ -0,0 +1,136 @@
+import hashlib
+import math
+import os
+import re
+import time
+from collections import OrderedDict
+
+# Response cache Configuration (opt-in)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.88"))  # Cosine similarity for a hit
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "500"))  # Per (agent, topic, level) bucket
+EMBEDDING_DIMENSIONS = 2048
+
+# Only stateless explanation-style questions are cached
+EXPLANATION_PATTERN = re.compile(
+    r"^\s*(what\s+(is|are|does)|explain|define|describe|why\s+(is|are|do|does)|how\s+(does|do|is|are)|"
+    r"what's|tell me about|difference between|meaning of)\b",
+    re.IGNORECASE,
+)
+# References to the conversation (or the student) make the answer depend on state
+STATEFUL_PATTERN = re.compile(
+    r"\b(my|mine|me|i|i'm|this|that|these|those|it|above|previous|again|earlier|last|answer|you said)\b",
+    re.IGNORECASE,
+)
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "of", "in", "on", "to", "and", "what", "whats", "does", "do", "how", "why",
+    "please", "can", "you", "explain", "define", "describe", "tell", "about", "meaning",
+}
+
+def normalize_question(question: str) -> str:
+    """Lowercase, strip punctuation and filler words"""
+    words = re.findall(r"[a-z0-9]+", question.lower())
+    return " ".join(word for word in words if word not in STOPWORDS)
+
+def embed(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> dict:
+    """Sparse, L2-normalized hashed embedding of word unigrams/bigrams and character trigrams"""
+    words = text.split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    vector = {}
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        index = int.from_bytes(digest[:4], "little") % dimensions
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[index] = vector.get(index, 0.0) + sign
+    norm = math.sqrt(sum(value * value for value in vector.values())) or 1.0
+    return {index: value / norm for index, value in vector.items()}
+
+def cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(value * b.get(index, 0.0) for index, value in a.items())
+
+class SemanticResponseCache:
+    """Opt-in cache of tutor answers for near-identical conceptual questions.
+
+    Entries are bucketed by (agent, topic, level); within a bucket a question
+    matches a cached one when the cosine similarity of their hashed embeddings
+    is at least ``threshold``. Entries expire after ``ttl_seconds`` and each
+    bucket keeps at most ``max_entries`` (least recently used evicted first).
+    """
+
+    def __init__(self, enabled: bool = RESPONSE_CACHE_ENABLED, threshold: float = RESPONSE_CACHE_THRESHOLD,
+                 ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.enabled = enabled
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._buckets = {}  # (agent, topic, level) -> OrderedDict[normalized question -> entry]
+        self.metrics = {"lookups": 0, "hits": 0, "stores": 0, "evictions": 0}
+        self._hit_similarity = 0.0
+
+    def is_cacheable(self, question: str) -> bool:
+        """Stateless explanation-style questions only"""
+        return (
+            self.enabled
+            and len(question) <= 300
+            and bool(EXPLANATION_PATTERN.search(question))
+            and not STATEFUL_PATTERN.search(EXPLANATION_PATTERN.sub("", question, count=1))
+        )
+
+    def lookup(self, agent: str, topic: str, level: str, question: str):
+        """Cached response for a similar question, or None"""
+        self.metrics["lookups"] += 1
+        bucket = self._buckets.get((agent, topic, level))
+        if not bucket:
+            return None
+        now = time.time()
+        vector = embed(normalize_question(question))
+        best_key, best_score = None, self.threshold
+        for key, entry in list(bucket.items()):
+            if now - entry["created"] > self.ttl_seconds:
+                del bucket[key]
+                self.metrics["evictions"] += 1
+                continue
+            score = cosine(vector, entry["vector"])
+            if score >= best_score:
+                best_key, best_score = key, score
+        if best_key is None:
+            return None
+        bucket.move_to_end(best_key)
+        self.metrics["hits"] += 1
+        self._hit_similarity += best_score
+        return {**bucket[best_key], "similarity": best_score}
+
+    def store(self, agent: str, topic: str, level: str, question: str, response: str) -> str:
+        """Cache a complete response; returns the entry key (for discard)"""
+        normalized = normalize_question(question)
+        bucket = self._buckets.setdefault((agent, topic, level), OrderedDict())
+        bucket[normalized] = {"question": question, "response": response,
+                              "vector": embed(normalized), "created": time.time()}
+        bucket.move_to_end(normalized)
+        while len(bucket) > self.max_entries:
+            bucket.popitem(last=False)
+            self.metrics["evictions"] += 1
+        self.metrics["stores"] += 1
+        return normalized
+
+    def discard(self, agent: str, topic: str, level: str, key: str):
+        """Drop an entry (e.g. a response the safety screen retracted)"""
+        self._buckets.get((agent, topic, level), {}).pop(key, None)
+
+    def stats(self) -> dict:
+        lookups = self.metrics["lookups"]
+        return {
+            **self.metrics,
+            "entries": sum(len(bucket) for bucket in self._buckets.values()),
+            "hit_rate": self.metrics["hits"] / lookups if lookups else 0.0,
+            "avg_hit_similarity": self._hit_similarity / self.metrics["hits"] if self.metrics["hits"] else 0.0,
+        }
+
+# Shared across sessions - that's where the savings come from
+response_cache = SemanticResponseCache()
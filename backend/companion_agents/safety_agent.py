@@ -1,43 +1,84 @@
 import asyncio
 import os
+import re
 import sys
+from typing import List, Literal
 from dotenv import load_dotenv
+from pydantic import BaseModel
 from agents import Agent, AsyncOpenAI, OpenAIChatCompletionsModel, Runner, ModelSettings, SQLiteSession, set_tracing_disabled
 
 # Load environment variables
 load_dotenv()
 
-# Disable extra tracing/logging for cleaner output
-set_tracing_disabled(True)
-
-# Create API provider
-Provider = AsyncOpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
-
-# Set up the chat completion model
-model = OpenAIChatCompletionsModel(
-    model="gemini-2.0-flash",
-    openai_client=Provider,
-)
+# Set up the chat completion model lazily (no client is built at import time)
+def get_model():
+    """Gemini chat completion model on the shared connection pool (created on first use)"""
+    return get_gemini_model()
 
 # Import safety prompt
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PROMPTS.safety_agent_prompt import Safety_Agent_Prompt
+from llm_clients import get_gemini_model
+from llm_scheduler import llm_scheduler, agent_backend
+from moderation import moderation_engine
+
+# Moderation Configuration
+SAFETY_MAX_TOKENS = int(os.getenv("SAFETY_MAX_TOKENS", "120"))  # A verdict is a few short JSON fields
+
+class SafetyVerdict(BaseModel):
+    """Structured Safety Agent verdict"""
+    status: Literal["SAFE", "WARNING", "BLOCK"]
+    categories: List[str] = []  # e.g. "harmful", "inappropriate_language", "personal_information"
+    confidence: float = 1.0
+    reason: str = ""
+
+VERDICT_STATUS = {"SAFE": "safe", "WARNING": "warning", "BLOCK": "blocked"}
+
+VERDICT_INSTRUCTIONS = """
+
+## Output
+Return only the verdict object: status (SAFE, WARNING or BLOCK), categories of any issues,
+confidence between 0 and 1, and a reason of at most 20 words."""
 
 def create_safety_agent():
     """Create and return the Safety Agent"""
     return Agent(
         name="SafetyAgent",
-        instructions=Safety_Agent_Prompt,
+        instructions=Safety_Agent_Prompt + VERDICT_INSTRUCTIONS,
         model=None,  # Will be set by orchestrator
-        model_settings=ModelSettings(temperature=0),
+        model_settings=ModelSettings(temperature=0, max_tokens=SAFETY_MAX_TOKENS),
+        output_type=SafetyVerdict,
     )
 
-async def check_content_safety(safety_agent, content_to_check, context=""):
-    """Check if content is safe and appropriate"""
-    session = SQLiteSession(session_id="safety_check")
+def parse_verdict(output) -> dict:
+    """Turn Safety Agent output into a verdict dict (structured, or free text as a fallback)"""
+    if isinstance(output, SafetyVerdict):
+        return {
+            "status": VERDICT_STATUS[output.status],
+            "message": output.reason,
+            "categories": output.categories,
+            "confidence": output.confidence,
+        }
+
+    # Free text: check the most severe labels first, as whole words ("UNSAFE" is not "SAFE")
+    text = str(output)
+    upper = text.upper()
+    if re.search(r"\b(BLOCK|BLOCKED|UNSAFE|NOT SAFE)\b", upper):
+        status = "blocked"
+    elif re.search(r"\bWARNING\b", upper):
+        status = "warning"
+    elif re.search(r"\bSAFE\b", upper):
+        status = "safe"
+    else:
+        status = "unknown"
+    return {"status": status, "message": text}
+
+async def check_content_safety(safety_agent, content_to_check, context="", engine=None):
+    """Check if content is safe and appropriate (stateless - each check stands alone)"""
+    engine = engine or moderation_engine
+    verdict = engine.check(content_to_check, context)
+    if verdict:
+        return verdict  # Decided locally - no LLM call
     
     check_input = f"""
     Please review this agent output for safety and educational appropriateness:
@@ -47,23 +88,20 @@ async def check_content_safety(safety_agent, content_to_check, context=""):
     Content to Review:
     {content_to_check}
     
-    Please provide your safety assessment.
+    Please provide your safety verdict.
     """
     
-    result = await Runner.run(starting_agent=safety_agent, input=check_input, session=session)
-    response = result.final_output.upper()
-    
-    if "SAFE" in response:
-        return {"status": "safe", "message": result.final_output}
-    elif "WARNING" in response:
-        return {"status": "warning", "message": result.final_output}
-    elif "BLOCK" in response:
-        return {"status": "blocked", "message": result.final_output}
-    else:
-        return {"status": "unknown", "message": result.final_output}
+    # No session: the verdict only depends on this content, and history would grow every check's prompt
+    async with llm_scheduler.slot(agent_backend(), "safety"):
+        result = await Runner.run(starting_agent=safety_agent, input=check_input)
+    verdict = parse_verdict(result.final_output)
+    return engine.record(content_to_check, context, {**verdict, "tier": "llm"})
 
 async def main():
     """Test the Safety Agent independently"""
+    # Disable extra tracing/logging for cleaner output
+    set_tracing_disabled(True)
+    
     session = SQLiteSession(session_id="test_safety")
     safety_agent = create_safety_agent()
     
@@ -81,6 +119,7 @@ async def main():
     
     result = await check_content_safety(safety_agent, problematic_content, "Math tutoring session")
     print(f"Problematic Content Check: {result}")
+    print(f"Moderation stats: {moderation_engine.stats()}")
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
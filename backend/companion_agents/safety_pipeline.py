@@ -0,0 +1,108 @@
+import asyncio
+import os
+from contextlib import aclosing
+from safety_agent import check_content_safety
+
+# Streaming safety Configuration
+SAFETY_CHUNK_CHARS = int(os.getenv("SAFETY_CHUNK_CHARS", "600"))  # Screen output in chunks of about this size
+SAFETY_CONTEXT_CHARS = 150  # Tail of the previous chunk sent along so split sentences are judged in context
+
+SAFE_REPLACEMENT = "I apologize, but I need to provide a safer response. Could you rephrase your question?"
+
+# Worst verdict wins when combining chunk results
+STATUS_SEVERITY = {"safe": 0, "unknown": 1, "warning": 2, "blocked": 3}
+
+class StreamingSafetyScreen:
+    """Screens a token stream in chunks while it is still being generated.
+
+    Tokens pass straight through ``screen()``; every ~``chunk_chars`` characters
+    (at a sentence or line boundary) the chunk is sent to the Safety Agent as a
+    background task, so checks overlap with generation. If a chunk comes back
+    blocked, the stream stops early. ``verdict()`` waits for the remaining checks
+    and returns the worst result; anything but "safe" means the caller must
+    retract or replace the message.
+
+    With ``hold=True`` (terminals, where shown text can't be retracted) each chunk
+    is only released once its own check has come back safe, and nothing after a
+    chunk that isn't safe is shown.
+    """
+
+    def __init__(self, safety_agent, context: str = "", chunk_chars: int = SAFETY_CHUNK_CHARS,
+                 checker=check_content_safety, hold: bool = False):
+        self.safety_agent = safety_agent
+        self.context = context
+        self.chunk_chars = chunk_chars
+        self.checker = checker
+        self.hold = hold
+        self.text = ""
+        self.withheld = False  # Held output was not released because a check wasn't safe
+        self._chunk_start = 0
+        self._tasks = []
+        self._chunk_ends = []  # End offset in text of each submitted chunk
+        self._released = 0     # Chunks released so far (hold mode)
+
+    async def screen(self, token_stream):
+        """Yield tokens from token_stream while screening them (with hold, checked chunks instead)"""
+        async with aclosing(token_stream) as tokens:
+            async for token in tokens:
+                if self.blocked_early or self.withheld:
+                    break  # Stop generating once any chunk has been blocked (the token is dropped)
+                self.text += token
+                if not self.hold:
+                    yield token
+                pending = len(self.text) - self._chunk_start
+                if pending >= self.chunk_chars and token.rstrip(" ")[-1:] in (".", "!", "?", "\n"):
+                    self._submit_chunk()
+                if self.hold:
+                    for text in self._release_checked():
+                        yield text
+        if not (self.blocked_early or self.withheld):
+            self._submit_chunk()
+        if self.hold:
+            for task in self._tasks[self._released:]:
+                await asyncio.wait([task])
+                for text in self._release_checked():
+                    yield text
+
+    @property
+    def blocked_early(self) -> bool:
+        """True once a finished check has blocked part of the output"""
+        for task in self._tasks:
+            if task.done() and not task.cancelled() and task.exception() is None:
+                if task.result()["status"] == "blocked":
+                    return True
+        return False
+
+    async def verdict(self) -> dict:
+        """Wait for outstanding checks and return the worst verdict"""
+        if not self._tasks:
+            return {"status": "safe", "message": ""}
+        results = await asyncio.gather(*self._tasks, return_exceptions=True)
+        worst = {"status": "safe", "message": ""}
+        for result in results:
+            if isinstance(result, Exception):
+                result = {"status": "unknown", "message": f"Safety check failed: {result}"}
+            if STATUS_SEVERITY.get(result["status"], 1) > STATUS_SEVERITY.get(worst["status"], 1):
+                worst = result
+        return worst
+
+    def _release_checked(self):
+        """Text of held chunks whose checks are done, in order, up to the first one that isn't safe"""
+        while not self.withheld and self._released < len(self._tasks) and self._tasks[self._released].done():
+            task = self._tasks[self._released]
+            if task.cancelled() or task.exception() is not None or task.result()["status"] != "safe":
+                self.withheld = True
+                return
+            start = self._chunk_ends[self._released - 1] if self._released else 0
+            self._released += 1
+            yield self.text[start:self._chunk_ends[self._released - 1]]
+
+    def _submit_chunk(self):
+        chunk = self.text[self._chunk_start:]
+        if not chunk.strip():
+            return
+        lead_in = self.text[max(0, self._chunk_start - SAFETY_CONTEXT_CHARS):self._chunk_start]
+        self._chunk_start = len(self.text)
+        content = f"...{lead_in}{chunk}" if lead_in else chunk
+        self._tasks.append(asyncio.create_task(self.checker(self.safety_agent, content, self.context)))
+        self._chunk_ends.append(len(self.text))
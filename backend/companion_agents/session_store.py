@@ -0,0 +1,192 @@
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from agents.memory import SessionABC
+
+# Session storage Configuration
+SESSION_DB_PATH = os.getenv(
+    "TUTOR_SESSION_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tutor_sessions.db"),
+)
+SESSION_MAX_ITEMS = int(os.getenv("SESSION_MAX_ITEMS", "40"))          # Items read back (and kept) per session
+SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "4"))           # Pooled SQLite connections
+
+# Same layout as the Agents SDK SQLiteSession, so existing databases keep working
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_sessions (
+    session_id TEXT PRIMARY KEY,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS agent_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    message_data TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (session_id) REFERENCES agent_sessions (session_id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_agent_messages_session_id ON agent_messages (session_id, id);
+"""
+
+class SQLiteConnectionPool:
+    """Fixed-size pool of WAL-mode connections to one SQLite file"""
+
+    def __init__(self, db_path: str, size: int = SESSION_POOL_SIZE):
+        self.db_path = db_path
+        self._connections = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")    # Readers don't block the writer
+            conn.execute("PRAGMA synchronous=NORMAL")  # Durable in WAL mode, far fewer fsyncs
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._connections.put(conn)
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def connection(self):
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+class PooledSQLiteSession(SessionABC):
+    """Agents SDK session on the shared pool; reads only the most recent items"""
+
+    def __init__(self, session_id: str, store: "SessionStore"):
+        self.session_id = session_id
+        self.store = store
+        self._items_since_compaction = 0
+
+    async def get_items(self, limit: int = None) -> list:
+        limit = min(limit or self.store.max_items, self.store.max_items)
+
+        def _get_items_sync():
+            with self.store.pool.connection() as conn:
+                rows = conn.execute(
+                    "SELECT message_data FROM agent_messages WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+                    (self.session_id, limit),
+                ).fetchall()
+            items = []
+            for (message_data,) in reversed(rows):
+                try:
+                    items.append(json.loads(message_data))
+                except json.JSONDecodeError:
+                    continue  # Skip corrupted rows
+            return items
+
+        items = await asyncio.to_thread(_get_items_sync)
+        # A window can start with tool outputs whose tool call was cut off; the API rejects those
+        while items and isinstance(items[0], dict) and items[0].get("type") == "function_call_output":
+            items.pop(0)
+        return items
+
+    async def add_items(self, items: list) -> None:
+        if not items:
+            return
+
+        def _add_items_sync():
+            with self.store.pool.connection() as conn:
+                with conn:
+                    conn.execute("INSERT OR IGNORE INTO agent_sessions (session_id) VALUES (?)", (self.session_id,))
+                    conn.executemany(
+                        "INSERT INTO agent_messages (session_id, message_data) VALUES (?, ?)",
+                        [(self.session_id, json.dumps(item)) for item in items],
+                    )
+                    conn.execute(
+                        "UPDATE agent_sessions SET updated_at = CURRENT_TIMESTAMP WHERE session_id = ?",
+                        (self.session_id,),
+                    )
+
+        await asyncio.to_thread(_add_items_sync)
+
+        # Trim old items in the background once the session has grown past its cap
+        self._items_since_compaction += len(items)
+        if self._items_since_compaction >= self.store.max_items:
+            self._items_since_compaction = 0
+            self.store.schedule_compaction(self.session_id)
+
+    async def pop_item(self):
+        def _pop_item_sync():
+            with self.store.pool.connection() as conn:
+                with conn:
+                    row = conn.execute(
+                        "DELETE FROM agent_messages WHERE id = (SELECT id FROM agent_messages "
+                        "WHERE session_id = ? ORDER BY id DESC LIMIT 1) RETURNING message_data",
+                        (self.session_id,),
+                    ).fetchone()
+            return json.loads(row[0]) if row else None
+
+        return await asyncio.to_thread(_pop_item_sync)
+
+    async def clear_session(self) -> None:
+        def _clear_session_sync():
+            with self.store.pool.connection() as conn:
+                with conn:
+                    conn.execute("DELETE FROM agent_messages WHERE session_id = ?", (self.session_id,))
+                    conn.execute("DELETE FROM agent_sessions WHERE session_id = ?", (self.session_id,))
+
+        await asyncio.to_thread(_clear_session_sync)
+
+class SessionStore:
+    """Durable per-student sessions in one WAL-mode SQLite file with capped history"""
+
+    def __init__(self, db_path: str = SESSION_DB_PATH, max_items: int = SESSION_MAX_ITEMS,
+                 pool_size: int = SESSION_POOL_SIZE):
+        self.db_path = db_path
+        self.max_items = max_items
+        self.pool = SQLiteConnectionPool(db_path, size=pool_size)
+        self._compaction_tasks = {}
+
+    def get_session(self, session_id: str) -> PooledSQLiteSession:
+        """Session for one student/conversation id"""
+        return PooledSQLiteSession(session_id, self)
+
+    def schedule_compaction(self, session_id: str):
+        """Compact a session in the background (at most one task per session)"""
+        task = self._compaction_tasks.get(session_id)
+        if task and not task.done():
+            return
+        self._compaction_tasks[session_id] = asyncio.get_running_loop().create_task(
+            asyncio.to_thread(self.compact, session_id)
+        )
+
+    def compact(self, session_id: str) -> int:
+        """Delete all but the most recent max_items items of a session; returns rows deleted"""
+        with self.pool.connection() as conn:
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM agent_messages WHERE session_id = ? AND id <= ("
+                    "SELECT id FROM agent_messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (session_id, session_id, self.max_items),
+                )
+        return cursor.rowcount
+
+    def compact_all(self) -> int:
+        """Compact every session (maintenance job)"""
+        with self.pool.connection() as conn:
+            session_ids = [row[0] for row in conn.execute("SELECT session_id FROM agent_sessions").fetchall()]
+        return sum(self.compact(session_id) for session_id in session_ids)
+
+    def close(self):
+        self.pool.close()
+
+_session_store = None
+_session_store_lock = threading.Lock()
+
+def get_session_store() -> SessionStore:
+    """Process-wide session store, opened on first use"""
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            _session_store = SessionStore()
+    return _session_store
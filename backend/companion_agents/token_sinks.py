@@ -0,0 +1,57 @@
+import sys
+
+class TokenSink:
+    """Destination for streamed model tokens (CLI printer, Chainlit forwarder, or nothing)"""
+
+    async def write(self, token: str):
+        """Receive one streamed token"""
+        raise NotImplementedError
+
+    async def close(self):
+        """Called once when the response is complete"""
+
+class NullSink(TokenSink):
+    """Discards tokens - for server deployments and benchmarks (zero per-token I/O)"""
+
+    async def write(self, token: str):
+        pass
+
+class StdoutSink(TokenSink):
+    """Prints tokens for the CLI, buffered so it isn't a write syscall per token"""
+
+    def __init__(self, flush_chars: int = 32, stream=None):
+        self.flush_chars = flush_chars
+        self.stream = stream or sys.stdout
+        self._buffer = []
+        self._buffered_chars = 0
+
+    async def write(self, token: str):
+        self._buffer.append(token)
+        self._buffered_chars += len(token)
+        # Flush on line breaks or once enough text is buffered
+        if "\n" in token or self._buffered_chars >= self.flush_chars:
+            self._flush()
+
+    async def close(self):
+        self._flush()
+        self.stream.write("\n")  # New line after streaming
+        self.stream.flush()
+
+    def _flush(self):
+        if self._buffer:
+            self.stream.write("".join(self._buffer))
+            self.stream.flush()
+            self._buffer = []
+            self._buffered_chars = 0
+
+class ChainlitSink(TokenSink):
+    """Forwards tokens to a Chainlit message via msg.stream_token"""
+
+    def __init__(self, msg):
+        self.msg = msg
+
+    async def write(self, token: str):
+        await self.msg.stream_token(token)
+
+    async def close(self):
+        await self.msg.update()
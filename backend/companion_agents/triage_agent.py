@@ -8,29 +8,24 @@ from agents.mcp import MCPServerStreamableHttp
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PROMPTS.triage_prompt import Triage_Agent_Prompt
+from llm_clients import get_gemini_model
 
 # Load environment variables
 load_dotenv()
 
-# Set up tracing with API key from environment
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if OPENAI_API_KEY:
-    set_tracing_export_api_key(OPENAI_API_KEY)
-
-# Enable tracing for workflow monitoring
-set_tracing_disabled(False)
-
-# Create API provider
-Provider = AsyncOpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
+def configure_tracing():
+    """Set up tracing with API key from environment (called from main, not at import)"""
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    if OPENAI_API_KEY:
+        set_tracing_export_api_key(OPENAI_API_KEY)
+    
+    # Enable tracing for workflow monitoring
+    set_tracing_disabled(False)
 
-# Set up the chat completion model
-model = OpenAIChatCompletionsModel(
-    model="gemini-2.0-flash",
-    openai_client=Provider,
-)
+# Set up the chat completion model lazily (no client is built at import time)
+def get_model():
+    """Gemini chat completion model on the shared connection pool (created on first use)"""
+    return get_gemini_model()
 
 # Local MCP Server Configuration for Student Data and Content
 LOCAL_MCP_SERVER_URL = os.getenv("LOCAL_MCP_SERVER_URL", "http://localhost:8000/mcp")
@@ -45,6 +40,8 @@ def create_triage_agent():
     )
 
 async def main():
+    configure_tracing()
+    
     # Set up local MCP server parameters
     local_mcp_params = {
         "url": LOCAL_MCP_SERVER_URL,
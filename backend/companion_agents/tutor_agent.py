@@ -5,6 +5,7 @@ import json
 from dotenv import load_dotenv, find_dotenv
 from agents import Agent, AsyncOpenAI, OpenAIChatCompletionsModel, Runner, ModelSettings, SQLiteSession, set_tracing_disabled, set_tracing_export_api_key, trace, RunResult, ToolCallOutputItem
 from agents.mcp import MCPServerStreamableHttp
+from openai.types.responses import ResponseTextDeltaEvent
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -13,28 +14,25 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from assessment_agent import create_assessment_agent, extract_json_payload
 from feedback_agent import create_feedback_agent
 from safety_agent import create_safety_agent, check_content_safety
+from session_store import get_session_store
+from safety_pipeline import StreamingSafetyScreen, SAFE_REPLACEMENT
 
 # Load environment variables from .env
 _ = load_dotenv(find_dotenv())
 
-# Set up tracing with API key from environment
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if OPENAI_API_KEY:
-    set_tracing_export_api_key(OPENAI_API_KEY)
-
-# Enable tracing for workflow monitoring
-set_tracing_disabled(False)
-
-Provider = AsyncOpenAI(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
-)
+def configure_tracing():
+    """Set up tracing with API key from environment (called from main, not at import)"""
+    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+    if OPENAI_API_KEY:
+        set_tracing_export_api_key(OPENAI_API_KEY)
+    
+    # Enable tracing for workflow monitoring
+    set_tracing_disabled(False)
 
-# Set up the chat completion model with the API provider
-model = OpenAIChatCompletionsModel(
-    model="gemini-2.0-flash",
-    openai_client=Provider,
-)
+# Set up the chat completion model lazily (no client is built at import time)
+def get_model():
+    """Gemini chat completion model on the shared connection pool (created on first use)"""
+    return get_gemini_model()
 
 # MCP Server Configuration
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
@@ -46,6 +44,7 @@ LOCAL_MCP_SERVER_URL = os.getenv("LOCAL_MCP_SERVER_URL", "http://localhost:8000/
 # Import tutor prompt
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from PROMPTS.tutor_agent_prompt import Tutor_Agent_Prompt
+from llm_clients import get_gemini_model
 
 def create_tutor_agent_with_tools():
     """Create the Tutor Agent with Assessment Agent as a tool and Tavily MCP."""
@@ -71,6 +70,8 @@ def create_tutor_agent_with_tools():
     return tutor_agent
 
 async def main():
+    configure_tracing()
+    
     # Set up MCP server parameters
     tavily_mcp_params = {
         "url": TAVILY_SERVER,
@@ -100,7 +101,7 @@ async def main():
         max_retry_attempts=3,
     ) as local_server:
         try:
-            session = SQLiteSession(session_id="student_session")
+            session = get_session_store().get_session("student_cli")
 
             # Connect to MCP servers
             await tavily_server.connect()
@@ -136,16 +137,31 @@ async def main():
                         print("Feedback blocked by safety agent")
                     continue
                 else:  
-                    result = await Runner.run(starting_agent=tutor_agent, input=user_input, session=session)
-                    safety_check = await check_content_safety(safety_agent, result.final_output, "Tutor response")
+                    # Stream the answer while the safety agent screens it chunk by chunk
+                    result = Runner.run_streamed(starting_agent=tutor_agent, input=user_input, session=session)
+                    # Printed text can't be taken back, so each chunk is held until its check passes
+                    screen = StreamingSafetyScreen(safety_agent, context="Tutor response", hold=True)
+                    print("Tutor: ", end="", flush=True)
+                    shown = ""
+                    async for text in screen.screen(stream_text_deltas(result)):
+                        print(text, end="", flush=True)
+                        shown += text
                     
-                    if safety_check["status"] == "safe":
-                        print(f"Tutor: {result.final_output}")
+                    safety_check = await screen.verdict()
+                    if safety_check["status"] != "safe":
+                        # Only checked text was shown - the flagged rest is replaced
+                        print(f"\n{SAFE_REPLACEMENT}" if shown else SAFE_REPLACEMENT)
                     else:
-                        print("Tutor: I apologize, but I need to provide a safer response. Could you rephrase your question?")
+                        print()
 
         except Exception as e:
             print(f"Error: {e}")
 
+async def stream_text_deltas(result):
+    """Yield text deltas from a streamed run"""
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            yield event.data.delta
+
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Shared LLM Clients
+One factory for every OpenAI-compatible client (OpenAI, Gemini) and the Ollama client.
+Clients for the same host share one tuned httpx connection pool, so concurrent students
+reuse warm keep-alive connections instead of paying a TLS handshake per agent.
+"""
+
+import importlib.util
+import os
+import time
+from typing import Dict, Any
+from urllib.parse import urlparse
+
+import httpx
+from agents import AsyncOpenAI, OpenAIChatCompletionsModel
+from ollama import AsyncClient
+
+# Connection pool Configuration (limits apply per host - every host gets its own pool)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+
+OPENAI_BASE_URL = "https://api.openai.com/v1"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+class LLMClientFactory:
+    """Hands out LLM clients backed by shared per-host httpx connection pools"""
+
+    def __init__(self, max_connections: int = HTTP_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                 keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+        self._pools = {}           # host -> httpx.AsyncClient
+        self._openai_clients = {}  # (api_key, base_url) -> AsyncOpenAI
+        self._ollama_clients = {}  # host -> ollama AsyncClient
+        self._models = {}          # (model, api_key, base_url) -> OpenAIChatCompletionsModel
+        self._metrics = {}         # host -> request counters
+
+    def http_client(self, base_url: str) -> httpx.AsyncClient:
+        """Shared connection pool for the host of base_url"""
+        host = urlparse(base_url).netloc or base_url
+        if host not in self._pools:
+            metrics = self._metrics.setdefault(host, {
+                "requests": 0,
+                "responses": 0,
+                "errors": 0,
+                "total_latency_s": 0.0,
+            })
+
+            async def on_request(request):
+                metrics["requests"] += 1
+                request.extensions["start_time"] = time.perf_counter()
+
+            async def on_response(response):
+                metrics["responses"] += 1
+                if response.status_code >= 400:
+                    metrics["errors"] += 1
+                start_time = response.request.extensions.get("start_time")
+                if start_time is not None:
+                    metrics["total_latency_s"] += time.perf_counter() - start_time
+
+            self._pools[host] = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=self.limits,
+                timeout=self.timeout,
+                event_hooks={"request": [on_request], "response": [on_response]},
+            )
+        return self._pools[host]
+
+    def openai_client(self, api_key: str = None, base_url: str = None) -> AsyncOpenAI:
+        """AsyncOpenAI client (OpenAI or any OpenAI-compatible API) on the shared pool"""
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        base_url = base_url or OPENAI_BASE_URL
+        key = (api_key, base_url)
+        if key not in self._openai_clients:
+            self._openai_clients[key] = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                http_client=self.http_client(base_url),
+            )
+        return self._openai_clients[key]
+
+    def gemini_client(self, api_key: str = None) -> AsyncOpenAI:
+        """Gemini client through its OpenAI-compatible endpoint"""
+        return self.openai_client(api_key=api_key or os.getenv("GEMINI_API_KEY"), base_url=GEMINI_BASE_URL)
+
+    def chat_model(self, model: str, api_key: str = None, base_url: str = None) -> OpenAIChatCompletionsModel:
+        """Agents SDK chat completion model bound to a shared client"""
+        client = self.openai_client(api_key=api_key, base_url=base_url)
+        key = (model, client.api_key, base_url or OPENAI_BASE_URL)
+        if key not in self._models:
+            self._models[key] = OpenAIChatCompletionsModel(model=model, openai_client=client)
+        return self._models[key]
+
+    def ollama_client(self, host: str = "http://127.0.0.1:11434") -> AsyncClient:
+        """Ollama client with the same keep-alive tuning (local server, so HTTP/1.1)"""
+        if host not in self._ollama_clients:
+            self._ollama_clients[host] = AsyncClient(host=host, limits=self.limits, timeout=None)
+        return self._ollama_clients[host]
+
+    def pool_metrics(self) -> Dict[str, Any]:
+        """Per-host request counters and current connection usage"""
+        report = {}
+        for host, client in self._pools.items():
+            metrics = dict(self._metrics.get(host, {}))
+            responses = metrics.get("responses", 0)
+            metrics["avg_latency_ms"] = (metrics.get("total_latency_s", 0.0) / responses * 1000) if responses else 0.0
+            metrics["http2"] = HTTP2_AVAILABLE
+            metrics.update(self._connection_counts(client))
+            report[host] = metrics
+        return report
+
+    def _connection_counts(self, client: httpx.AsyncClient) -> Dict[str, int]:
+        # httpx doesn't expose pool state publicly; read it from httpcore when available
+        try:
+            connections = client._transport._pool.connections
+        except AttributeError:
+            return {}
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {"open_connections": len(connections), "idle_connections": idle}
+
+    async def aclose(self):
+        """Close every shared pool (call on shutdown)"""
+        for client in self._pools.values():
+            await client.aclose()
+        for client in self._ollama_clients.values():
+            await client._client.aclose()
+        self._pools.clear()
+        self._openai_clients.clear()
+        self._models.clear()
+        self._ollama_clients.clear()
+
+# Process-wide factory
+client_factory = LLMClientFactory()
+
+def get_openai_client(api_key: str = None, base_url: str = None) -> AsyncOpenAI:
+    """Shared AsyncOpenAI client"""
+    return client_factory.openai_client(api_key=api_key, base_url=base_url)
+
+def get_gemini_client(api_key: str = None) -> AsyncOpenAI:
+    """Shared Gemini (OpenAI-compatible) client"""
+    return client_factory.gemini_client(api_key=api_key)
+
+def get_gemini_model(model: str = "gemini-2.0-flash") -> OpenAIChatCompletionsModel:
+    """Shared Gemini chat completion model for the agents"""
+    return client_factory.chat_model(model, api_key=os.getenv("GEMINI_API_KEY"), base_url=GEMINI_BASE_URL)
+
+def get_ollama_client(host: str = "http://127.0.0.1:11434") -> AsyncClient:
+    """Shared Ollama client"""
+    return client_factory.ollama_client(host=host)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+LLM Call Scheduler
+Central async scheduler for every model call (OpenAI, Gemini, Ollama).
+Each backend has a concurrency cap and each provider key a token-bucket rate limit.
+Waiting calls are served round-robin across sessions, interactive turns before
+batch work (learning pack generation), so one busy student or a pack job can't
+starve a classroom.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)  # Served in this order
+
+# Concurrency caps per backend (Ollama is one local server - keep it small)
+LLM_CONCURRENCY: Dict[str, int] = {
+    "openai": int(os.getenv("LLM_MAX_CONCURRENT_OPENAI", "16")),
+    "gemini": int(os.getenv("LLM_MAX_CONCURRENT_GEMINI", "8")),
+    "ollama": int(os.getenv("LLM_MAX_CONCURRENT_OLLAMA", "2")),
+}
+
+# Requests per minute per provider key (0 = no rate limit)
+LLM_RATE_LIMITS_RPM: Dict[str, float] = {
+    "openai": float(os.getenv("LLM_RPM_OPENAI", "500")),
+    "gemini": float(os.getenv("LLM_RPM_GEMINI", "60")),
+    "ollama": 0,
+}
+
+def agent_backend() -> str:
+    """Backend the Agents SDK agents run on (same choice as the orchestrator's global model)"""
+    return "openai" if os.getenv("OPENAI_API_KEY") else "gemini"
+
+class TokenBucket:
+    """Token bucket: refills at rate_per_minute, holds up to burst tokens"""
+
+    def __init__(self, rate_per_minute: float, burst: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst or max(1.0, rate_per_minute / 10.0)  # ~6 seconds of burst
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, cost: float = 1.0) -> float:
+        """Take cost tokens, sleeping until they are available; returns seconds waited"""
+        waited = 0.0
+        async with self._lock:  # Callers are served in arrival order
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= cost:
+                    self.tokens -= cost
+                    return waited
+                delay = (cost - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+class BackendState:
+    """Concurrency slots and fair wait queues for one backend"""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.active = 0
+        # priority -> session_id -> waiting futures (OrderedDict order is the round-robin order)
+        self.queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def queue_depth(self, priority: str = None) -> int:
+        priorities = [priority] if priority else PRIORITIES
+        return sum(
+            sum(1 for waiter in waiters if not waiter.done())
+            for p in priorities for waiters in self.queues[p].values()
+        )
+
+    def next_waiter(self):
+        """Pop the next live waiter: highest priority first, then round-robin across sessions"""
+        for priority in PRIORITIES:
+            sessions = self.queues[priority]
+            while sessions:
+                session_id, waiters = next(iter(sessions.items()))
+                while waiters and waiters[0].done():
+                    waiters.popleft()  # Cancelled while waiting
+                if not waiters:
+                    del sessions[session_id]
+                    continue
+                waiter = waiters.popleft()
+                if waiters:
+                    sessions.move_to_end(session_id)  # This session goes to the back of the line
+                else:
+                    del sessions[session_id]
+                return waiter
+        return None
+
+class LLMScheduler:
+    """Per-backend concurrency caps, per-key rate limits and fair queuing for LLM calls.
+
+    Usage::
+
+        async with llm_scheduler.slot("ollama", session_id, priority=INTERACTIVE):
+            ...  # make (or stream) the call while holding the slot
+    """
+
+    def __init__(self, concurrency: Dict[str, int] = None, rate_limits_rpm: Dict[str, float] = None):
+        self.concurrency = dict(LLM_CONCURRENCY, **(concurrency or {}))
+        self.rate_limits_rpm = dict(LLM_RATE_LIMITS_RPM, **(rate_limits_rpm or {}))
+        self._backends: Dict[str, BackendState] = {}
+        self._buckets: Dict[tuple, TokenBucket] = {}
+        self.rate_limited_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self, backend: str, session_id: str = "default", priority: str = INTERACTIVE, key: str = None):
+        """Hold one concurrency slot (and one rate-limit token) for a call to backend"""
+        state = self._backend(backend)
+        started = time.monotonic()
+        if state.active < state.limit and not state.queue_depth():
+            state.active += 1
+        else:
+            waiter = asyncio.get_running_loop().create_future()
+            state.queues[priority].setdefault(session_id, deque()).append(waiter)
+            try:
+                await waiter  # Resolved by _release, which hands its slot over
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release(state)  # Slot was handed over just as we were cancelled
+                raise
+
+        try:
+            wait = time.monotonic() - started
+            state.granted += 1
+            state.total_wait += wait
+            state.max_wait = max(state.max_wait, wait)
+
+            bucket = self._bucket(backend, key)
+            if bucket:
+                self.rate_limited_wait += await bucket.acquire()
+            yield
+        finally:
+            self._release(state)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, active calls and wait times per backend"""
+        return {
+            name: {
+                "active": state.active,
+                "limit": state.limit,
+                "queue_depth": {priority: state.queue_depth(priority) for priority in PRIORITIES},
+                "granted": state.granted,
+                "avg_wait_seconds": state.total_wait / state.granted if state.granted else 0.0,
+                "max_wait_seconds": state.max_wait,
+            }
+            for name, state in self._backends.items()
+        } | {"rate_limited_wait_seconds": self.rate_limited_wait}
+
+    def _backend(self, backend: str) -> BackendState:
+        if backend not in self._backends:
+            self._backends[backend] = BackendState(backend, self.concurrency.get(backend, 4))
+        return self._backends[backend]
+
+    def _bucket(self, backend: str, key: str = None):
+        rpm = self.rate_limits_rpm.get(backend, 0)
+        if not rpm:
+            return None
+        # Keys are only used as bucket ids - never kept in plain text
+        key_id = hashlib.sha256((key or "").encode("utf-8")).hexdigest()[:12]
+        if (backend, key_id) not in self._buckets:
+            self._buckets[(backend, key_id)] = TokenBucket(rpm)
+        return self._buckets[(backend, key_id)]
+
+    def _release(self, state: BackendState):
+        waiter = state.next_waiter()
+        if waiter:
+            waiter.set_result(None)  # Hand the slot straight to the next waiter
+        else:
+            state.active -= 1
+
+# Process-wide scheduler shared by the orchestrator, agents and pack generators
+llm_scheduler = LLMScheduler()
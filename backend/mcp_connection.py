@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Persistent MCP Connections
+Connects each MCP server once and reuses the connection. A cheap health check
+runs at most every MCP_HEALTH_CHECK_SECONDS, a failed check reconnects, and
+close() releases the connection on shutdown.
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict
+
+from agents.mcp import MCPServerStreamableHttp
+
+LOCAL_MCP_SERVER_URL = os.getenv("LOCAL_MCP_SERVER_URL", "http://localhost:8000/mcp")
+MCP_HEALTH_CHECK_SECONDS = float(os.getenv("MCP_HEALTH_CHECK_SECONDS", "30"))
+MCP_HEALTH_CHECK_TIMEOUT = float(os.getenv("MCP_HEALTH_CHECK_TIMEOUT", "5"))
+
+class MCPConnectionManager:
+    """Owns one MCPServerStreamableHttp connection: connect once, health-check, reconnect, close"""
+
+    def __init__(self, name: str, url: str = LOCAL_MCP_SERVER_URL, timeout: float = 10,
+                 health_check_seconds: float = MCP_HEALTH_CHECK_SECONDS):
+        self.name = name
+        self.url = url
+        self.timeout = timeout
+        self.health_check_seconds = health_check_seconds
+        self.server = None
+        self._last_healthy = 0.0
+        self._lock = asyncio.Lock()
+        self.stats = {"connects": 0, "reconnects": 0, "health_checks": 0, "failures": 0}
+
+    async def get(self) -> MCPServerStreamableHttp:
+        """Connected server (connects on first use; raises if the server can't be reached)"""
+        async with self._lock:
+            if self.server is None:
+                await self._connect()
+            elif time.monotonic() - self._last_healthy > self.health_check_seconds:
+                if not await self._is_healthy():
+                    print(f"🔄 MCP server {self.name} unhealthy - reconnecting")
+                    self.stats["reconnects"] += 1
+                    await self._disconnect()
+                    await self._connect()
+            return self.server
+
+    async def close(self):
+        """Release the connection (call on shutdown)"""
+        async with self._lock:
+            await self._disconnect()
+
+    async def _connect(self):
+        server = MCPServerStreamableHttp(
+            name=self.name,
+            params={"url": self.url, "timeout": self.timeout},
+            cache_tools_list=True,
+            max_retry_attempts=3,
+        )
+        try:
+            await server.connect()
+        except Exception:
+            self.stats["failures"] += 1
+            await self._cleanup(server)
+            raise
+        self.server = server
+        self.stats["connects"] += 1
+        self._last_healthy = time.monotonic()
+
+    async def _is_healthy(self) -> bool:
+        self.stats["health_checks"] += 1
+        try:
+            session = getattr(self.server, "session", None)
+            if session is not None and hasattr(session, "send_ping"):
+                await asyncio.wait_for(session.send_ping(), MCP_HEALTH_CHECK_TIMEOUT)
+            else:
+                # No ping available - a fresh tool listing round-trips to the server instead
+                self.server.invalidate_tools_cache()
+                await asyncio.wait_for(self.server.list_tools(), MCP_HEALTH_CHECK_TIMEOUT)
+        except Exception:
+            self.stats["failures"] += 1
+            return False
+        self._last_healthy = time.monotonic()
+        return True
+
+    async def _disconnect(self):
+        if self.server is not None:
+            await self._cleanup(self.server)
+            self.server = None
+
+    async def _cleanup(self, server):
+        try:
+            await server.cleanup()
+        except Exception:
+            pass  # Already broken - nothing left to release
+
+_managers: Dict[str, MCPConnectionManager] = {}
+
+def get_mcp_manager(name: str, url: str = LOCAL_MCP_SERVER_URL) -> MCPConnectionManager:
+    """Process-wide manager for one MCP server"""
+    key = f"{name}@{url}"
+    if key not in _managers:
+        _managers[key] = MCPConnectionManager(name, url)
+    return _managers[key]
+
+async def close_all_mcp_connections():
+    """Close every managed MCP connection (shutdown hook)"""
+    for manager in list(_managers.values()):
+        await manager.close()
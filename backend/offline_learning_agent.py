@@ -4,16 +4,17 @@ Offline Learning Agent
 Handles offline study sessions using pre-generated learning packs.
 """
 
-import json
 import os
 from datetime import datetime
 from typing import Dict, List, Any, Optional
+from pack_format import load_pack, save_pack, write_progress, LazyPack, PACK_EXTENSION
 
 class OfflineLearningAgent:
     """Handles offline learning sessions using learning packs"""
     
     def __init__(self, learning_pack_path: str = None):
         self.learning_pack = None
+        self.pack_format = ".json"
         self.current_question = 0
         self.quiz_answers = []
         self.study_progress = 0
@@ -22,10 +23,10 @@ class OfflineLearningAgent:
             self.load_learning_pack(learning_pack_path)
     
     def load_learning_pack(self, file_path: str) -> bool:
-        """Load learning pack from JSON file"""
+        """Load learning pack from a .tpk container (sections load on first use) or a JSON file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                self.learning_pack = json.load(f)
+            self.learning_pack = load_pack(file_path)
+            self.pack_format = PACK_EXTENSION if isinstance(self.learning_pack, LazyPack) else ".json"
             
             print(f"✅ Learning pack loaded: {self.learning_pack['pack_info']['title']}")
             return True
@@ -294,13 +295,17 @@ Type your answer: A, B, C, or D
         if not self.learning_pack:
             return False
         
+        container_path = self.learning_pack.reader.path if isinstance(self.learning_pack, LazyPack) else None
         if not file_path:
             pack_id = self.learning_pack["pack_info"]["pack_id"]
-            file_path = f"/Users/mac/tutor_agent/backend/learning_pack_{pack_id}.json"
+            file_path = container_path or f"/Users/mac/tutor_agent/backend/learning_pack_{pack_id}{self.pack_format}"
         
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.learning_pack, f, indent=2, ensure_ascii=False)
+            if container_path and os.path.abspath(file_path) == os.path.abspath(container_path):
+                # Only the progress sidecar - the compressed sections are never loaded or rewritten
+                file_path = write_progress(self.learning_pack, file_path)
+            else:
+                save_pack(self.learning_pack, file_path)
             
             print(f"✅ Progress saved to: {file_path}")
             return True
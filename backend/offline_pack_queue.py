@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Offline Pack Queue
+Persistent local job queue for learning packs requested while upstream LLMs are
+unreachable. Jobs live in SQLite so they survive restarts; a drain run works
+through them on the local Ollama model during the overnight window and writes
+packs next to the batch generator's output.
+
+Usage:
+    python offline_pack_queue.py enqueue "Computer Science" 2 [--level beginner]
+    python offline_pack_queue.py drain [--now] [--max-jobs 20]
+    python offline_pack_queue.py status
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from batch_pack_generator import BATCH_PACK_OUTPUT_DIR, pack_filename
+
+PACK_QUEUE_DB = os.getenv(
+    "PACK_QUEUE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline_pack_queue.db"),
+)
+PACK_QUEUE_WINDOW = os.getenv("PACK_QUEUE_WINDOW", "22:00-06:00")  # Local hours the drain may run
+PACK_QUEUE_MAX_ATTEMPTS = int(os.getenv("PACK_QUEUE_MAX_ATTEMPTS", "3"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pack_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    level TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    path TEXT,
+    enqueued_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pack_jobs_status ON pack_jobs (status, id);
+"""
+
+def parse_window(window: str):
+    start, end = (datetime.strptime(part.strip(), "%H:%M").time() for part in window.split("-"))
+    return start, end
+
+def in_window(window: str = PACK_QUEUE_WINDOW, now: datetime = None) -> bool:
+    """True when now falls inside the window (which may wrap past midnight)"""
+    start, end = parse_window(window)
+    current = (now or datetime.now()).time()
+    return start <= current < end if start <= end else current >= start or current < end
+
+def seconds_until_window(window: str = PACK_QUEUE_WINDOW, now: datetime = None) -> float:
+    now = now or datetime.now()
+    if in_window(window, now):
+        return 0.0
+    start, _ = parse_window(window)
+    opens = datetime.combine(now.date(), start)
+    if opens <= now:
+        opens += timedelta(days=1)
+    return (opens - now).total_seconds()
+
+class OfflinePackQueue:
+    """SQLite-backed pack job queue: enqueue (deduplicated), claim, complete, fail with retry"""
+
+    def __init__(self, db_path: str = PACK_QUEUE_DB, max_attempts: int = PACK_QUEUE_MAX_ATTEMPTS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # Status reads don't block the drain
+        self._conn.executescript(SCHEMA)
+        # Jobs left 'running' by a crashed drain go back in line
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pack_jobs SET status = 'pending' WHERE status = 'running'")
+
+    def enqueue(self, subject: str, chapter: int, level: str = "beginner") -> bool:
+        """Queue a pack; False when the same pack is already waiting"""
+        with self._lock, self._conn:
+            waiting = self._conn.execute(
+                "SELECT 1 FROM pack_jobs WHERE subject = ? AND chapter = ? AND level = ? AND status IN ('pending', 'running')",
+                (subject, chapter, level),
+            ).fetchone()
+            if waiting:
+                return False
+            self._conn.execute(
+                "INSERT INTO pack_jobs (subject, chapter, level, enqueued_at) VALUES (?, ?, ?, ?)",
+                (subject, chapter, level, time.time()),
+            )
+        return True
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Oldest pending job, marked running (None when the queue is empty)"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id, subject, chapter, level, attempts FROM pack_jobs WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pack_jobs SET status = 'running', attempts = attempts + 1 WHERE id = ?", (row[0],))
+        return {"id": row[0], "subject": row[1], "chapter": row[2], "level": row[3], "attempts": row[4] + 1}
+
+    def complete(self, job_id: int, path: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pack_jobs SET status = 'done', path = ?, error = NULL, finished_at = ? WHERE id = ?",
+                (path, time.time(), job_id),
+            )
+
+    def fail(self, job_id: int, error: str):
+        """Back to pending until max_attempts, then failed for good"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE pack_jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, finished_at = ? WHERE id = ?",
+                (self.max_attempts, error[:500], time.time(), job_id),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM pack_jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        self._conn.close()
+
+async def drain(queue: OfflinePackQueue, engine=None, output_dir: str = BATCH_PACK_OUTPUT_DIR,
+                window: str = None, max_jobs: int = None) -> Dict[str, Any]:
+    """Generate queued packs until the queue is empty, max_jobs is reached or the window closes"""
+    from pack_engine import has_placeholder_content
+    owns_engine = engine is None
+    if owns_engine:
+        from enhanced_learning_pack_generator import EnhancedLearningPackGenerator
+        from pack_engine import ollama_backend
+        engine = EnhancedLearningPackGenerator(backend=ollama_backend())
+    os.makedirs(output_dir, exist_ok=True)
+    report = {"generated": 0, "failed": 0, "seconds": 0.0}
+    started = time.perf_counter()
+
+    while max_jobs is None or report["generated"] + report["failed"] < max_jobs:
+        if window and not in_window(window):
+            print("🌅 Queue window closed - stopping drain")
+            break
+        job = queue.claim()
+        if job is None:
+            break
+        key = (job["subject"], job["chapter"], job["level"])
+        try:
+            pack = await engine.generate_pack(*key)
+            if has_placeholder_content(pack):
+                raise RuntimeError("no model produced content (is Ollama running?)")
+            path = os.path.join(output_dir, pack_filename(key))
+            await asyncio.to_thread(_write_json, path, pack)
+        except Exception as e:
+            report["failed"] += 1
+            queue.fail(job["id"], str(e))
+            print(f"❌ Queued pack {job['subject']} Chapter {job['chapter']} failed (attempt {job['attempts']}): {e}")
+            continue
+        queue.complete(job["id"], path)
+        report["generated"] += 1
+        print(f"✅ Queued pack {job['subject']} Chapter {job['chapter']} ({job['level']}) -> {path}")
+
+    if owns_engine:
+        await engine.close()
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    return report
+
+def _write_json(path: str, data: Any):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)  # Never leave a half-written pack behind
+
+async def main():
+    parser = argparse.ArgumentParser(description="Local learning pack job queue")
+    commands = parser.add_subparsers(dest="command", required=True)
+    enqueue = commands.add_parser("enqueue", help="Queue a pack")
+    enqueue.add_argument("subject")
+    enqueue.add_argument("chapter", type=int)
+    enqueue.add_argument("--level", default="beginner")
+    run = commands.add_parser("drain", help="Generate queued packs on the local model")
+    run.add_argument("--now", action="store_true", help="Start immediately and ignore the queue window")
+    run.add_argument("--max-jobs", type=int, default=None)
+    run.add_argument("--output-dir", default=BATCH_PACK_OUTPUT_DIR)
+    commands.add_parser("status", help="Job counts by status")
+    args = parser.parse_args()
+
+    queue = OfflinePackQueue()
+    try:
+        if args.command == "enqueue":
+            added = queue.enqueue(args.subject, args.chapter, args.level)
+            print("📥 Queued" if added else "⏭️ Already queued")
+        elif args.command == "status":
+            print(f"📋 Queue: {queue.stats()}")
+        else:
+            window = None if args.now else PACK_QUEUE_WINDOW
+            if window:
+                wait = seconds_until_window(window)
+                if wait:
+                    print(f"🌙 Waiting {wait / 3600:.1f}h for the {window} window")
+                    await asyncio.sleep(wait)
+            report = await drain(queue, output_dir=args.output_dir, window=window, max_jobs=args.max_jobs)
+            print(f"\n📊 Drain report: {report}, queue: {queue.stats()}")
+    finally:
+        queue.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Ollama Option Profiles
+Named option sets for the local Ollama model, chosen by network and hardware state.
+"""
+
+import os
+from typing import Dict, Any
+
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.1")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # Keep the model pinned in memory between turns
+OLLAMA_PROFILE = os.getenv("OLLAMA_PROFILE")                # Force a profile (fast/balanced/quality)
+LOW_END_CPU_COUNT = 4                                       # At or below this many cores, always use "fast"
+
+# Load-time options: changing any of these makes Ollama reload the model,
+# so they are identical for every profile (and for the warmup request)
+OLLAMA_LOAD_OPTIONS: Dict[str, Any] = {
+    "num_ctx": 2048,     # Reduce context window for faster processing
+    "num_batch": 512,    # Optimize batch size
+    "num_thread": int(os.getenv("OLLAMA_NUM_THREAD", str(min(8, os.cpu_count() or 4)))),
+}
+
+# Sampling options shared by every profile
+OLLAMA_BASE_OPTIONS: Dict[str, Any] = {
+    "repeat_penalty": 1.1,  # Slight penalty to avoid repetition
+    "tfs_z": 1.0,           # Tail free sampling
+    "typical_p": 1.0,       # Typical sampling
+    "mirostat": 0,          # Disable mirostat for speed
+    "mirostat_eta": 0.1,
+    "mirostat_tau": 5.0,
+}
+
+OLLAMA_OPTION_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Short, quick answers - slow hardware or degraded sessions (length capped by num_predict,
+    # not by stopping at a paragraph break, so multi-paragraph explanations still finish)
+    "fast": {
+        "num_predict": 384,
+        "top_k": 40,             # Limit vocabulary for faster generation
+        "top_p": 0.9,            # Nucleus sampling for faster generation
+        "repeat_last_n": 64,     # Reduce repetition context
+        "penalize_newline": False,
+        "stop": ["Human:", "User:"],
+    },
+    # Default for offline tutoring - full paragraphs, still responsive
+    "balanced": {
+        "num_predict": 1024,
+        "top_k": 40,
+        "top_p": 0.9,
+        "repeat_last_n": 64,
+        "penalize_newline": False,
+        "stop": ["Human:", "User:"],
+    },
+    # Long, careful answers on capable hardware
+    "quality": {
+        "num_predict": 2048,
+        "top_k": 60,
+        "top_p": 0.95,
+        "repeat_last_n": 128,
+        "penalize_newline": False,
+        "stop": ["Human:", "User:"],
+    },
+}
+
+def select_ollama_profile(speed_mbps: float, degrade_threshold_mbps: float, cpu_count: int = None) -> str:
+    """Pick an option profile for the current network speed and hardware"""
+    if OLLAMA_PROFILE in OLLAMA_OPTION_PROFILES:
+        return OLLAMA_PROFILE
+
+    cpu_count = cpu_count or os.cpu_count() or 1
+    if cpu_count <= LOW_END_CPU_COUNT:
+        return "fast"
+    if 0 < speed_mbps < degrade_threshold_mbps:
+        # Degraded session - match OpenAI degrade mode's concise answers
+        return "fast"
+    if speed_mbps == 0.0 and cpu_count >= 16:
+        # Offline on a strong machine - Ollama is all we have, make it count
+        return "quality"
+    return "balanced"
+
+def build_ollama_options(profile: str = "balanced", temperature: float = None, max_tokens: int = None) -> Dict[str, Any]:
+    """Merge load, base and profile options; max_tokens can only lower the profile's num_predict"""
+    options = {**OLLAMA_LOAD_OPTIONS, **OLLAMA_BASE_OPTIONS, **OLLAMA_OPTION_PROFILES[profile]}
+    if temperature is not None:
+        options["temperature"] = temperature
+    if max_tokens is not None:
+        options["num_predict"] = min(options["num_predict"], max_tokens)
+    return options
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Learning Pack Cache
+Content-addressed store for generated study material and quizzes. An entry's
+address is the hash of everything that determines its content: subject,
+chapter, level, source text hash, prompt version and model. When none of those
+change, generation is a file read. Total size is capped; the least recently
+used entries are evicted first.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+PACK_CACHE_DIR = os.getenv(
+    "PACK_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "pack_cache"),
+)
+PACK_CACHE_MAX_BYTES = int(os.getenv("PACK_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Textbooks served by the MCP server (Mcp_Tools/main.py PDF_PATHS), by subject keyword
+MCP_TOOLS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Mcp_Tools")
+SUBJECT_SOURCE_FILES = {
+    "computer": os.path.join(MCP_TOOLS_DIR, "Computer 7 SNC 2023-24 (1).pdf"),
+    "english": os.path.join(MCP_TOOLS_DIR, "English 7 SNC 2023-24.pdf"),
+}
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def hash_json(data: Any) -> str:
+    return hash_text(json.dumps(data, sort_keys=True, ensure_ascii=False))
+
+_file_hashes: Dict[tuple, str] = {}
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file, memoized on (path, size, mtime)"""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        _file_hashes[key] = digest.hexdigest()
+    return _file_hashes[key]
+
+def subject_source_hash(subject: str) -> str:
+    """Hash of the subject's textbook, or "no-source" when there isn't a local copy"""
+    for keyword, path in SUBJECT_SOURCE_FILES.items():
+        if keyword in subject.lower() and os.path.exists(path):
+            return hash_file(path)
+    return "no-source"
+
+class PackCache:
+    """Content-addressed JSON store with size-based LRU eviction and hit-rate stats"""
+
+    def __init__(self, root: str = PACK_CACHE_DIR, max_bytes: int = PACK_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+        self._sizes = None  # path -> size, scanned on first use
+
+    def address(self, kind: str, subject: str, chapter: int, level: str, source_hash: str,
+                prompt_version: str, model: str) -> str:
+        """Content address of one entry"""
+        return hash_json({
+            "kind": kind, "subject": subject.lower(), "chapter": int(chapter), "level": level.lower(),
+            "source": source_hash, "prompt_version": prompt_version, "model": model,
+        })
+
+    def get(self, kind: str, **key_fields) -> Optional[Any]:
+        """Cached value, or None on a miss"""
+        path = self._path(kind, self.address(kind, **key_fields))
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            return None
+        os.utime(path)  # Recently used - evicted last
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        return value
+
+    def put(self, kind: str, value: Any, **key_fields) -> str:
+        """Store a value; returns its address"""
+        address = self.address(kind, **key_fields)
+        path = self._path(kind, address)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps(value, ensure_ascii=False)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            sizes = self._scan()
+            sizes[path] = len(data.encode("utf-8"))
+            self._evict(sizes)
+        return address
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate per kind, entry count and size on disk"""
+        with self._lock:
+            sizes = self._scan()
+            total_bytes = sum(sizes.values())
+        report = {"entries": len(sizes), "bytes": total_bytes, "max_bytes": self.max_bytes}
+        for kind in sorted(set(self.hits) | set(self.misses)):
+            hits, misses = self.hits.get(kind, 0), self.misses.get(kind, 0)
+            report[kind] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+        return report
+
+    def _path(self, kind: str, address: str) -> str:
+        return os.path.join(self.root, kind, address[:2], f"{address}.json")
+
+    def _scan(self) -> Dict[str, int]:
+        if self._sizes is None:
+            self._sizes = {}
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    if filename.endswith(".json"):
+                        path = os.path.join(dirpath, filename)
+                        self._sizes[path] = os.path.getsize(path)
+        return self._sizes
+
+    def _evict(self, sizes: Dict[str, int]):
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_last_use = sorted(sizes, key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0)
+        for path in by_last_use:
+            if total <= self.max_bytes:
+                break
+            total -= sizes.pop(path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+# Shared by every generator in the process
+pack_cache = PackCache()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Learning Pack Deltas
+Diff and patch between two versions of a learning pack, so a device that
+already has yesterday's pack downloads only what changed (e.g. a new quiz over
+the same study material). Patches are structural: unchanged sections are
+skipped, changed dicts carry only their changed keys, and same-length lists
+carry only their changed items. Every patch names the hash of the pack it
+applies to and the hash of the result, and apply_patch verifies both.
+
+The progress section is the device's own state, so it is never diffed, hashed
+or overwritten.
+
+Usage:
+    python pack_delta.py diff old_pack.json new_pack.json [-o patch.tpd]
+    python pack_delta.py apply pack.tpk patch.tpd [-o patched.tpk]
+"""
+
+import argparse
+import copy
+import json
+import os
+import struct
+from typing import Any, Dict, Optional
+
+from pack_cache import hash_json
+from pack_format import compress, decompress, load_pack, save_pack, LazyPack, DEFAULT_CODEC
+
+DELTA_MAGIC = b"TPD"
+DELTA_VERSION = 1
+DELTA_EXTENSION = ".tpd"
+DELTA_PREAMBLE = struct.Struct("<3sBB")  # magic, version, codec id
+CODECS = ("gzip", "zstd")
+DEVICE_SECTIONS = ("progress",)  # Written on the device - never part of a delta
+
+class PatchError(ValueError):
+    """A patch that doesn't apply to this pack, or didn't produce the expected result"""
+
+def _as_dict(pack) -> Dict[str, Any]:
+    return pack.to_dict() if isinstance(pack, LazyPack) else dict(pack)
+
+def content_hash(pack) -> str:
+    """Hash of everything a delta can change (device sections excluded)"""
+    return hash_json({name: value for name, value in _as_dict(pack).items() if name not in DEVICE_SECTIONS})
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+
+def diff_value(old: Any, new: Any) -> Optional[Dict[str, Any]]:
+    """Smallest op turning old into new, or None when they are equal"""
+    if old == new:
+        return None
+    op = None
+    if isinstance(old, dict) and isinstance(new, dict):
+        op = {"set": {}, "unset": [key for key in old if key not in new], "patch": {}}
+        for key, value in new.items():
+            if key not in old:
+                op["set"][key] = value
+            else:
+                sub = diff_value(old[key], value)
+                if sub is None:
+                    continue
+                if "replace" in sub:
+                    op["set"][key] = value
+                else:
+                    op["patch"][key] = sub
+        op = {name: part for name, part in op.items() if part}
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        op = {"items": {str(i): diff_value(a, b) for i, (a, b) in enumerate(zip(old, new)) if a != b}}
+    # Structural ops only pay off when they are smaller than the new value itself
+    if op is None or _size(op) >= _size(new):
+        return {"replace": new}
+    return op
+
+def apply_value(value: Any, op: Dict[str, Any]) -> Any:
+    if "replace" in op:
+        return copy.deepcopy(op["replace"])
+    if "items" in op:
+        for index, sub in op["items"].items():
+            value[int(index)] = apply_value(value[int(index)], sub)
+        return value
+    for key in op.get("unset", []):
+        value.pop(key, None)
+    for key, sub in op.get("patch", {}).items():
+        value[key] = apply_value(value[key], sub)
+    for key, new in op.get("set", {}).items():
+        value[key] = copy.deepcopy(new)
+    return value
+
+def diff_packs(old_pack, new_pack) -> Dict[str, Any]:
+    """Patch from old_pack to new_pack"""
+    old, new = _as_dict(old_pack), _as_dict(new_pack)
+    sections = {}
+    for name in set(old) | set(new):
+        if name in DEVICE_SECTIONS:
+            continue
+        if name not in new:
+            sections[name] = {"remove": True}
+        elif name not in old:
+            sections[name] = {"replace": new[name]}
+        else:
+            op = diff_value(old[name], new[name])
+            if op is not None:
+                sections[name] = op
+    return {"version": DELTA_VERSION, "base_hash": content_hash(old), "target_hash": content_hash(new),
+            "sections": sections}
+
+def apply_patch(pack, patch: Dict[str, Any], verify: bool = True) -> Dict[str, Any]:
+    """New pack from pack + patch; raises PatchError on a base or result hash mismatch"""
+    data = _as_dict(pack)
+    if patch.get("version", 0) > DELTA_VERSION:
+        raise PatchError(f"Delta format v{patch['version']} is newer than this reader (v{DELTA_VERSION})")
+    if verify and content_hash(data) != patch["base_hash"]:
+        raise PatchError("Patch was made for a different version of this pack")
+    patched = copy.deepcopy(data)
+    for name, op in patch["sections"].items():
+        if op.get("remove"):
+            patched.pop(name, None)
+        elif name in patched:
+            patched[name] = apply_value(patched[name], op)
+        else:
+            patched[name] = copy.deepcopy(op["replace"])
+    if verify and content_hash(patched) != patch["target_hash"]:
+        raise PatchError("Patched pack doesn't match the expected result")
+    return patched
+
+def encode_patch(patch: Dict[str, Any], codec: str = None) -> bytes:
+    codec = codec or DEFAULT_CODEC
+    raw = json.dumps(patch, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return DELTA_PREAMBLE.pack(DELTA_MAGIC, DELTA_VERSION, CODECS.index(codec)) + compress(raw, codec)
+
+def decode_patch(data: bytes) -> Dict[str, Any]:
+    magic, version, codec_id = DELTA_PREAMBLE.unpack(data[:DELTA_PREAMBLE.size])
+    if magic != DELTA_MAGIC:
+        raise PatchError("Not a learning pack delta")
+    if version > DELTA_VERSION:
+        raise PatchError(f"Delta format v{version} is newer than this reader (v{DELTA_VERSION})")
+    return json.loads(decompress(data[DELTA_PREAMBLE.size:], CODECS[codec_id]).decode("utf-8"))
+
+def write_patch(patch: Dict[str, Any], path: str, codec: str = None) -> str:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_patch(patch, codec))
+    os.replace(tmp_path, path)
+    return path
+
+def read_patch(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return decode_patch(f.read())
+
+def write_delta(old_pack, new_pack, pack_path: str, delta_dir: str) -> Optional[str]:
+    """Patch file for devices that hold old_pack (named by its hash); None when nothing changed"""
+    patch = diff_packs(old_pack, new_pack)
+    if not patch["sections"]:
+        return None
+    os.makedirs(delta_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(pack_path))[0]
+    return write_patch(patch, os.path.join(delta_dir, f"{stem}.{patch['base_hash'][:12]}{DELTA_EXTENSION}"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Learning pack delta tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    diff_cmd = commands.add_parser("diff", help="Write a patch from OLD to NEW")
+    diff_cmd.add_argument("old")
+    diff_cmd.add_argument("new")
+    diff_cmd.add_argument("-o", "--output", default=None)
+    apply_cmd = commands.add_parser("apply", help="Apply PATCH to PACK")
+    apply_cmd.add_argument("pack")
+    apply_cmd.add_argument("patch")
+    apply_cmd.add_argument("-o", "--output", default=None, help="Defaults to overwriting PACK")
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        patch = diff_packs(load_pack(args.old), load_pack(args.new))
+        output = args.output or os.path.splitext(args.new)[0] + DELTA_EXTENSION
+        write_patch(patch, output)
+        full = len(compress(json.dumps(_as_dict(load_pack(args.new)), separators=(",", ":")).encode("utf-8"), DEFAULT_CODEC))
+        delta = os.path.getsize(output)
+        print(f"🧩 {output}: {len(patch['sections'])} changed section(s), {delta:,} bytes "
+              f"vs {full:,} for the full compressed pack ({delta / full:.0%})")
+    else:
+        pack = load_pack(args.pack)
+        patched = apply_patch(pack, read_patch(args.patch))  # The device's progress is carried over as-is
+        output = args.output or args.pack
+        save_pack(patched, output)
+        print(f"✅ Patched {args.pack} -> {output} (verified {content_hash(patched)[:12]})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Learning Pack Engine
+One engine behind every learning pack generator. Where study material comes
+from (MCP textbook, LLM-only, cache) and which model writes it (OpenAI, Gemini,
+local Ollama) are pluggable; clients, scheduling, caching, quiz generation,
+the pack schema and save/load live here once.
+
+    engine = PackEngine(get_model_backend("openai"), default_sources(), cache=pack_cache)
+    pack = await engine.generate_pack("Computer Science", 1, "beginner")
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm_clients import get_openai_client, get_gemini_client, get_ollama_client
+from llm_scheduler import llm_scheduler, BATCH
+from pack_cache import hash_json, subject_source_hash
+from book_content import fetch_chapter_text, UNAVAILABLE_TEXT
+from quiz_generation import QuizGenerator, QUIZ_MODEL, supports_json_schema
+from pack_format import load_pack, save_pack
+from ollama_profiles import OLLAMA_MODEL, OLLAMA_KEEP_ALIVE, build_ollama_options
+
+PACK_MODEL_BACKEND = os.getenv("PACK_MODEL_BACKEND", "openai")
+PACK_OPENAI_MODEL = os.getenv("PACK_OPENAI_MODEL", "gpt-3.5-turbo")
+PACK_GEMINI_MODEL = os.getenv("PACK_GEMINI_MODEL", "gemini-2.0-flash")
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+# Offline pack generation is throughput work, not a conversation: lower temperature, the
+# model kept loaded across queued jobs, no chat stop words, and the tutor's load options
+# (changing num_ctx/num_batch/num_thread would make Ollama reload the model under the tutor)
+PACK_OLLAMA_PROFILE = os.getenv("PACK_OLLAMA_PROFILE", "balanced")
+PACK_OLLAMA_KEEP_ALIVE = os.getenv("PACK_OLLAMA_KEEP_ALIVE", OLLAMA_KEEP_ALIVE)
+PACK_OLLAMA_TEMPERATURE = float(os.getenv("PACK_OLLAMA_TEMPERATURE", "0.3"))
+CHARS_PER_TOKEN = 3  # Conservative - textbook text with numbers and symbols
+PACK_PROMPT_TEMPLATE_TOKENS = 256  # Instructions wrapped around the chapter text in the longest pack prompt
+LEARNING_PACK_PATH = os.getenv("LEARNING_PACK_PATH", "/Users/mac/tutor_agent/backend/learning_pack.json")
+
+# Bump when a prompt changes so cached material made with the old prompt isn't reused
+STUDY_MATERIAL_PROMPT_VERSION = "2"
+QUIZ_PROMPT_VERSION = "2"
+
+MCP_SOURCE = "MCP_Book_Content"
+GENERATED_SOURCE = "Generated_Content"
+PLACEHOLDER_SOURCE = "Placeholder_Content"
+
+StudyMaterial = Tuple[Dict[str, Any], str]  # (material, source label)
+
+def has_placeholder_content(pack: Dict[str, Any]) -> bool:
+    """True when the pack's study material or its quiz is a placeholder"""
+    info = pack["pack_info"]
+    return PLACEHOLDER_SOURCE in (info["source"], info.get("quiz_source"))
+
+# -----------------------------
+# Model backends
+# -----------------------------
+@dataclass
+class ModelBackend:
+    """An OpenAI-compatible chat endpoint plus the llm_scheduler backend it is queued on"""
+    name: str
+    client: Any
+    model: str
+    quiz_model: str
+    api_key: str = None
+    max_input_chars: int = None  # Prompt text budget (None: no limit worth enforcing)
+    schema_output: bool = False  # Every model here takes a json_schema response_format (else decided per model)
+
+    def supports_json_schema(self, model: str) -> bool:
+        return self.schema_output or supports_json_schema(model)
+
+    async def complete(self, prompt: str, max_tokens: int, temperature: float = 0.7, json_mode: bool = False,
+                       response_format: Dict[str, Any] = None, model: str = None) -> str:
+        """One batch-priority completion"""
+        if json_mode and response_format is None:
+            response_format = {"type": "json_object"}
+        extra = {"response_format": response_format} if response_format else {}
+        # Batch priority: interactive tutoring turns go first
+        async with llm_scheduler.slot(self.name, "learning_packs", priority=BATCH, key=self.api_key):
+            response = await self.client.chat.completions.create(
+                model=model or self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra
+            )
+        message = response.choices[0].message
+        if getattr(message, "refusal", None):
+            raise ValueError(f"request refused: {message.refusal}")
+        return message.content
+
+@dataclass
+class OllamaBackend(ModelBackend):
+    """Local Ollama through its native API, so pack jobs share the tutor's loaded model"""
+    schema_output: bool = True  # Structured output (format=<schema>) works with any local model
+    profile: str = PACK_OLLAMA_PROFILE
+    max_predict: int = None     # Reply budget reserved in num_ctx (see ollama_backend)
+
+    async def complete(self, prompt: str, max_tokens: int, temperature: float = 0.7, json_mode: bool = False,
+                       response_format: Dict[str, Any] = None, model: str = None) -> str:
+        """One batch-priority completion (json_schema formats become Ollama structured output)"""
+        output_format = None
+        if response_format and response_format.get("type") == "json_schema":
+            output_format = response_format["json_schema"]["schema"]
+        elif json_mode or response_format:
+            output_format = "json"
+        options = build_ollama_options(self.profile, temperature=min(temperature, PACK_OLLAMA_TEMPERATURE),
+                                       max_tokens=min(max_tokens, self.max_predict or max_tokens))
+        options["stop"] = []  # Profile stop words are for chat turns; packs and JSON run to completion
+        async with llm_scheduler.slot(self.name, "learning_packs", priority=BATCH):
+            response = await self.client.chat(
+                model=model or self.model,
+                messages=[{"role": "user", "content": prompt}],
+                format=output_format,
+                options=options,
+                keep_alive=PACK_OLLAMA_KEEP_ALIVE,
+            )
+        return response["message"]["content"]
+
+def openai_backend(api_key: str = None, model: str = PACK_OPENAI_MODEL) -> Optional[ModelBackend]:
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    return ModelBackend("openai", get_openai_client(api_key), model, QUIZ_MODEL, api_key)
+
+def gemini_backend(api_key: str = None, model: str = PACK_GEMINI_MODEL) -> Optional[ModelBackend]:
+    api_key = api_key or os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    # Gemini's OpenAI-compatible endpoint takes json_schema response formats (structured output)
+    return ModelBackend("gemini", get_gemini_client(api_key), model, model, api_key, schema_output=True)
+
+def ollama_backend(host: str = OLLAMA_HOST, model: str = OLLAMA_MODEL,
+                   profile: str = PACK_OLLAMA_PROFILE) -> OllamaBackend:
+    options = build_ollama_options(profile)
+    # Prompt + reply must fit num_ctx or Ollama silently drops the front of the prompt:
+    # reserve the whole reply budget (at most half the window) and the prompt's own instructions
+    max_predict = min(options["num_predict"], options["num_ctx"] // 2)
+    max_input_chars = (options["num_ctx"] - max_predict - PACK_PROMPT_TEMPLATE_TOKENS) * CHARS_PER_TOKEN
+    return OllamaBackend("ollama", get_ollama_client(host), model, model,
+                         max_input_chars=max_input_chars, profile=profile, max_predict=max_predict)
+
+MODEL_BACKENDS = {"openai": openai_backend, "gemini": gemini_backend, "ollama": ollama_backend}
+
+def get_model_backend(name: str = PACK_MODEL_BACKEND, **kwargs) -> Optional[ModelBackend]:
+    """Backend by name (None when its API key isn't configured)"""
+    try:
+        return MODEL_BACKENDS[name](**kwargs)
+    except Exception as e:
+        print(f"⚠️ {name} backend unavailable: {e}")
+        return None
+
+def select_pack_backend(speed_mbps: float = None, is_degrade: bool = False) -> ModelBackend:
+    """Local Ollama when offline or degraded (or no API key is configured), else the configured backend.
+
+    speed_mbps None means the link hasn't been measured; the configured backend is tried first.
+    """
+    if speed_mbps == 0.0 or is_degrade:
+        return ollama_backend()
+    return get_model_backend() or ollama_backend()
+
+# -----------------------------
+# Content sources
+# -----------------------------
+def extract_key_concepts(content: str) -> List[str]:
+    """Extract key concepts from content"""
+    concepts = []
+    for line in content.split('\n'):
+        if any(keyword in line.lower() for keyword in ['concept', 'principle', 'theory', 'method', 'technique']):
+            if 10 < len(line.strip()) < 100:
+                concepts.append(line.strip())
+                if len(concepts) >= 5:
+                    break
+    return concepts or [
+        "Fundamental concepts and principles",
+        "Key theories and methods",
+        "Practical applications",
+        "Problem-solving techniques",
+        "Advanced topics and extensions"
+    ]
+
+def extract_examples(content: str) -> List[str]:
+    """Extract examples from content"""
+    examples = []
+    for line in content.split('\n'):
+        if any(keyword in line.lower() for keyword in ['example', 'for instance', 'such as', 'case study']):
+            if 15 < len(line.strip()) < 150:
+                examples.append(line.strip())
+                if len(examples) >= 3:
+                    break
+    return examples or [
+        "Real-world application example",
+        "Step-by-step problem solving",
+        "Practical implementation case"
+    ]
+
+def summarize_text(content: str) -> str:
+    """First few sentences of the content"""
+    sentences = [sentence.strip() for sentence in content.split('.')[:3] if len(sentence.strip()) > 20]
+    if sentences:
+        return '. '.join(sentences) + '.'
+    return "This chapter covers essential concepts and provides practical examples for better understanding."
+
+class MCPBookSource:
+    """Exact chapter text from the textbook through the MCP PDF tools, structured by one model call"""
+    name = "mcp"
+
+    def __init__(self, server_name: str = "StudentDataToolbox"):
+        from mcp_connection import get_mcp_manager  # Only MCP-backed engines need the agents MCP client
+        self.manager = get_mcp_manager(server_name)  # Connected once, reused by every pack
+
+    def source_hash(self, subject: str) -> str:
+        return subject_source_hash(subject)
+
+    async def fetch(self, engine: "PackEngine", subject: str, chapter: int, level: str) -> Optional[StudyMaterial]:
+        try:
+            first_connect = self.manager.server is None
+            server = await self.manager.get()
+            if first_connect:
+                print("✅ Connected to local MCP server for book content")
+            # Deterministic extraction: tool call + heading split, no LLM tool-use round trips
+            chapter_text = await fetch_chapter_text(server, subject, chapter)
+        except Exception as e:
+            print(f"⚠️ Could not read book content over MCP: {e}")
+            return None
+        if chapter_text is None:
+            return None
+
+        study_material = {
+            "title": f"{subject} - Chapter {chapter}",
+            "overview": f"Chapter {chapter} of {subject} covering essential concepts.",
+            "key_concepts": extract_key_concepts(chapter_text),
+            "detailed_content": chapter_text,
+            "examples": extract_examples(chapter_text),
+            "summary": summarize_text(chapter_text)
+        }
+        if engine.backend:
+            study_material.update(await self._structure(engine.backend, subject, chapter, level, chapter_text))
+        print("✅ Using book content from MCP tools")
+        return study_material, MCP_SOURCE
+
+    async def close(self):
+        await self.manager.close()
+
+    async def _structure(self, backend: ModelBackend, subject: str, chapter: int, level: str,
+                         chapter_text: str) -> Dict[str, Any]:
+        """One generation call that turns the chapter text into study material fields"""
+        prompt = f"""
+        Below is the text of {subject} Chapter {chapter} from the student's textbook.
+        Write study material for a {level} student using only this text.
+
+        Return a JSON object with:
+        "title" (chapter title), "overview" (2-3 sentences), "key_concepts" (3-5 strings),
+        "detailed_content" (clear explanations), "examples" (2-3 strings from the text), "summary" (3-4 sentences)
+
+        Chapter text:
+        {chapter_text[:backend.max_input_chars]}
+        """
+        try:
+            structured = json.loads(await backend.complete(prompt, max_tokens=1500, temperature=0.3, json_mode=True))
+        except Exception as e:
+            print(f"⚠️ Error structuring book content, using extracted text: {e}")
+            return {}
+        # Keep extracted values for anything missing, malformed or "unable to access"-style
+        fields = {}
+        for name in ("title", "overview", "detailed_content", "summary"):
+            value = structured.get(name)
+            if isinstance(value, str) and value.strip() and not UNAVAILABLE_TEXT.search(value):
+                fields[name] = value.strip()
+        for name in ("key_concepts", "examples"):
+            value = structured.get(name)
+            if isinstance(value, list) and value and all(isinstance(item, str) for item in value):
+                fields[name] = value
+        return fields
+
+class LLMSource:
+    """Study material written by the model alone (no textbook)"""
+    name = "llm"
+
+    def source_hash(self, subject: str) -> str:
+        return "no-source"
+
+    async def fetch(self, engine: "PackEngine", subject: str, chapter: int, level: str) -> Optional[StudyMaterial]:
+        if not engine.backend:
+            return None
+        prompt = f"""
+            Create comprehensive study material for {subject} Chapter {chapter} for a {level} student.
+
+            Include:
+            1. Chapter title and overview
+            2. Key concepts (3-5 main points)
+            3. Detailed explanations
+            4. Practical examples
+            5. Summary
+
+            Format as structured content suitable for offline study.
+            """
+        try:
+            content = await engine.backend.complete(prompt, max_tokens=1500)
+        except Exception as e:
+            print(f"⚠️ Error generating study material: {e}")
+            return None
+        if not content or UNAVAILABLE_TEXT.search(content):
+            return None
+        return {
+            "title": f"{subject} - Chapter {chapter}",
+            "overview": f"Chapter {chapter} of {subject} covering essential concepts.",
+            "key_concepts": [
+                f"Key concept 1 in {subject}",
+                f"Key concept 2 in {subject}",
+                f"Key concept 3 in {subject}"
+            ],
+            "detailed_content": content,
+            "examples": [
+                f"Example 1: Practical application in {subject}",
+                f"Example 2: Real-world scenario in {subject}"
+            ],
+            "summary": f"Chapter {chapter} summary: Essential {subject} concepts for {level} level."
+        }, GENERATED_SOURCE
+
+class CachedSource:
+    """Content-addressed cache in front of other sources: only the primary source's answers are cached"""
+    name = "cached"
+
+    def __init__(self, sources: List[Any], cache):
+        self.sources = sources
+        self.cache = cache
+
+    def source_hash(self, subject: str) -> str:
+        # Names the primary source - "no-source" alone can't tell a textbook from LLM-only material
+        primary = self.sources[0]
+        return hash_json([primary.name, primary.source_hash(subject)])
+
+    async def fetch(self, engine: "PackEngine", subject: str, chapter: int, level: str) -> Optional[StudyMaterial]:
+        # Cached when subject, chapter, level, book, prompt and model are unchanged
+        key = engine.cache_key(subject, chapter, level, self.source_hash(subject),
+                               STUDY_MATERIAL_PROMPT_VERSION, engine.model_name)
+        cached = self.cache.get("study_material", **key)
+        if cached:
+            print("✅ Using cached study material")
+            return cached["study_material"], cached["source"]
+        for index, source in enumerate(self.sources):
+            result = await source.fetch(engine, subject, chapter, level)
+            if result:
+                # A fallback answer (LLM-only material during an MCP outage) is used once, never
+                # cached under the textbook's key - the next run tries the book again
+                if index == 0:
+                    study_material, label = result
+                    self.cache.put("study_material", {"study_material": study_material, "source": label}, **key)
+                return result
+        return None
+
+    async def close(self):
+        for source in self.sources:
+            if hasattr(source, "close"):
+                await source.close()
+
+def default_sources(cache=None, mcp: bool = True) -> List[Any]:
+    """Textbook over MCP first, then LLM-only - behind the cache when one is given"""
+    sources = ([MCPBookSource()] if mcp else []) + [LLMSource()]
+    return [CachedSource(sources, cache)] if cache else sources
+
+# -----------------------------
+# Engine
+# -----------------------------
+class PackEngine:
+    """Builds learning packs from pluggable content sources and a pluggable model backend"""
+
+    def __init__(self, backend: Optional[ModelBackend], sources: List[Any], cache=None):
+        self.backend = backend
+        self.sources = sources
+        self.cache = cache  # Content-addressed quiz store (study material is cached by CachedSource)
+        self.quiz_generator = None
+        self.use_backend(backend)
+
+    def use_backend(self, backend: Optional[ModelBackend]):
+        """Switch the model backend (e.g. to local Ollama when the network drops)"""
+        self.backend = backend
+        self.quiz_generator = QuizGenerator(backend) if backend else None
+
+    @property
+    def model_name(self) -> str:
+        return self.backend.model if self.backend else "placeholder"
+
+    async def generate_pack(self, subject: str, chapter_number: int, student_level: str = "beginner") -> Dict[str, Any]:
+        """Generate a complete learning pack"""
+        print(f"📚 Generating learning pack for {subject} - Chapter {chapter_number}")
+        # Stages run back to back here; PackPipeline overlaps them across many packs
+        study_material, source = await self.build_study_material(subject, chapter_number, student_level)
+        quiz = await self.build_quiz(subject, chapter_number, student_level, study_material)
+        return self.assemble_pack(subject, chapter_number, student_level, study_material, source, quiz)
+
+    async def build_study_material(self, subject: str, chapter_number: int, student_level: str = "beginner") -> StudyMaterial:
+        """Stage 1: study material from the first source that has it (placeholders when none do)"""
+        for source in self.sources:
+            result = await source.fetch(self, subject, chapter_number, student_level)
+            if result:
+                return result
+        print("⚠️ Using placeholder content (no content source available)")
+        return self.placeholder_study_material(subject, chapter_number), PLACEHOLDER_SOURCE
+
+    async def build_quiz(self, subject: str, chapter_number: int, student_level: str,
+                         study_material: Dict[str, Any]) -> Dict[str, Any]:
+        """Stage 2: assessment quiz (cached by the study material it is based on)"""
+        if not self.quiz_generator:
+            return self.placeholder_quiz(subject, chapter_number)
+        quiz_key = self.cache_key(subject, chapter_number, student_level, hash_json(study_material),
+                                  QUIZ_PROMPT_VERSION, self.quiz_generator.model)
+        if self.cache:
+            quiz = self.cache.get("quiz", **quiz_key)
+            if quiz:
+                print("✅ Using cached quiz")
+                return quiz
+        # Schema-constrained output; invalid questions are repaired or regenerated individually
+        quiz = await self.quiz_generator.generate(subject, chapter_number, study_material)
+        if not quiz:
+            return self.placeholder_quiz(subject, chapter_number)
+        if self.cache:
+            self.cache.put("quiz", quiz, **quiz_key)
+        return quiz
+
+    def assemble_pack(self, subject: str, chapter_number: int, student_level: str, study_material: Dict[str, Any],
+                      source: str, quiz: Dict[str, Any]) -> Dict[str, Any]:
+        """Stage 3: the learning pack structure"""
+        return {
+            "pack_info": {
+                "pack_id": f"{subject.lower()}_ch{chapter_number:03d}",
+                "subject": subject,
+                "chapter_number": chapter_number,
+                "title": study_material.get("title", f"{subject} - Chapter {chapter_number}"),
+                "created_date": datetime.now().isoformat(),
+                "expires_date": (datetime.now() + timedelta(days=1)).isoformat(),
+                "student_level": student_level,
+                "status": "ready",
+                "source": source,
+                "quiz_source": PLACEHOLDER_SOURCE if quiz == self.placeholder_quiz(subject, chapter_number) else GENERATED_SOURCE
+            },
+            "study_material": study_material,
+            "assessment": quiz,
+            "progress": {
+                "completed": False,
+                "score": None,
+                "time_spent": 0,
+                "last_accessed": None
+            }
+        }
+
+    def cache_key(self, subject: str, chapter: int, level: str, source_hash: str, prompt_version: str,
+                  model: str) -> Dict[str, Any]:
+        return {"subject": subject, "chapter": chapter, "level": level, "source_hash": source_hash,
+                "prompt_version": prompt_version, "model": model}
+
+    def placeholder_study_material(self, subject: str, chapter_number: int) -> Dict[str, Any]:
+        return {
+            "title": f"{subject} - Chapter {chapter_number}",
+            "overview": f"This chapter covers fundamental concepts in {subject}.",
+            "key_concepts": ["Concept 1", "Concept 2", "Concept 3"],
+            "detailed_content": f"Detailed study material for {subject} Chapter {chapter_number}...",
+            "examples": ["Example 1", "Example 2"],
+            "summary": f"Summary of {subject} Chapter {chapter_number} concepts."
+        }
+
+    def placeholder_quiz(self, subject: str, chapter_number: int) -> Dict[str, Any]:
+        return {
+            "quiz_title": f"{subject} Chapter {chapter_number} Assessment",
+            "questions": [
+                {
+                    "id": 1,
+                    "question": f"What is the main concept in {subject} Chapter {chapter_number}?",
+                    "options": ["Option A", "Option B", "Option C", "Option D"],
+                    "correct_answer": 0,
+                    "explanation": "This is the correct answer because..."
+                }
+            ],
+            "total_questions": 1,
+            "passing_score": 70
+        }
+
+    def save_learning_pack(self, learning_pack: Dict[str, Any], file_path: str = None) -> str:
+        """Save learning pack to a JSON file, or a compressed container for a .tpk path"""
+        file_path = file_path or LEARNING_PACK_PATH
+        try:
+            save_pack(learning_pack, file_path)
+            print(f"✅ Learning pack saved to: {file_path}")
+            return file_path
+        except Exception as e:
+            print(f"❌ Error saving learning pack: {e}")
+            return None
+
+    def load_learning_pack(self, file_path: str) -> Dict[str, Any]:
+        """Load learning pack from a JSON file or .tpk container"""
+        try:
+            learning_pack = load_pack(file_path)
+            print(f"✅ Learning pack loaded from: {file_path}")
+            return learning_pack
+        except Exception as e:
+            print(f"❌ Error loading learning pack: {e}")
+            return None
+
+    async def close(self):
+        """Release source connections (call once, when done generating packs)"""
+        for source in self.sources:
+            if hasattr(source, "close"):
+                await source.close()
+
+async def main():
+    """Generate one pack with the configured backend"""
+    from pack_cache import pack_cache
+    engine = PackEngine(get_model_backend(), default_sources(pack_cache), cache=pack_cache)
+    try:
+        learning_pack = await engine.generate_pack("Computer Science", 1, "beginner")
+    finally:
+        await engine.close()
+    print(f"📚 Source: {learning_pack['pack_info']['source']}, quiz: {learning_pack['pack_info']['quiz_source']}, "
+          f"quiz questions: {learning_pack['assessment']['total_questions']}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Learning Pack Container Format (.tpk)
+Compressed, versioned learning packs for low-end devices and slow links. Each
+top-level section (study_material, assessment, progress, ...) is compact JSON
+compressed on its own; a small uncompressed header carries pack_info and an
+index of section offsets, so opening a pack reads a few hundred bytes and a
+section is only read and decompressed when it is first used.
+
+Layout:
+    b"TPK" | version u8 | header length u32 LE | header JSON | section blobs...
+
+On the device, progress is saved to a small sidecar file next to the container
+(math_ch001.progress.json) instead of rewriting and recompressing the pack;
+load_pack() reads it back over the container's progress section.
+
+Compression is zstd when the optional zstandard package is installed
+(pip install zstandard), gzip otherwise; the codec is recorded per pack.
+
+Usage:
+    python pack_format.py convert learning_pack.json [more.json ...] [--codec gzip]
+    python pack_format.py info learning_pack.tpk
+"""
+
+import argparse
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+import struct
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator
+
+MAGIC = b"TPK"
+FORMAT_VERSION = 1
+PACK_EXTENSION = ".tpk"
+PREAMBLE = struct.Struct("<3sBI")  # magic, version, header length
+PROGRESS_SUFFIX = ".progress.json"  # Device-side progress sidecar
+
+# zstd compresses JSON better and decompresses faster; it is optional
+ZSTD_AVAILABLE = importlib.util.find_spec("zstandard") is not None
+DEFAULT_CODEC = os.getenv("PACK_CODEC", "zstd" if ZSTD_AVAILABLE else "gzip")
+ZSTD_LEVEL = int(os.getenv("PACK_ZSTD_LEVEL", "19"))  # Packs are written once, read on slow devices
+GZIP_LEVEL = 9
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unknown pack codec: {codec}")
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unknown pack codec: {codec}")
+
+def encode_pack(pack: Dict[str, Any], codec: str = None) -> bytes:
+    """Serialize a pack dict into the container format"""
+    codec = codec or DEFAULT_CODEC
+    sections, blobs, offset = {}, [], 0
+    for name, value in pack.items():
+        if name == "pack_info":
+            continue  # Lives in the header - listing packs never decompresses anything
+        raw = json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        blob = compress(raw, codec)
+        stored = len(blob) >= len(raw)  # Tiny sections (progress) grow when compressed - keep them raw
+        if stored:
+            blob = raw
+        sections[name] = {"offset": offset, "length": len(blob), "raw_length": len(raw), "stored": stored,
+                          "sha256": hashlib.sha256(raw).hexdigest()}
+        blobs.append(blob)
+        offset += len(blob)
+    header = json.dumps({"codec": codec, "pack_info": pack.get("pack_info", {}), "sections": sections},
+                        ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)) + header + b"".join(blobs)
+
+def write_pack(pack: Dict[str, Any], path: str, codec: str = None) -> str:
+    """Write a pack container atomically; returns the path"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(encode_pack(pack, codec))
+    os.replace(tmp_path, path)
+    return path
+
+def is_pack_container(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+class PackReader:
+    """Reads a container's header on open and each section on first access"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a learning pack container")
+            if version > FORMAT_VERSION:
+                raise ValueError(f"{path} uses pack format v{version}; this reader supports up to v{FORMAT_VERSION}")
+            header = json.loads(f.read(header_length).decode("utf-8"))
+        self.version = version
+        self.codec = header["codec"]
+        self.pack_info = header["pack_info"]
+        self.index = header["sections"]
+        self.data_offset = PREAMBLE.size + header_length
+
+    def section(self, name: str) -> Any:
+        """Decompress and parse one section (verified against its recorded hash)"""
+        entry = self.index[name]
+        with open(self.path, "rb") as f:
+            f.seek(self.data_offset + entry["offset"])
+            blob = f.read(entry["length"])
+        raw = blob if entry.get("stored") else decompress(blob, self.codec)
+        if hashlib.sha256(raw).hexdigest() != entry["sha256"]:
+            raise ValueError(f"Section {name} of {self.path} is corrupt")
+        return json.loads(raw.decode("utf-8"))
+
+class LazyPack(MutableMapping):
+    """Dict-like view of a container: sections load on first access and stay loaded"""
+
+    def __init__(self, reader: PackReader):
+        self.reader = reader
+        self._loaded: Dict[str, Any] = {"pack_info": reader.pack_info}
+
+    def __getitem__(self, name: str) -> Any:
+        if name not in self._loaded:
+            if name not in self.reader.index:
+                raise KeyError(name)
+            self._loaded[name] = self.reader.section(name)
+        return self._loaded[name]
+
+    def __setitem__(self, name: str, value: Any):
+        self._loaded[name] = value
+
+    def __delitem__(self, name: str):
+        raise TypeError("Sections can't be removed from a learning pack")
+
+    def __iter__(self) -> Iterator[str]:
+        yield "pack_info"
+        yield from (name for name in self.reader.index if name != "pack_info")
+        yield from (name for name in self._loaded if name != "pack_info" and name not in self.reader.index)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @property
+    def loaded_sections(self) -> list:
+        return list(self._loaded)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Every section, fully loaded"""
+        return {name: self[name] for name in self}
+
+def progress_path(path: str) -> str:
+    return os.path.splitext(path)[0] + PROGRESS_SUFFIX
+
+def load_pack(path: str):
+    """LazyPack for a container (with its progress sidecar, if any), plain dict for a legacy JSON pack"""
+    if is_pack_container(path):
+        pack = LazyPack(PackReader(path))
+        sidecar = progress_path(path)
+        if os.path.exists(sidecar):
+            with open(sidecar, encoding="utf-8") as f:
+                pack["progress"] = json.load(f)
+        return pack
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_progress(pack, path: str) -> str:
+    """Save only the progress section beside a container - nothing is decompressed or recompressed"""
+    sidecar = progress_path(path)
+    tmp_path = f"{sidecar}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(pack["progress"], f, ensure_ascii=False)
+    os.replace(tmp_path, sidecar)
+    return sidecar
+
+def save_pack(pack, path: str, codec: str = None) -> str:
+    """Write a pack (dict or LazyPack) as a container, or as JSON for a .json path"""
+    data = pack.to_dict() if isinstance(pack, LazyPack) else dict(pack)
+    if path.endswith(".json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return path
+    return write_pack(data, path, codec)
+
+def convert(json_path: str, output_path: str = None, codec: str = None) -> str:
+    """Convert a legacy JSON pack to a container next to it"""
+    output_path = output_path or os.path.splitext(json_path)[0] + PACK_EXTENSION
+    with open(json_path, encoding="utf-8") as f:
+        pack = json.load(f)
+    return write_pack(pack, output_path, codec)
+
+def main():
+    parser = argparse.ArgumentParser(description="Learning pack container tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_cmd = commands.add_parser("convert", help="Convert JSON packs to .tpk containers")
+    convert_cmd.add_argument("paths", nargs="+")
+    convert_cmd.add_argument("--codec", choices=["zstd", "gzip"], default=DEFAULT_CODEC)
+    info_cmd = commands.add_parser("info", help="Show a container's header")
+    info_cmd.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        for path in args.paths:
+            output_path = convert(path, codec=args.codec)
+            before, after = os.path.getsize(path), os.path.getsize(output_path)
+            print(f"📦 {path} -> {output_path}: {before:,} -> {after:,} bytes ({after / before:.0%})")
+    else:
+        reader = PackReader(args.path)
+        print(f"📦 {args.path}: format v{reader.version}, codec {reader.codec}")
+        print(f"📖 {reader.pack_info.get('title')} ({reader.pack_info.get('subject')}, chapter {reader.pack_info.get('chapter_number')})")
+        for name, entry in reader.index.items():
+            print(f"  {name:<16} {entry['length']:>8,} bytes ({entry['raw_length']:,} uncompressed)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Learning Pack Pipeline
+Runs pack generation as stages connected by bounded queues:
+
+    jobs -> [content] -> [quiz] -> [assemble] -> on_pack
+
+Each stage has its own worker count, so content fetch for the next packs
+overlaps quiz generation for earlier ones, and bounded queues keep a fast
+stage from running far ahead of a slow one. Per-stage metrics show where the
+time goes.
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+PIPELINE_CONTENT_WORKERS = int(os.getenv("PIPELINE_CONTENT_WORKERS", "4"))
+PIPELINE_QUIZ_WORKERS = int(os.getenv("PIPELINE_QUIZ_WORKERS", "4"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "8"))
+
+PackKey = Tuple[str, int, str]  # (subject, chapter, level)
+
+@dataclass
+class StageMetrics:
+    """Counters for one pipeline stage"""
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    queue_wait_seconds: float = 0.0
+    max_queue_depth: int = 0
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        done = self.processed + self.failed
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_seconds": round(self.busy_seconds / done, 3) if done else 0.0,
+            "avg_queue_wait_seconds": round(self.queue_wait_seconds / done, 3) if done else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+            # Share of worker time spent busy - the stage closest to 100% is the bottleneck
+            "utilization": round(self.busy_seconds / (elapsed * self.workers), 2) if elapsed else 0.0,
+        }
+
+@dataclass
+class PackItem:
+    """One pack moving through the pipeline"""
+    key: PackKey
+    started: float = field(default_factory=time.perf_counter)
+    enqueued: float = field(default_factory=time.perf_counter)
+    study_material: Dict[str, Any] = None
+    source: str = None
+    quiz: Dict[str, Any] = None
+
+class PackPipeline:
+    """Staged, bounded-queue pack generation on top of PackEngine's stage methods"""
+
+    def __init__(self, generator, content_workers: int = PIPELINE_CONTENT_WORKERS,
+                 quiz_workers: int = PIPELINE_QUIZ_WORKERS, queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.generator = generator
+        self.queue_size = queue_size
+        self.stages = {
+            "content": StageMetrics(content_workers),
+            "quiz": StageMetrics(quiz_workers),
+            "assemble": StageMetrics(1),
+        }
+        self.elapsed_seconds = 0.0
+
+    async def run(self, jobs: Iterable[PackKey],
+                  on_pack: Callable[[PackKey, Dict[str, Any], float], Awaitable[None]],
+                  on_error: Callable[[PackKey, Exception], Awaitable[None]] = None):
+        """Generate a pack per job; on_pack(key, pack, seconds) receives each finished pack"""
+        started = time.perf_counter()
+        queues = {name: asyncio.Queue(self.queue_size) for name in self.stages}
+
+        async def content_stage(item: PackItem):
+            subject, chapter, level = item.key
+            item.study_material, item.source = await self.generator.build_study_material(subject, chapter, level)
+            return "quiz"
+
+        async def quiz_stage(item: PackItem):
+            subject, chapter, level = item.key
+            item.quiz = await self.generator.build_quiz(subject, chapter, level, item.study_material)
+            return "assemble"
+
+        async def assemble_stage(item: PackItem):
+            subject, chapter, level = item.key
+            pack = self.generator.assemble_pack(subject, chapter, level, item.study_material, item.source, item.quiz)
+            await on_pack(item.key, pack, time.perf_counter() - item.started)
+            return None
+
+        workers = []
+        for name, stage in (("content", content_stage), ("quiz", quiz_stage), ("assemble", assemble_stage)):
+            for _ in range(self.stages[name].workers):
+                workers.append(asyncio.create_task(self._worker(name, queues, stage, on_error)))
+
+        try:
+            for key in jobs:
+                await self._put(queues, "content", PackItem(key))  # Blocks while the pipeline is full
+            # Drain stage by stage: a stage is finished once everything before it is
+            for queue in queues.values():
+                await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.elapsed_seconds = time.perf_counter() - started
+
+    def metrics(self) -> Dict[str, Any]:
+        return {name: stage.summary(self.elapsed_seconds) for name, stage in self.stages.items()}
+
+    async def _worker(self, name: str, queues: Dict[str, asyncio.Queue], stage, on_error):
+        metrics = self.stages[name]
+        queue = queues[name]
+        while True:
+            item = await queue.get()
+            metrics.queue_wait_seconds += time.perf_counter() - item.enqueued
+            stage_started = time.perf_counter()
+            try:
+                next_stage = await stage(item)
+                metrics.processed += 1
+            except Exception as e:
+                metrics.failed += 1
+                next_stage = None
+                if on_error:
+                    await on_error(item.key, e)
+                else:
+                    print(f"❌ Pipeline {name} stage failed for {item.key}: {e}")
+            finally:
+                metrics.busy_seconds += time.perf_counter() - stage_started
+            try:
+                if next_stage is not None:
+                    await self._put(queues, next_stage, item)
+            finally:
+                queue.task_done()
+
+    async def _put(self, queues: Dict[str, asyncio.Queue], name: str, item: PackItem):
+        item.enqueued = time.perf_counter()
+        await queues[name].put(item)
+        metrics = self.stages[name]
+        metrics.max_queue_depth = max(metrics.max_queue_depth, queues[name].qsize())
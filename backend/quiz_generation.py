@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Quiz Generation
+Multiple-choice quizzes through schema-constrained structured output. Every
+question is validated and, where possible, repaired locally (letter answers,
+"A) " option prefixes, answer given as option text). Only the questions that
+still fail are regenerated, so one bad question never throws away the rest.
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# gpt-3.5-turbo has no json_schema support; structured-output models (and every Ollama and
+# Gemini model - the backend decides, see pack_engine.ModelBackend) get the strict schema
+QUIZ_MODEL = os.getenv("QUIZ_MODEL", "gpt-4o-mini")
+QUIZ_QUESTIONS = int(os.getenv("QUIZ_QUESTIONS", "5"))
+QUIZ_RETRY_ROUNDS = int(os.getenv("QUIZ_RETRY_ROUNDS", "2"))
+QUIZ_CONTENT_CHARS = int(os.getenv("QUIZ_CONTENT_CHARS", "1500"))
+QUIZ_OPTIONS = 4
+QUIZ_PASSING_SCORE = 70
+
+STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+
+QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "options": {"type": "array", "items": {"type": "string"}},
+        "correct_answer": {"type": "integer"},
+        "explanation": {"type": "string"},
+    },
+    "required": ["question", "options", "correct_answer", "explanation"],
+    "additionalProperties": False,
+}
+QUIZ_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "quiz_title": {"type": "string"},
+        "questions": {"type": "array", "items": QUESTION_SCHEMA},
+    },
+    "required": ["quiz_title", "questions"],
+    "additionalProperties": False,
+}
+
+OPTION_PREFIX = re.compile(r"^\s*(?:\(?[A-Da-d1-4][\).:]|[A-Da-d]\s*-)\s+")
+ANSWER_LETTER = re.compile(r"^\s*(?:option\s*)?\(?([A-Da-d])\)?\s*$", re.IGNORECASE)
+
+def supports_json_schema(model: str) -> bool:
+    return model.startswith(STRUCTURED_OUTPUT_MODELS)
+
+def response_format(model: str, json_schema: bool = None) -> Dict[str, Any]:
+    """Strict json_schema where the backend supports it (by model when not told), JSON mode otherwise"""
+    if json_schema if json_schema is not None else supports_json_schema(model):
+        return {"type": "json_schema", "json_schema": {"name": "quiz", "strict": True, "schema": QUIZ_SCHEMA}}
+    return {"type": "json_object"}
+
+def repair_question(raw: Any) -> Optional[Dict[str, Any]]:
+    """A valid question (repairing what can be repaired), or None when it can't be used"""
+    if not isinstance(raw, dict):
+        return None
+    question = str(raw.get("question") or "").strip()
+    options = raw.get("options")
+    if not question or not isinstance(options, list):
+        return None
+    options = [OPTION_PREFIX.sub("", str(option)).strip() for option in options]
+    if len(options) != QUIZ_OPTIONS or not all(options) or len({o.lower() for o in options}) != QUIZ_OPTIONS:
+        return None
+
+    answer = raw.get("correct_answer")
+    if isinstance(answer, str):
+        letter = ANSWER_LETTER.match(answer)
+        if letter:
+            answer = "ABCD".index(letter.group(1).upper())
+        elif answer.strip().isdigit():
+            answer = int(answer.strip())
+        else:
+            # Answer given as the option text itself
+            stripped = OPTION_PREFIX.sub("", answer).strip().lower()
+            answer = next((i for i, option in enumerate(options) if option.lower() == stripped), None)
+    if isinstance(answer, bool) or not isinstance(answer, int) or not 0 <= answer < QUIZ_OPTIONS:
+        return None
+
+    return {
+        "question": question,
+        "options": options,
+        "correct_answer": answer,
+        "explanation": str(raw.get("explanation") or "").strip(),
+    }
+
+def validate_questions(data: Any) -> Tuple[List[Dict[str, Any]], int]:
+    """(valid questions, number rejected) from a parsed model response"""
+    raw_questions = data.get("questions") if isinstance(data, dict) else None
+    if not isinstance(raw_questions, list):
+        return [], 0
+    valid = [question for question in map(repair_question, raw_questions) if question]
+    return valid, len(raw_questions) - len(valid)
+
+def material_brief(study_material: Dict[str, Any], chars: int = QUIZ_CONTENT_CHARS) -> str:
+    return (
+        f"Title: {study_material.get('title', 'N/A')}\n"
+        f"Key Concepts: {', '.join(study_material.get('key_concepts', []))}\n"
+        f"Content: {study_material.get('detailed_content', '')[:chars]}"
+    )
+
+class QuizGenerator:
+    """Structured-output quiz generation with per-question validation, repair and targeted retry"""
+
+    def __init__(self, backend, model: str = None, questions: int = QUIZ_QUESTIONS,
+                 retry_rounds: int = QUIZ_RETRY_ROUNDS):
+        self.backend = backend  # pack_engine.ModelBackend - owns the client and the scheduler slot
+        self.model = model or backend.quiz_model
+        self.questions = questions
+        self.retry_rounds = retry_rounds
+        self.stats = {"quizzes": 0, "first_pass": 0, "repaired": 0, "retried_questions": 0, "incomplete": 0}
+
+    async def generate(self, subject: str, chapter_number: int, study_material: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Quiz dict, or None when not a single valid question could be generated"""
+        self.stats["quizzes"] += 1
+        brief = material_brief(study_material)
+        title = f"{subject} Chapter {chapter_number} Assessment"
+        questions: List[Dict[str, Any]] = []
+
+        for attempt in range(1 + self.retry_rounds):
+            missing = self.questions - len(questions)
+            if missing <= 0:
+                break
+            if attempt:
+                self.stats["retried_questions"] += missing
+            data = await self._request(subject, chapter_number, brief, missing, [q["question"] for q in questions])
+            valid, rejected = validate_questions(data)
+            if attempt == 0:
+                title = (data or {}).get("quiz_title") or title
+                repaired = bool(data) and self._needed_repair(data)
+                if rejected == 0 and len(valid) >= self.questions and not repaired:
+                    self.stats["first_pass"] += 1
+            known = {q["question"].lower() for q in questions}
+            questions.extend(q for q in valid if q["question"].lower() not in known)
+
+        questions = questions[:self.questions]
+        if len(questions) < self.questions:
+            self.stats["incomplete"] += 1
+        if not questions:
+            return None
+        return {
+            "quiz_title": title,
+            "questions": [{"id": number, **question} for number, question in enumerate(questions, 1)],
+            "total_questions": len(questions),
+            "passing_score": QUIZ_PASSING_SCORE,
+        }
+
+    async def _request(self, subject: str, chapter_number: int, brief: str, count: int,
+                       existing: List[str]) -> Optional[Dict[str, Any]]:
+        avoid = ""
+        if existing:
+            avoid = "Do not repeat these questions:\n" + "\n".join(f"- {q}" for q in existing)
+        prompt = f"""
+        Create {count} multiple choice question(s) for {subject} Chapter {chapter_number}.
+
+        Based on this study material:
+        {brief}
+
+        Each question tests understanding of a key concept, has exactly {QUIZ_OPTIONS} distinct options
+        (plain text, no "A)" prefixes), "correct_answer" is the 0-based index of the correct option,
+        and "explanation" says why it is correct.
+        {avoid}
+
+        Return JSON: {{"quiz_title": "...", "questions": [{{"question": "...", "options": ["...", "...", "...", "..."], "correct_answer": 0, "explanation": "..."}}]}}
+        """
+        try:
+            schema = self.backend.supports_json_schema(self.model)  # Ollama and Gemini take it for any model
+            content = await self.backend.complete(prompt, max_tokens=250 * count + 100, model=self.model,
+                                                  response_format=response_format(self.model, schema))
+            return json.loads(content)
+        except json.JSONDecodeError:
+            print("⚠️ Quiz response was not valid JSON (truncated?) - retrying missing questions")
+            return None
+        except Exception as e:
+            print(f"⚠️ Error generating quiz questions: {e}")
+            return None
+
+    def _needed_repair(self, data: Dict[str, Any]) -> bool:
+        """True when validation changed any question (counted as a repair, not a first-pass success)"""
+        repaired = any(repair_question(raw) != {k: raw.get(k) for k in QUESTION_SCHEMA["required"]}
+                       for raw in data.get("questions", []) if isinstance(raw, dict))
+        if repaired:
+            self.stats["repaired"] += 1
+        return repaired
@@ -0,0 +1,59 @@
+from agent_pool import HybridAgentPool
+from conversation_memory import ConversationMemory
+
+class FakeAgent:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.memory = ConversationMemory()
+
+def make_pool(**kwargs):
+    return HybridAgentPool(FakeAgent, **kwargs)
+
+def test_get_reuses_agent_per_session():
+    pool = make_pool()
+    assert pool.get("a") is pool.get("a")
+    assert pool.get("a") is not pool.get("b")
+    assert pool.stats()["created"] == 2
+
+def test_least_recently_used_session_is_evicted(capsys):
+    pool = make_pool(max_sessions=2)
+    pool.get("a")
+    pool.get("b")
+    pool.get("a")  # b is now least recently used
+    pool.get("c")
+    assert "a" in pool and "c" in pool and "b" not in pool
+    assert pool.stats()["evicted"] == 1
+    assert "evicting session b" in capsys.readouterr().out
+
+def test_release_is_not_counted_as_eviction():
+    pool = make_pool()
+    pool.get("a")
+    pool.release("a")
+    pool.release("missing")
+    stats = pool.stats()
+    assert stats["released"] == 1 and stats["evicted"] == 0 and stats["expired"] == 0
+    assert "a" not in pool
+
+def test_idle_sessions_expire():
+    pool = make_pool(idle_ttl_seconds=10)
+    pool.get("a")
+    pool.evict_idle(now=pool._agents["a"][1] + 11)
+    assert "a" not in pool
+    assert pool.stats()["expired"] == 1
+
+def test_evicted_session_summary_is_restored():
+    pool = make_pool(max_sessions=1)
+    agent = pool.get("a")
+    agent.memory.add("user", "My name is Sara. I am learning fractions.")
+    pool.get("b")  # Evicts a
+    assert agent.memory.summary == "" and len(agent.memory) == 0
+    returning = pool.get("a")
+    assert returning is not agent
+    assert "My name is Sara" in returning.memory.summary
+
+def test_released_session_starts_fresh():
+    pool = make_pool()
+    agent = pool.get("a")
+    agent.memory.add("user", "My name is Sara.")
+    pool.release("a")
+    assert pool.get("a").memory.summary == ""
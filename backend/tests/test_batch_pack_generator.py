@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+
+from batch_pack_generator import BatchPackGenerator, BatchReport, load_manifest, pack_filename
+
+class FakeGenerator:
+    """PackEngine stage methods without any model calls"""
+
+    def __init__(self, version=1, fail_subject=None):
+        self.version = version
+        self.fail_subject = fail_subject
+        self.calls = []
+
+    async def build_study_material(self, subject, chapter, level):
+        self.calls.append((subject, chapter, level))
+        if subject == self.fail_subject:
+            raise RuntimeError("content source down")
+        return {"chapter_content": f"{subject} {chapter} {level}"}, "book"
+
+    async def build_quiz(self, subject, chapter, level, study_material):
+        return {"questions": [{"question": f"v{self.version}", "answer": "A"}]}
+
+    def assemble_pack(self, subject, chapter, level, study_material, source, quiz):
+        return {"pack_info": {"subject": subject, "chapter": chapter, "level": level, "source": source},
+                "study_material": study_material, "assessment": quiz, "progress": {}}
+
+ENTRIES = [
+    {"student_id": "s1", "subject": "Math", "chapter": 1, "level": "beginner"},
+    {"student_id": "s2", "subject": "Math", "chapter": 1, "level": "beginner"},
+    {"student_id": "s3", "subject": "Science", "chapter": 2, "level": "advanced"},
+]
+
+def run_batch(tmp_path, generator, **kwargs):
+    batch = BatchPackGenerator(generator, concurrency=2, quiz_workers=2, output_dir=str(tmp_path), **kwargs)
+    return asyncio.run(batch.run(ENTRIES))
+
+def test_load_manifest_reads_csv_and_json(tmp_path):
+    csv_path = tmp_path / "manifest.csv"
+    csv_path.write_text("student_id,subject,chapter,level\n s1 ,Math,3,Advanced\ns2,Math,4,\n", encoding="utf-8")
+    json_path = tmp_path / "manifest.json"
+    json_path.write_text(json.dumps([{"student_id": 7, "subject": "Math", "chapter": "3"}]), encoding="utf-8")
+
+    assert load_manifest(str(csv_path)) == [
+        {"student_id": "s1", "subject": "Math", "chapter": 3, "level": "advanced"},
+        {"student_id": "s2", "subject": "Math", "chapter": 4, "level": "beginner"},
+    ]
+    assert load_manifest(str(json_path)) == [{"student_id": "7", "subject": "Math", "chapter": 3, "level": "beginner"}]
+
+def test_pack_filename():
+    assert pack_filename(("Computer Science", 7, "beginner")) == "computer_science_ch007_beginner.json"
+    assert pack_filename(("Math", 12, "advanced"), "tpk") == "math_ch012_advanced.tpk"
+
+def test_report_summary():
+    report = BatchReport(students=10, unique_packs=4, generated=4, elapsed_seconds=30.0,
+                         pack_seconds=[4.0, 1.0, 3.0, 2.0])
+    summary = report.summary()
+    assert summary["deduplicated"] == 6
+    assert summary["packs_per_minute"] == 8.0
+    assert summary["p50_pack_seconds"] == 2.5
+    assert summary["p95_pack_seconds"] == 3.0
+    assert BatchReport().summary()["p50_pack_seconds"] == 0.0
+
+def test_identical_work_is_generated_once_and_shared(tmp_path):
+    generator = FakeGenerator()
+    report = run_batch(tmp_path, generator)
+
+    assert sorted(generator.calls) == [("Math", 1, "beginner"), ("Science", 2, "advanced")]
+    assert (report.students, report.unique_packs, report.generated, report.failed) == (3, 2, 2, 0)
+    assignments = json.loads((tmp_path / "assignments.json").read_text(encoding="utf-8"))
+    math_pack = os.path.join(str(tmp_path), "math_ch001_beginner.json")
+    assert assignments["s1"] == assignments["s2"] == math_pack
+    assert json.loads(open(math_pack, encoding="utf-8").read())["pack_info"]["subject"] == "Math"
+
+def test_clean_run_clears_the_journal_so_the_next_run_regenerates(tmp_path):
+    run_batch(tmp_path, FakeGenerator())
+    assert not (tmp_path / "progress.jsonl").exists()
+    generator = FakeGenerator()
+    report = run_batch(tmp_path, generator)
+    assert len(generator.calls) == 2
+    assert (report.resumed, report.generated) == (0, 2)
+
+def test_failed_run_resumes_only_what_is_left(tmp_path):
+    run_batch(tmp_path, FakeGenerator(fail_subject="Science"))
+    assert (tmp_path / "progress.jsonl").exists()
+    generator = FakeGenerator()
+    report = run_batch(tmp_path, generator)
+    assert generator.calls == [("Science", 2, "advanced")]
+    assert (report.resumed, report.generated) == (1, 1)
+    assert not (tmp_path / "progress.jsonl").exists()
+
+def test_resume_regenerates_journaled_pack_whose_file_is_gone(tmp_path):
+    run_batch(tmp_path, FakeGenerator(fail_subject="Science"))
+    os.remove(tmp_path / "math_ch001_beginner.json")
+    with open(tmp_path / "progress.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"subject": "Math", "chap')  # Partial line from an interrupted run
+    generator = FakeGenerator()
+    report = run_batch(tmp_path, generator)
+    assert sorted(generator.calls) == [("Math", 1, "beginner"), ("Science", 2, "advanced")]
+    assert (report.resumed, report.generated) == (0, 2)
+
+def test_refresh_writes_deltas_for_changed_packs(tmp_path):
+    run_batch(tmp_path, FakeGenerator(version=1))
+    report = run_batch(tmp_path, FakeGenerator(version=2))  # The next nightly run
+    assert report.deltas == 2
+    assert len(os.listdir(tmp_path / "deltas")) == 2
+
+    report = run_batch(tmp_path, FakeGenerator(version=2))
+    assert report.deltas == 0  # Nothing changed - no delta to download
+
+def test_failed_pack_is_counted_and_left_unassigned(tmp_path):
+    report = run_batch(tmp_path, FakeGenerator(fail_subject="Science"), pack_format="tpk")
+    assert (report.generated, report.failed) == (1, 1)
+    assignments = json.loads((tmp_path / "assignments.json").read_text(encoding="utf-8"))
+    assert sorted(assignments) == ["s1", "s2"]
+    assert assignments["s1"].endswith(".tpk")
@@ -0,0 +1,88 @@
+import asyncio
+
+from conversation_memory import ConversationMemory, estimate_tokens
+
+def test_recent_turns_stay_within_budget():
+    memory = ConversationMemory(token_budget=40, min_recent_messages=2)
+    for i in range(10):
+        memory.add("user", f"question number {i} " * 5)
+    assert memory.recent_tokens <= 40 or len(memory) == 2
+    assert memory.recent_tokens == sum(estimate_tokens(m["content"]) for m in memory.recent)
+
+def test_min_recent_messages_are_never_evicted():
+    memory = ConversationMemory(token_budget=1, min_recent_messages=2)
+    memory.add("user", "a long question " * 20)
+    memory.add("assistant", "a long answer " * 20)
+    assert len(memory) == 2
+    assert memory.summary == ""
+
+def test_evicted_turns_fold_extractively_without_event_loop():
+    memory = ConversationMemory(token_budget=20, min_recent_messages=1)
+    memory.add("user", "My name is Ali. I like fractions.")
+    memory.add("assistant", "Nice to meet you Ali. Let's start with halves.")
+    memory.add("user", "What is one half plus one quarter?")
+    assert "user: My name is Ali" in memory.summary
+    assert memory.messages()[0]["content"].startswith("Summary of the earlier conversation:")
+
+def test_summarizer_folds_in_background():
+    calls = []
+
+    async def summarizer(previous, batch):
+        calls.append([m["content"] for m in batch])
+        return f"{previous} +{len(batch)}".strip()
+
+    async def run():
+        memory = ConversationMemory(token_budget=10, min_recent_messages=1, summarizer=summarizer)
+        memory.add("user", "first turn text here")
+        memory.add("assistant", "second turn text here")
+        await memory.flush()
+        return memory
+
+    memory = asyncio.run(run())
+    assert calls == [["first turn text here"]]
+    assert memory.summary == "+1"
+
+def test_failing_summarizer_falls_back_to_extractive():
+    async def summarizer(previous, batch):
+        raise RuntimeError("model offline")
+
+    async def run():
+        memory = ConversationMemory(token_budget=10, min_recent_messages=1, summarizer=summarizer)
+        memory.add("user", "Photosynthesis makes sugar. It needs light.")
+        memory.add("assistant", "Correct.")
+        await memory.flush()
+        return memory
+
+    assert asyncio.run(run()).summary == "user: Photosynthesis makes sugar"
+
+def test_summary_keeps_most_recent_part_when_over_budget():
+    memory = ConversationMemory(token_budget=5, summary_token_budget=10, min_recent_messages=1)
+    for i in range(6):
+        memory.add("user", f"turn {i} " + "x" * 30)
+    assert len(memory.summary) <= 40
+    assert memory.summary.endswith("x" * 10)
+
+def test_replace_last_reply_swaps_assistant_message():
+    memory = ConversationMemory()
+    memory.add("user", "hi")
+    memory.add("assistant", "bad reply")
+    memory.replace_last_reply("safe reply")
+    assert [m["content"] for m in memory.recent] == ["hi", "safe reply"]
+    assert memory.recent_tokens == estimate_tokens("hi") + estimate_tokens("safe reply")
+
+def test_clear_cancels_pending_summary():
+    async def summarizer(previous, batch):
+        await asyncio.sleep(10)
+
+    async def run():
+        memory = ConversationMemory(token_budget=5, min_recent_messages=1, summarizer=summarizer)
+        memory.add("user", "one two three four five")
+        memory.add("assistant", "six seven eight nine ten")
+        task = memory._summary_task
+        memory.clear()
+        await asyncio.sleep(0)
+        return memory, task
+
+    memory, task = asyncio.run(run())
+    assert task.cancelled()
+    assert len(memory) == 0 and memory.summary == ""
@@ -0,0 +1,12 @@
+from conversation_memory import HISTORY_TOKEN_BUDGET, SUMMARY_TOKEN_BUDGET, estimate_tokens
+from ollama_profiles import OLLAMA_LOAD_OPTIONS
+from PROMPTS.hybrid_persona_prompts import HYBRID_PERSONA_PROMPTS
+
+def test_personas_are_short_enough_for_local_turns():
+    room = OLLAMA_LOAD_OPTIONS["num_ctx"] - HISTORY_TOKEN_BUDGET - SUMMARY_TOKEN_BUDGET - 256
+    for prompt in HYBRID_PERSONA_PROMPTS.values():
+        assert estimate_tokens(prompt) < min(room, 150)
+
+def test_personas_carry_no_tool_or_output_contract_instructions():
+    for prompt in HYBRID_PERSONA_PROMPTS.values():
+        assert "OUTPUT CONTRACT" not in prompt and "JSON" not in prompt and "tool" not in prompt.lower()
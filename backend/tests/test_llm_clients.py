@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("agents")
+pytest.importorskip("ollama")
+
+from llm_clients import LLMClientFactory, OPENAI_BASE_URL, GEMINI_BASE_URL
+
+def test_clients_for_one_host_share_a_pool():
+    factory = LLMClientFactory()
+    first = factory.openai_client(api_key="key-1")
+    second = factory.openai_client(api_key="key-2")
+    assert first is not second
+    assert factory.http_client(OPENAI_BASE_URL) is factory.http_client("https://api.openai.com/v1/other")
+    assert len(factory._pools) == 1
+
+def test_each_host_gets_its_own_pool():
+    factory = LLMClientFactory()
+    factory.openai_client(api_key="key")
+    factory.gemini_client(api_key="key")
+    assert set(factory._pools) == {"api.openai.com", "generativelanguage.googleapis.com"}
+
+def test_clients_and_models_are_cached():
+    factory = LLMClientFactory()
+    assert factory.openai_client(api_key="key") is factory.openai_client(api_key="key")
+    assert factory.chat_model("gpt-4o-mini", api_key="key") is factory.chat_model("gpt-4o-mini", api_key="key")
+    model = factory.chat_model("gemini-2.0-flash", api_key="key", base_url=GEMINI_BASE_URL)
+    assert model is not factory.chat_model("gpt-4o-mini", api_key="key")
+    assert factory.ollama_client() is factory.ollama_client()
+
+def test_pool_metrics_report_every_host():
+    factory = LLMClientFactory()
+    factory.openai_client(api_key="key")
+    metrics = factory.pool_metrics()["api.openai.com"]
+    assert metrics["requests"] == 0 and metrics["avg_latency_ms"] == 0.0
+
+def test_aclose_drops_every_client():
+    factory = LLMClientFactory()
+    factory.openai_client(api_key="key")
+    factory.ollama_client()
+    asyncio.run(factory.aclose())
+    assert not factory._pools and not factory._openai_clients and not factory._ollama_clients
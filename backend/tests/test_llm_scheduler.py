@@ -0,0 +1,92 @@
+import asyncio
+
+from llm_scheduler import BATCH, INTERACTIVE, LLMScheduler, TokenBucket
+
+def make_scheduler(limit=1):
+    return LLMScheduler(concurrency={"test": limit}, rate_limits_rpm={"test": 0})
+
+async def run_calls(scheduler, calls, hold=0.01):
+    """Start calls (session_id, priority) while one slot is held; return the order they ran in"""
+    order = []
+
+    async def call(session_id, priority):
+        async with scheduler.slot("test", session_id, priority=priority):
+            order.append(session_id)
+            await asyncio.sleep(hold)
+
+    async with scheduler.slot("test", "holder"):
+        tasks = [asyncio.create_task(call(*c)) for c in calls]
+        await asyncio.sleep(0)  # Let every call queue up
+    await asyncio.gather(*tasks)
+    return order
+
+def test_concurrency_cap_is_respected():
+    scheduler = make_scheduler(limit=2)
+    running, peak = 0, 0
+
+    async def call(i):
+        nonlocal running, peak
+        async with scheduler.slot("test", f"s{i}"):
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def run():
+        await asyncio.gather(*(call(i) for i in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert scheduler.metrics()["test"]["granted"] == 6
+    assert scheduler.metrics()["test"]["active"] == 0
+
+def test_sessions_are_served_round_robin():
+    scheduler = make_scheduler()
+    calls = [("busy", INTERACTIVE)] * 3 + [("quiet", INTERACTIVE)]
+    order = asyncio.run(run_calls(scheduler, calls))
+    assert order == ["busy", "quiet", "busy", "busy"]
+
+def test_interactive_calls_go_before_batch_work():
+    scheduler = make_scheduler()
+    calls = [("pack", BATCH), ("pack2", BATCH), ("student", INTERACTIVE)]
+    order = asyncio.run(run_calls(scheduler, calls))
+    assert order == ["student", "pack", "pack2"]
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    scheduler = make_scheduler()
+
+    async def run():
+        entered = []
+
+        async def call(name):
+            async with scheduler.slot("test", name):
+                entered.append(name)
+
+        async with scheduler.slot("test", "holder"):
+            cancelled = asyncio.create_task(call("cancelled"))
+            waiting = asyncio.create_task(call("waiting"))
+            await asyncio.sleep(0)
+            cancelled.cancel()
+            await asyncio.sleep(0)
+        await waiting
+        return entered
+
+    assert asyncio.run(run()) == ["waiting"]
+    metrics = scheduler.metrics()["test"]
+    assert metrics["active"] == 0 and metrics["queue_depth"] == {INTERACTIVE: 0, BATCH: 0}
+
+def test_token_bucket_waits_once_burst_is_spent():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=600, burst=2)  # 10 per second
+        waits = [await bucket.acquire() for _ in range(3)]
+        return waits
+
+    waits = asyncio.run(run())
+    assert waits[:2] == [0.0, 0.0]
+    assert 0.05 < waits[2] < 0.5
+
+def test_rate_limit_buckets_are_per_key():
+    scheduler = LLMScheduler(rate_limits_rpm={"openai": 60})
+    assert scheduler._bucket("openai", "key-a") is scheduler._bucket("openai", "key-a")
+    assert scheduler._bucket("openai", "key-a") is not scheduler._bucket("openai", "key-b")
+    assert scheduler._bucket("ollama", "key-a") is None
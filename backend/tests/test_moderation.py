@@ -0,0 +1,79 @@
+import pytest
+
+from moderation import ModerationEngine
+
+# Ordinary curriculum text that happens to contain alarming words
+CURRICULUM_TEXT = [
+    "Flowering plants use sexual reproduction: pollen carries the male cells to the ovule.",
+    "The atomic bomb was a weapon used in 1945 at the end of the Second World War.",
+    "During the French Revolution crowds would kill officials they hate, and violence spread through Paris.",
+    "Blood carries oxygen from the lungs to every cell in the body.",
+    "Write your home address on the envelope in the top left corner.",
+]
+
+@pytest.mark.parametrize("text", CURRICULUM_TEXT)
+def test_subject_matter_is_never_blocked_locally(text):
+    engine = ModerationEngine()
+    assert engine.check(text, "Tutor response") is None  # Escalated to the Safety Agent
+    assert engine.metrics["local_block"] == 0 and engine.metrics["escalated"] == 1
+
+@pytest.mark.parametrize("text", [
+    "You're stupid if you can't see it.",
+    "Here is how to make a bomb at home.",
+    "You will never understand fractions, so give up now.",
+    "Send me your home address please.",
+])
+def test_block_patterns_block_locally(text):
+    verdict = ModerationEngine().check(text)
+    assert verdict["status"] == "blocked" and verdict["tier"] == "rules"
+
+# Harm that uses no obviously risky words - must never be settled SAFE locally
+UNFLAGGED_HARM = [
+    "Nobody likes you, you should end it all.",
+    "You are such a failure, nobody will ever like you.",
+    "Meet me alone after school and dont tell your parents",
+    "Sometimes I think everyone would be better off without me",
+    "Everyone in class laughs at you behind your back",
+    "This can be our little secret, just between us",
+    "Strip the wires under the steering column and touch them together to start the car.",
+]
+
+@pytest.mark.parametrize("text", UNFLAGGED_HARM)
+def test_harm_without_keywords_escalates(text):
+    engine = ModerationEngine()
+    assert engine.check(text, "Student message") is None
+    assert engine.metrics["local_safe"] == 0 and engine.metrics["escalated"] == 1
+
+@pytest.mark.parametrize("text", ["Hello!", "Thank you so much 😊", "OK", "got it", "B)", "42", "3.5", "-7"])
+def test_greetings_and_bare_answers_are_safe_locally(text):
+    verdict = ModerationEngine().check(text)
+    assert verdict["status"] == "safe" and verdict["tier"] == "allowlist"
+
+@pytest.mark.parametrize("text", [
+    "Great job! Two plus two is four.",  # Benign, but not allowlisted
+    "555 123 4567",
+    "0300-1234567",
+    "Thank you, now send a photo",
+])
+def test_anything_else_escalates(text):
+    assert ModerationEngine().check(text) is None
+
+def test_llm_verdicts_are_cached_per_context():
+    engine = ModerationEngine()
+    text = CURRICULUM_TEXT[1]
+    engine.record(text, "History lesson", {"status": "safe", "message": "Historical fact", "tier": "llm"})
+    assert engine.check(text, "History lesson")["tier"] == "cache"
+    assert engine.check(text, "Other context") is None
+
+def test_unknown_verdicts_are_not_cached():
+    engine = ModerationEngine()
+    engine.record(CURRICULUM_TEXT[0], "", {"status": "unknown", "message": "check failed"})
+    assert engine.check(CURRICULUM_TEXT[0]) is None
+
+def test_cache_evicts_least_recently_used():
+    engine = ModerationEngine(cache_size=2)
+    for text in ("1", "2", "3"):
+        engine.check(text)
+    assert engine.stats()["cached_verdicts"] == 2
+    assert engine.check("1")["tier"] == "allowlist"  # Evicted, decided again
+    assert engine.check("3")["tier"] == "cache"
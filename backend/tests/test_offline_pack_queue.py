@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from offline_pack_queue import OfflinePackQueue, drain, in_window, seconds_until_window
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = OfflinePackQueue(db_path=str(tmp_path / "queue.db"), max_attempts=2)
+    yield queue
+    queue.close()
+
+def test_enqueue_deduplicates_waiting_jobs(queue):
+    assert queue.enqueue("Math", 1) is True
+    assert queue.enqueue("Math", 1) is False
+    assert queue.enqueue("Math", 1, "advanced") is True
+    job = queue.claim()
+    assert queue.enqueue("Math", 1) is False  # Still running
+    queue.complete(job["id"], "math.json")
+    assert queue.enqueue("Math", 1) is True  # Done - a new request is a new job
+    assert queue.stats() == {"done": 1, "pending": 2}
+
+def test_claim_takes_the_oldest_pending_job(queue):
+    queue.enqueue("Math", 1)
+    queue.enqueue("Science", 2)
+    first, second = queue.claim(), queue.claim()
+    assert (first["subject"], second["subject"]) == ("Math", "Science")
+    assert first["attempts"] == 1
+    assert queue.claim() is None
+
+def test_failed_job_is_retried_until_max_attempts(queue):
+    queue.enqueue("Math", 1)
+    job = queue.claim()
+    queue.fail(job["id"], "timeout")
+    assert queue.stats() == {"pending": 1}
+    job = queue.claim()
+    assert job["attempts"] == 2
+    queue.fail(job["id"], "timeout")
+    assert queue.stats() == {"failed": 1}
+    assert queue.claim() is None
+
+def test_running_jobs_from_a_crashed_drain_are_requeued(tmp_path):
+    path = str(tmp_path / "queue.db")
+    crashed = OfflinePackQueue(db_path=path)
+    crashed.enqueue("Math", 1)
+    crashed.claim()
+    crashed.close()
+    restarted = OfflinePackQueue(db_path=path)
+    assert restarted.stats() == {"pending": 1}
+    restarted.close()
+
+def test_window_wraps_past_midnight():
+    assert in_window("22:00-06:00", datetime(2026, 1, 1, 23, 30))
+    assert in_window("22:00-06:00", datetime(2026, 1, 1, 5, 59))
+    assert not in_window("22:00-06:00", datetime(2026, 1, 1, 6, 0))
+    assert in_window("09:00-17:00", datetime(2026, 1, 1, 12, 0))
+    assert not in_window("09:00-17:00", datetime(2026, 1, 1, 17, 0))
+
+def test_seconds_until_window():
+    assert seconds_until_window("22:00-06:00", datetime(2026, 1, 1, 23, 0)) == 0.0
+    assert seconds_until_window("22:00-06:00", datetime(2026, 1, 1, 21, 0)) == 3600
+    assert seconds_until_window("01:00-02:00", datetime(2026, 1, 1, 3, 0)) == 22 * 3600
+
+class FakeEngine:
+    """generate_pack with a placeholder quiz for one subject"""
+
+    def __init__(self, placeholder_quiz_subject=None):
+        self.placeholder_quiz_subject = placeholder_quiz_subject
+
+    async def generate_pack(self, subject, chapter, level):
+        quiz_source = "Placeholder_Content" if subject == self.placeholder_quiz_subject else "Generated_Content"
+        return {"pack_info": {"source": "MCP_Book_Content", "quiz_source": quiz_source}}
+
+def test_drain_writes_packs_and_fails_placeholder_quizzes(queue, tmp_path):
+    pytest.importorskip("httpx")
+    pytest.importorskip("agents")
+    pytest.importorskip("ollama")
+    queue.enqueue("Math", 1)
+    queue.enqueue("Science", 2)
+    report = asyncio.run(drain(queue, FakeEngine(placeholder_quiz_subject="Science"), output_dir=str(tmp_path)))
+    assert (report["generated"], report["failed"]) == (1, 2)  # Retried until max_attempts
+    assert (tmp_path / "math_ch001_beginner.json").exists()
+    assert not (tmp_path / "science_ch002_beginner.json").exists()
+    assert queue.stats() == {"done": 1, "failed": 1}
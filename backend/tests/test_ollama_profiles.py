@@ -0,0 +1,21 @@
+from ollama_profiles import OLLAMA_LOAD_OPTIONS, OLLAMA_OPTION_PROFILES, build_ollama_options, select_ollama_profile
+
+def test_no_profile_stops_at_a_paragraph_break():
+    for profile in OLLAMA_OPTION_PROFILES.values():
+        assert "\n\n" not in profile["stop"]
+        assert profile["penalize_newline"] is False
+
+def test_profiles_share_load_options():
+    for name in OLLAMA_OPTION_PROFILES:
+        options = build_ollama_options(name)
+        assert {key: options[key] for key in OLLAMA_LOAD_OPTIONS} == OLLAMA_LOAD_OPTIONS
+
+def test_max_tokens_only_lowers_num_predict():
+    assert build_ollama_options("fast", max_tokens=100)["num_predict"] == 100
+    assert build_ollama_options("fast", max_tokens=5000)["num_predict"] == OLLAMA_OPTION_PROFILES["fast"]["num_predict"]
+
+def test_profile_selection():
+    assert select_ollama_profile(200.0, 130.0, cpu_count=4) == "fast"
+    assert select_ollama_profile(50.0, 130.0, cpu_count=8) == "fast"
+    assert select_ollama_profile(0.0, 130.0, cpu_count=16) == "quality"
+    assert select_ollama_profile(200.0, 130.0, cpu_count=8) == "balanced"
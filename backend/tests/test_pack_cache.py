@@ -0,0 +1,50 @@
+import os
+
+from pack_cache import PackCache, hash_json, subject_source_hash
+
+KEY = {"subject": "Math", "chapter": 1, "level": "beginner", "source_hash": "abc",
+       "prompt_version": "2", "model": "gpt-3.5-turbo"}
+
+def test_address_changes_with_every_key_field():
+    cache = PackCache(root="unused")
+    base = cache.address("quiz", **KEY)
+    for field, value in (("subject", "Science"), ("chapter", 2), ("level", "advanced"),
+                         ("source_hash", "def"), ("prompt_version", "3"), ("model", "llama3.1")):
+        assert cache.address("quiz", **{**KEY, field: value}) != base
+    assert cache.address("study_material", **KEY) != base
+
+def test_address_ignores_case_of_subject_and_level():
+    cache = PackCache(root="unused")
+    assert cache.address("quiz", **{**KEY, "subject": "MATH", "level": "Beginner"}) == cache.address("quiz", **KEY)
+
+def test_put_then_get_round_trips_and_counts_hits(tmp_path):
+    cache = PackCache(root=str(tmp_path))
+    assert cache.get("quiz", **KEY) is None
+    cache.put("quiz", {"questions": [1, 2]}, **KEY)
+    assert cache.get("quiz", **KEY) == {"questions": [1, 2]}
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["quiz"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = PackCache(root=str(tmp_path))
+    cache.put("quiz", {"questions": []}, **KEY)
+    with open(cache._path("quiz", cache.address("quiz", **KEY)), "w", encoding="utf-8") as f:
+        f.write('{"questions": [')
+    assert cache.get("quiz", **KEY) is None
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    value = {"text": "x" * 100}
+    cache = PackCache(root=str(tmp_path), max_bytes=250)
+    first = cache.put("quiz", value, **{**KEY, "chapter": 1})
+    cache.put("quiz", value, **{**KEY, "chapter": 2})
+    old = os.path.getmtime(cache._path("quiz", first)) - 60
+    os.utime(cache._path("quiz", first), (old, old))
+    cache.put("quiz", value, **{**KEY, "chapter": 3})
+    assert cache.get("quiz", **{**KEY, "chapter": 1}) is None
+    assert cache.get("quiz", **{**KEY, "chapter": 3}) == value
+    assert cache.stats()["bytes"] <= 250
+
+def test_subject_without_local_textbook_has_no_source_hash():
+    assert subject_source_hash("Underwater Basket Weaving") == "no-source"
+    assert hash_json({"b": 1, "a": 2}) == hash_json({"a": 2, "b": 1})
@@ -0,0 +1,72 @@
+import copy
+
+import pytest
+
+from pack_delta import (DELTA_MAGIC, PatchError, apply_patch, content_hash, decode_patch, diff_packs, encode_patch,
+                        read_patch, write_delta)
+from pack_format import load_pack, write_pack
+
+OLD = {
+    "pack_info": {"pack_id": "math_ch001", "created_date": "2026-01-01"},
+    "study_material": {"title": "Fractions", "detailed_content": "A fraction is part of a whole. " * 40,
+                       "key_concepts": ["numerator", "denominator", "whole"]},
+    "assessment": {"questions": [{"question": f"Q{i}?", "correct_answer": 0} for i in range(5)]},
+    "progress": {"completed": False, "score": None},
+}
+
+def refreshed():
+    new = copy.deepcopy(OLD)
+    new["pack_info"]["created_date"] = "2026-01-02"
+    new["assessment"]["questions"][2] = {"question": "New Q2?", "correct_answer": 3}
+    new["study_material"]["key_concepts"][1] = "denominators"
+    return new
+
+def test_diff_then_apply_reproduces_the_new_pack():
+    new = refreshed()
+    patch = diff_packs(OLD, new)
+    assert set(patch["sections"]) == {"pack_info", "assessment", "study_material"}
+    assert "detailed_content" not in str(patch["sections"]["study_material"])  # Only the changed item
+    assert apply_patch(OLD, patch) == new
+
+def test_device_progress_is_never_diffed_or_overwritten():
+    new = refreshed()
+    new["progress"] = {"completed": False, "score": None}
+    device = {**OLD, "progress": {"completed": True, "score": 80}}
+    patch = diff_packs(OLD, new)
+    assert "progress" not in patch["sections"]
+    patched = apply_patch(device, patch)  # Device progress doesn't change the base hash
+    assert patched["progress"] == {"completed": True, "score": 80}
+    assert content_hash(patched) == patch["target_hash"]
+
+def test_added_and_removed_sections():
+    new = {**refreshed(), "flashcards": ["a", "b"]}
+    del new["study_material"]
+    patch = diff_packs(OLD, new)
+    assert patch["sections"]["study_material"] == {"remove": True}
+    assert apply_patch(OLD, patch) == new
+
+def test_patch_for_a_different_base_is_rejected():
+    patch = diff_packs(OLD, refreshed())
+    with pytest.raises(PatchError, match="different version"):
+        apply_patch(refreshed(), patch)
+
+def test_tampered_patch_fails_result_check():
+    patch = diff_packs(OLD, refreshed())
+    patch["sections"]["pack_info"] = {"set": {"created_date": "2030-01-01"}}
+    with pytest.raises(PatchError, match="expected result"):
+        apply_patch(OLD, patch)
+
+def test_encode_decode_round_trip_and_bad_magic():
+    patch = diff_packs(OLD, refreshed())
+    data = encode_patch(patch, codec="gzip")
+    assert data.startswith(DELTA_MAGIC)
+    assert decode_patch(data) == patch
+    with pytest.raises(PatchError, match="Not a learning pack delta"):
+        decode_patch(b"XXX" + data[3:])
+
+def test_write_delta_applies_to_a_container(tmp_path):
+    pack_path = write_pack(OLD, str(tmp_path / "math.tpk"), codec="gzip")
+    assert write_delta(OLD, copy.deepcopy(OLD), pack_path, str(tmp_path / "deltas")) is None  # Nothing changed
+    delta_path = write_delta(load_pack(pack_path), refreshed(), pack_path, str(tmp_path / "deltas"))
+    assert delta_path.endswith(".tpd") and content_hash(OLD)[:12] in delta_path
+    assert apply_patch(load_pack(pack_path), read_patch(delta_path)) == refreshed()
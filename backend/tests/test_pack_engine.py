@@ -0,0 +1,119 @@
+import asyncio
+import math
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("agents")
+pytest.importorskip("ollama")
+
+from pack_cache import PackCache
+from ollama_profiles import OLLAMA_OPTION_PROFILES
+from pack_engine import (CachedSource, MCPBookSource, ModelBackend, OllamaBackend, PackEngine, has_placeholder_content,
+                         ollama_backend, select_pack_backend, CHARS_PER_TOKEN, GENERATED_SOURCE, MCP_SOURCE,
+                         PLACEHOLDER_SOURCE)
+from quiz_generation import QuizGenerator, QUIZ_SCHEMA, response_format
+
+class FakeSource:
+    def __init__(self, name, label, available=True):
+        self.name = name
+        self.label = label
+        self.available = available
+        self.fetches = 0
+
+    def source_hash(self, subject):
+        return "no-source"
+
+    async def fetch(self, engine, subject, chapter, level):
+        self.fetches += 1
+        if not self.available:
+            return None
+        return {"detailed_content": f"{self.label} text"}, self.label
+
+def make_cached(tmp_path, book_available=True):
+    book = FakeSource("mcp", MCP_SOURCE, book_available)
+    llm = FakeSource("llm", GENERATED_SOURCE)
+    cached = CachedSource([book, llm], PackCache(root=str(tmp_path)))
+    return cached, book, llm, PackEngine(None, [cached])
+
+def fetch(cached, engine):
+    return asyncio.run(cached.fetch(engine, "Computer Science", 1, "beginner"))
+
+def test_book_content_is_cached(tmp_path):
+    cached, book, llm, engine = make_cached(tmp_path)
+    assert fetch(cached, engine)[1] == MCP_SOURCE
+    assert fetch(cached, engine)[1] == MCP_SOURCE
+    assert book.fetches == 1
+    assert llm.fetches == 0
+
+def test_fallback_content_is_not_cached_under_the_book_key(tmp_path):
+    cached, book, llm, engine = make_cached(tmp_path, book_available=False)
+    assert fetch(cached, engine)[1] == GENERATED_SOURCE  # MCP outage
+    book.available = True
+    assert fetch(cached, engine)[1] == MCP_SOURCE
+    assert book.fetches == 2
+
+def test_cache_key_names_the_primary_source(tmp_path):
+    with_book, _, _, _ = make_cached(tmp_path)
+    llm_only = CachedSource([FakeSource("llm", GENERATED_SOURCE)], PackCache(root=str(tmp_path)))
+    assert with_book.source_hash("Computer Science") != llm_only.source_hash("Computer Science")
+
+def test_pack_info_marks_a_placeholder_quiz():
+    engine = PackEngine(None, [])
+    material = engine.placeholder_study_material("Math", 1)
+    pack = engine.assemble_pack("Math", 1, "beginner", material, MCP_SOURCE, engine.placeholder_quiz("Math", 1))
+    assert pack["pack_info"]["quiz_source"] == PLACEHOLDER_SOURCE
+    assert has_placeholder_content(pack)
+
+    pack = engine.assemble_pack("Math", 1, "beginner", material, MCP_SOURCE, {"questions": [], "total_questions": 0})
+    assert pack["pack_info"]["quiz_source"] == GENERATED_SOURCE
+    assert not has_placeholder_content(pack)
+    assert has_placeholder_content({"pack_info": {"source": PLACEHOLDER_SOURCE}})
+
+def test_backends_decide_schema_support():
+    assert ModelBackend("openai", None, "gpt-3.5-turbo", "gpt-4o-mini").supports_json_schema("gpt-4o-mini")
+    assert not ModelBackend("openai", None, "gpt-3.5-turbo", "gpt-3.5-turbo").supports_json_schema("gpt-3.5-turbo")
+    assert ModelBackend("gemini", None, "gemini-2.0-flash", "gemini-2.0-flash", schema_output=True).supports_json_schema("gemini-2.0-flash")
+    assert OllamaBackend("ollama", None, "llama3.1", "llama3.1").supports_json_schema("llama3.1")
+
+class FakeOllamaClient:
+    def __init__(self):
+        self.requests = []
+
+    async def chat(self, **kwargs):
+        self.requests.append(kwargs)
+        return {"message": {"content": "{}"}}
+
+def test_ollama_gets_the_quiz_schema_as_its_format():
+    client = FakeOllamaClient()
+    backend = OllamaBackend("ollama", client, "llama3.1", "llama3.1")
+    asyncio.run(backend.complete("quiz", max_tokens=100, response_format=response_format("llama3.1", True)))
+    asyncio.run(backend.complete("notes", max_tokens=100, json_mode=True))
+    assert [request["format"] for request in client.requests] == [QUIZ_SCHEMA, "json"]
+
+@pytest.mark.parametrize("profile", sorted(OLLAMA_OPTION_PROFILES))
+def test_ollama_pack_prompts_and_replies_fit_the_context_window(profile):
+    backend = ollama_backend(profile=profile)
+    backend.client = client = FakeOllamaClient()
+    chapter_text = "Computers store data as bits. " * 2000
+    source = MCPBookSource.__new__(MCPBookSource)  # No MCP connection needed to build the prompt
+
+    async def run():
+        await source._structure(backend, "Computer Science", 1, "beginner", chapter_text)
+        await QuizGenerator(backend, retry_rounds=0).generate("Computer Science", 1, {"detailed_content": chapter_text})
+
+    asyncio.run(run())
+    assert len(client.requests) == 2
+    for request in client.requests:
+        prompt_tokens = math.ceil(len(request["messages"][0]["content"]) / CHARS_PER_TOKEN)
+        options = request["options"]
+        assert prompt_tokens + options["num_predict"] <= options["num_ctx"]
+
+def test_select_pack_backend_uses_ollama_only_when_offline_or_unconfigured(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    assert select_pack_backend().name == "openai"  # Link not measured yet
+    assert select_pack_backend(50.0, False).name == "openai"
+    assert select_pack_backend(0.0, False).name == "ollama"
+    assert select_pack_backend(50.0, True).name == "ollama"
+    monkeypatch.delenv("OPENAI_API_KEY")
+    assert select_pack_backend(50.0, False).name == "ollama"
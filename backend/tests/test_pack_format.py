@@ -0,0 +1,88 @@
+import json
+import struct
+
+import pytest
+
+from pack_format import (FORMAT_VERSION, MAGIC, PREAMBLE, LazyPack, PackReader, encode_pack, is_pack_container,
+                         load_pack, save_pack, write_pack, write_progress)
+
+PACK = {
+    "pack_info": {"pack_id": "math_ch001", "title": "Math - Chapter 1", "source": "MCP_Book_Content"},
+    "study_material": {"title": "Fractions", "detailed_content": "A fraction is part of a whole. " * 50},
+    "assessment": {"questions": [{"question": "What is 1/2 of 4?", "options": ["1", "2", "3", "4"],
+                                  "correct_answer": 1}]},
+    "progress": {"completed": False},
+}
+
+def test_round_trip(tmp_path):
+    path = write_pack(PACK, str(tmp_path / "math.tpk"), codec="gzip")
+    assert is_pack_container(path)
+    pack = load_pack(path)
+    assert isinstance(pack, LazyPack)
+    assert pack.to_dict() == PACK
+    assert list(pack) == list(PACK)
+
+def test_sections_load_on_first_access(tmp_path):
+    pack = load_pack(write_pack(PACK, str(tmp_path / "math.tpk"), codec="gzip"))
+    assert pack["pack_info"]["title"] == "Math - Chapter 1"  # From the header
+    assert pack.loaded_sections == ["pack_info"]
+    assert pack["assessment"] == PACK["assessment"]
+    assert pack.loaded_sections == ["pack_info", "assessment"]
+    with pytest.raises(KeyError):
+        pack["missing"]
+
+def test_compressible_sections_shrink_and_tiny_ones_are_stored(tmp_path):
+    reader = PackReader(write_pack(PACK, str(tmp_path / "math.tpk"), codec="gzip"))
+    assert reader.codec == "gzip"
+    assert not reader.index["study_material"]["stored"]
+    assert reader.index["study_material"]["length"] < reader.index["study_material"]["raw_length"]
+    assert reader.index["progress"]["stored"]
+    assert reader.section("progress") == PACK["progress"]
+
+def test_corrupt_section_is_detected(tmp_path):
+    path = tmp_path / "math.tpk"
+    write_pack(PACK, str(path), codec="gzip")
+    reader = PackReader(str(path))
+    data = bytearray(path.read_bytes())
+    data[reader.data_offset + reader.index["progress"]["offset"]] ^= 0xFF  # Stored raw - flip a byte of JSON
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="corrupt"):
+        load_pack(str(path))["progress"]
+
+def test_newer_format_version_is_rejected(tmp_path):
+    path = tmp_path / "future.tpk"
+    data = encode_pack(PACK, codec="gzip")
+    _, _, header_length = PREAMBLE.unpack(data[:PREAMBLE.size])
+    path.write_bytes(PREAMBLE.pack(MAGIC, FORMAT_VERSION + 1, header_length) + data[PREAMBLE.size:])
+    with pytest.raises(ValueError, match="pack format v2"):
+        PackReader(str(path))
+
+def test_not_a_container_is_rejected(tmp_path):
+    path = tmp_path / "other.tpk"
+    path.write_bytes(struct.pack("<3sBI", b"ZIP", 1, 0))
+    with pytest.raises(ValueError, match="not a learning pack container"):
+        PackReader(str(path))
+
+def test_save_pack_picks_the_format_from_the_path(tmp_path):
+    json_path = save_pack(PACK, str(tmp_path / "math.json"))
+    assert not is_pack_container(json_path)
+    assert load_pack(json_path) == PACK
+
+    lazy = load_pack(save_pack(load_pack(json_path), str(tmp_path / "math.tpk"), codec="gzip"))
+    lazy["progress"] = {"completed": True}
+    copy_path = save_pack(lazy, str(tmp_path / "copy.json"))
+    with open(copy_path, encoding="utf-8") as f:
+        assert json.load(f) == {**PACK, "progress": {"completed": True}}
+
+def test_progress_is_saved_beside_the_container(tmp_path):
+    path = write_pack(PACK, str(tmp_path / "math.tpk"), codec="gzip")
+    before = (tmp_path / "math.tpk").read_bytes()
+    pack = load_pack(path)
+    pack["progress"] = {"completed": True, "score": 80}
+    assert write_progress(pack, path) == str(tmp_path / "math.progress.json")
+    assert pack.loaded_sections == ["pack_info", "progress"]  # Study material never decompressed
+    assert (tmp_path / "math.tpk").read_bytes() == before
+
+    reopened = load_pack(path)
+    assert reopened["progress"] == {"completed": True, "score": 80}
+    assert reopened.to_dict() == {**PACK, "progress": {"completed": True, "score": 80}}
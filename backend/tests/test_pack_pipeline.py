@@ -0,0 +1,70 @@
+import asyncio
+
+from pack_pipeline import PackPipeline
+
+class SlowGenerator:
+    """Stage methods that sleep, tracking how many quiz calls run at once"""
+
+    def __init__(self, fail_chapter=None):
+        self.fail_chapter = fail_chapter
+        self.quiz_running = 0
+        self.quiz_peak = 0
+
+    async def build_study_material(self, subject, chapter, level):
+        await asyncio.sleep(0.01)
+        if chapter == self.fail_chapter:
+            raise RuntimeError("no content")
+        return {"chapter": chapter}, "book"
+
+    async def build_quiz(self, subject, chapter, level, study_material):
+        self.quiz_running += 1
+        self.quiz_peak = max(self.quiz_peak, self.quiz_running)
+        await asyncio.sleep(0.02)
+        self.quiz_running -= 1
+        return {"questions": [chapter]}
+
+    def assemble_pack(self, subject, chapter, level, study_material, source, quiz):
+        return {"study_material": study_material, "source": source, "assessment": quiz}
+
+def run_pipeline(pipeline, jobs):
+    packs, errors = {}, {}
+
+    async def on_pack(key, pack, seconds):
+        packs[key] = pack
+
+    async def on_error(key, error):
+        errors[key] = str(error)
+
+    asyncio.run(pipeline.run(jobs, on_pack, on_error))
+    return packs, errors
+
+JOBS = [("Math", chapter, "beginner") for chapter in range(1, 7)]
+
+def test_every_job_becomes_a_pack():
+    packs, errors = run_pipeline(PackPipeline(SlowGenerator(), content_workers=2, quiz_workers=2), JOBS)
+    assert errors == {}
+    assert sorted(packs) == JOBS
+    assert packs[("Math", 3, "beginner")] == {"study_material": {"chapter": 3}, "source": "book",
+                                              "assessment": {"questions": [3]}}
+
+def test_quiz_workers_cap_quiz_concurrency():
+    generator = SlowGenerator()
+    run_pipeline(PackPipeline(generator, content_workers=4, quiz_workers=2), JOBS)
+    assert generator.quiz_peak == 2
+
+def test_failed_job_is_reported_and_the_rest_finish():
+    pipeline = PackPipeline(SlowGenerator(fail_chapter=2), content_workers=2, quiz_workers=2)
+    packs, errors = run_pipeline(pipeline, JOBS)
+    assert errors == {("Math", 2, "beginner"): "no content"}
+    assert len(packs) == 5
+    metrics = pipeline.metrics()
+    assert (metrics["content"]["processed"], metrics["content"]["failed"]) == (5, 1)
+    assert metrics["quiz"]["processed"] == metrics["assemble"]["processed"] == 5
+
+def test_bounded_queues_limit_depth():
+    pipeline = PackPipeline(SlowGenerator(), content_workers=1, quiz_workers=1, queue_size=2)
+    packs, _ = run_pipeline(pipeline, JOBS)
+    assert len(packs) == 6
+    metrics = pipeline.metrics()
+    assert all(stage["max_queue_depth"] <= 2 for stage in metrics.values())
+    assert 0 < metrics["quiz"]["utilization"] <= 1
@@ -0,0 +1,33 @@
+import logging
+
+from prompt_cache_stats import PromptCacheStats
+
+def test_totals_per_backend():
+    stats = PromptCacheStats()
+    stats.record({"backend": "openai", "prompt_tokens": 1000, "cached_tokens": 0})
+    stats.record({"backend": "openai", "prompt_tokens": 1000, "cached_tokens": 1000})
+    stats.record(None)
+    assert stats.stats()["openai"] == {"turns": 2, "prompt_tokens": 2000, "cached_tokens": 1000, "cached_share": 0.5}
+
+def test_ollama_reports_measured_counts_only():
+    stats = PromptCacheStats()
+    stats.record({"backend": "ollama", "prompt_eval_count": 900, "prompt_eval_ms": 1200.0})
+    stats.record({"backend": "ollama", "prompt_eval_count": 40, "prompt_eval_ms": 60.0})  # KV cache reused
+    assert stats.stats()["ollama"] == {"turns": 2, "prompt_eval_count": 940, "prompt_eval_ms": 1260.0,
+                                       "avg_prompt_eval_ms": 630.0}
+    assert "cached_share" not in stats.stats()["ollama"]
+
+def test_every_turn_is_logged(caplog):
+    logger = logging.getLogger("prompt_cache")
+    logger.addHandler(caplog.handler)
+    try:
+        with caplog.at_level(logging.INFO, logger="prompt_cache"):
+            stats = PromptCacheStats()
+            stats.record({"backend": "openai", "prompt_tokens": 1000, "cached_tokens": 768})
+            stats.record({"backend": "ollama", "prompt_eval_count": 40, "prompt_eval_ms": 61.5})
+    finally:
+        logger.removeHandler(caplog.handler)
+    assert [record.getMessage() for record in caplog.records] == [
+        "🧠 openai: 768/1000 prompt tokens cached (77%)",
+        "🧠 ollama: 40 prompt tokens evaluated in 62 ms",
+    ]
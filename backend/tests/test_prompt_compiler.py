@@ -0,0 +1,23 @@
+from PROMPTS.prompt_compiler import AGENT_PROMPTS, compact_prompt, compile_prompt
+
+def test_example_sections_and_decoration_are_dropped():
+    prompt = """## Role
+You are a **tutor**.
+
+## Examples
+- Student: hi
+- Tutor: hello
+### Nested example detail
+more
+
+GUARDRAILS:
+•   Never   share personal data.
+---
+"""
+    assert compact_prompt(prompt) == "## Role\nYou are a tutor.\nGUARDRAILS:\n- Never share personal data."
+
+def test_every_compact_variant_is_smaller():
+    for name in AGENT_PROMPTS:
+        compiled = compile_prompt(name)
+        assert compiled.variant(compact=False) == AGENT_PROMPTS[name]
+        assert 0 < compiled.compact_tokens < compiled.full_tokens
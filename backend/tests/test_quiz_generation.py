@@ -0,0 +1,85 @@
+import asyncio
+import json
+
+from quiz_generation import QuizGenerator, repair_question, response_format, validate_questions
+
+def question(text="What is RAM?", options=None, answer=1):
+    return {"question": text, "options": options or ["Storage", "Memory", "Printer", "Mouse"],
+            "correct_answer": answer, "explanation": "RAM is memory."}
+
+def test_valid_question_is_unchanged():
+    assert repair_question(question()) == question()
+
+def test_option_prefixes_and_letter_answers_are_repaired():
+    raw = question(options=["A) Storage", "B) Memory", "C. Printer", "d - Mouse"], answer="b")
+    assert repair_question(raw) == question()
+    assert repair_question(question(answer="Option B"))["correct_answer"] == 1
+    assert repair_question(question(answer=" 2 "))["correct_answer"] == 2
+
+def test_answer_given_as_option_text_is_repaired():
+    assert repair_question(question(answer="B) memory"))["correct_answer"] == 1
+
+def test_unusable_questions_are_rejected():
+    assert repair_question("not a dict") is None
+    assert repair_question(question(text=" ")) is None
+    assert repair_question(question(options=["One", "Two", "Three"])) is None
+    assert repair_question(question(options=["Same", "same", "Other", "Last"])) is None
+    assert repair_question(question(answer=4)) is None
+    assert repair_question(question(answer=True)) is None
+    assert repair_question(question(answer="Keyboard")) is None
+
+def test_validate_questions_counts_rejects():
+    valid, rejected = validate_questions({"questions": [question(), question(answer=9), "junk"]})
+    assert (len(valid), rejected) == (1, 2)
+    assert validate_questions(None) == ([], 0)
+    assert validate_questions({"questions": "none"}) == ([], 0)
+
+def test_response_format_uses_json_schema_only_where_supported():
+    assert response_format("gpt-4o-mini")["type"] == "json_schema"
+    assert response_format("gpt-4o-mini")["json_schema"]["strict"] is True
+    assert response_format("gpt-3.5-turbo") == {"type": "json_object"}
+    assert response_format("llama3.1") == {"type": "json_object"}
+
+def test_backend_can_require_the_schema_for_any_model():
+    assert response_format("llama3.1", json_schema=True)["json_schema"]["schema"]["required"] == ["quiz_title", "questions"]
+    assert response_format("gpt-4o-mini", json_schema=False) == {"type": "json_object"}
+
+class ScriptedBackend:
+    """Returns one scripted response per complete() call"""
+    quiz_model = "llama3.1"
+
+    def __init__(self, responses, schema_output=True):
+        self.responses = list(responses)
+        self.schema_output = schema_output
+        self.prompts = []
+        self.formats = []
+
+    def supports_json_schema(self, model):
+        return self.schema_output
+
+    async def complete(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        self.formats.append(kwargs["response_format"]["type"])
+        return self.responses.pop(0)
+
+def test_only_missing_questions_are_regenerated():
+    first = {"quiz_title": "Memory Quiz", "questions": [question("Q1?"), question("Q2?", answer=7)]}
+    second = {"quiz_title": "ignored", "questions": [question("Q1?"), question("Q3?")]}
+    backend = ScriptedBackend([json.dumps(first), json.dumps(second)])
+    generator = QuizGenerator(backend, questions=2, retry_rounds=2)
+
+    quiz = asyncio.run(generator.generate("Computer", 1, {"title": "Memory"}))
+    assert quiz["quiz_title"] == "Memory Quiz"
+    assert [q["question"] for q in quiz["questions"]] == ["Q1?", "Q3?"]
+    assert [q["id"] for q in quiz["questions"]] == [1, 2]
+    assert "Create 1 multiple choice" in backend.prompts[1] and "- Q1?" in backend.prompts[1]
+    assert generator.stats["retried_questions"] == 1
+    assert generator.stats["first_pass"] == 0
+    assert backend.formats == ["json_schema", "json_schema"]  # The backend takes the schema for llama3.1
+
+def test_truncated_json_gives_no_quiz_after_retries():
+    backend = ScriptedBackend(['{"questions": [', '{"questions": ['], schema_output=False)
+    generator = QuizGenerator(backend, questions=2, retry_rounds=1)
+    assert asyncio.run(generator.generate("Computer", 1, {})) is None
+    assert generator.stats["incomplete"] == 1
+    assert backend.formats == ["json_object", "json_object"]
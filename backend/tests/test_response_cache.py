@@ -0,0 +1,55 @@
+import time
+
+from response_cache import SemanticResponseCache
+
+BUCKET = ("Tutor", "Science:3", "7")
+
+def make_cache(**kwargs):
+    return SemanticResponseCache(enabled=True, **kwargs)
+
+def test_only_stateless_explanation_questions_are_cacheable():
+    cache = make_cache()
+    assert cache.is_cacheable("What is photosynthesis?")
+    assert cache.is_cacheable("Explain the water cycle")
+    assert not cache.is_cacheable("Is my answer correct?")
+    assert not cache.is_cacheable("Explain that again")
+    assert not cache.is_cacheable("Let's do a quiz")
+    assert not SemanticResponseCache(enabled=False).is_cacheable("What is photosynthesis?")
+
+def test_similar_question_hits_above_threshold():
+    cache = make_cache(threshold=0.8)
+    cache.store(*BUCKET, "What is photosynthesis?", "Plants make sugar from light.")
+    hit = cache.lookup(*BUCKET, "what is photosynthesis")
+    assert hit["response"] == "Plants make sugar from light." and hit["similarity"] >= 0.8
+    assert cache.lookup(*BUCKET, "What is gravity?") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["avg_hit_similarity"] >= 0.8
+
+def test_strict_threshold_rejects_near_misses():
+    cache = make_cache(threshold=0.99)
+    cache.store(*BUCKET, "What is photosynthesis in plants?", "...")
+    assert cache.lookup(*BUCKET, "What is photosynthesis?") is None
+
+def test_buckets_are_separate_per_grade_level():
+    cache = make_cache()
+    cache.store("Tutor", "Science:3", "7", "What is photosynthesis?", "Grade 7 answer")
+    assert cache.lookup("Tutor", "Science:3", "5", "What is photosynthesis?") is None
+
+def test_expired_entries_are_evicted_on_lookup():
+    cache = make_cache(ttl_seconds=60)
+    key = cache.store(*BUCKET, "What is photosynthesis?", "...")
+    cache._buckets[BUCKET][key]["created"] = time.time() - 61
+    assert cache.lookup(*BUCKET, "What is photosynthesis?") is None
+    assert cache.stats()["entries"] == 0 and cache.stats()["evictions"] == 1
+
+def test_bucket_keeps_most_recent_entries():
+    cache = make_cache(max_entries=2)
+    for question in ("What is a cell?", "What is an atom?", "What is a molecule?"):
+        cache.store(*BUCKET, question, question)
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup(*BUCKET, "What is a cell?") is None
+
+def test_discard_removes_a_retracted_answer():
+    cache = make_cache()
+    key = cache.store(*BUCKET, "What is photosynthesis?", "flagged")
+    cache.discard(*BUCKET, key)
+    assert cache.lookup(*BUCKET, "What is photosynthesis?") is None
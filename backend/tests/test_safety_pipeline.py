@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("agents")
+
+from safety_pipeline import StreamingSafetyScreen
+
+def make_checker(verdicts, delay=0.0):
+    """Checker returning the given statuses in order ("error" raises)"""
+    statuses = iter(verdicts)
+
+    async def checker(agent, content, context):
+        await asyncio.sleep(delay)
+        status = next(statuses)
+        if status == "error":
+            raise RuntimeError("safety model unavailable")
+        return {"status": status, "message": content}
+    return checker
+
+async def tokens(parts, pause=0.0):
+    for part in parts:
+        await asyncio.sleep(pause)
+        yield part
+
+async def collect(screen, stream):
+    shown = []
+    async for text in screen.screen(stream):
+        shown.append(text)
+    return "".join(shown), await screen.verdict()
+
+def test_safe_stream_passes_through():
+    screen = StreamingSafetyScreen(None, chunk_chars=5, checker=make_checker(["safe", "safe"]))
+    shown, verdict = asyncio.run(collect(screen, tokens(["Hello. ", "World."])))
+    assert shown == "Hello. World." and verdict["status"] == "safe"
+
+@pytest.mark.parametrize("status", ["warning", "unknown", "error"])
+def test_any_non_safe_verdict_is_reported(status):
+    screen = StreamingSafetyScreen(None, chunk_chars=5, checker=make_checker(["safe", status]))
+    _, verdict = asyncio.run(collect(screen, tokens(["Hello. ", "World."])))
+    assert verdict["status"] != "safe"
+
+def test_blocked_chunk_stops_stream_without_keeping_next_token():
+    screen = StreamingSafetyScreen(None, chunk_chars=5, checker=make_checker(["blocked"]))
+    shown, verdict = asyncio.run(collect(screen, tokens(["Bad text. ", "more ", "text."], pause=0.01)))
+    assert verdict["status"] == "blocked"
+    assert shown == "Bad text. " and screen.text == "Bad text. "
+
+def test_hold_releases_only_checked_chunks():
+    screen = StreamingSafetyScreen(None, chunk_chars=5, checker=make_checker(["safe", "warning", "safe"]), hold=True)
+    shown, verdict = asyncio.run(collect(screen, tokens(["First. ", "Second. ", "Third."], pause=0.01)))
+    assert shown == "First. "
+    assert screen.withheld and verdict["status"] == "warning"
+
+def test_hold_waits_for_slow_checks():
+    screen = StreamingSafetyScreen(None, chunk_chars=5, checker=make_checker(["safe", "safe"], delay=0.05), hold=True)
+    shown, verdict = asyncio.run(collect(screen, tokens(["First. ", "Second."])))
+    assert shown == "First. Second." and verdict["status"] == "safe"
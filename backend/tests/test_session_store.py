@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("agents")
+
+from session_store import SessionStore
+
+def make_store(tmp_path, max_items=4):
+    return SessionStore(db_path=str(tmp_path / "sessions.db"), max_items=max_items, pool_size=2)
+
+def test_get_items_reads_only_the_most_recent_window(tmp_path):
+    store = make_store(tmp_path)
+    session = store.get_session("student_a")
+
+    async def run():
+        await session.add_items([{"role": "user", "content": str(i)} for i in range(3)])
+        await session.add_items([{"role": "user", "content": str(i)} for i in range(3, 6)])
+        return await session.get_items()
+
+    items = asyncio.run(run())
+    assert [item["content"] for item in items] == ["2", "3", "4", "5"]
+    store.close()
+
+def test_compaction_trims_to_the_cap(tmp_path):
+    store = make_store(tmp_path, max_items=3)
+    session = store.get_session("student_a")
+
+    async def run():
+        await session.add_items([{"role": "user", "content": str(i)} for i in range(5)])
+        await asyncio.gather(*store._compaction_tasks.values())
+
+    asyncio.run(run())
+    with store.pool.connection() as conn:
+        rows = conn.execute("SELECT message_data FROM agent_messages WHERE session_id = 'student_a'").fetchall()
+    assert len(rows) == 3
+    store.close()
+
+def test_sessions_are_isolated(tmp_path):
+    store = make_store(tmp_path)
+
+    async def run():
+        await store.get_session("a").add_items([{"role": "user", "content": "from a"}])
+        await store.get_session("b").clear_session()
+        return await store.get_session("a").get_items(), await store.get_session("b").get_items()
+
+    items_a, items_b = asyncio.run(run())
+    assert [item["content"] for item in items_a] == ["from a"] and items_b == []
+    store.close()
+
+def test_leading_orphaned_tool_outputs_are_dropped(tmp_path):
+    store = make_store(tmp_path, max_items=2)
+    session = store.get_session("a")
+
+    async def run():
+        await session.add_items([
+            {"type": "function_call", "call_id": "1"},
+            {"type": "function_call_output", "call_id": "1", "output": "42"},
+            {"role": "assistant", "content": "The answer is 42"},
+        ])
+        return await session.get_items()
+
+    assert asyncio.run(run()) == [{"role": "assistant", "content": "The answer is 42"}]
+    store.close()
+
+def test_pop_item_removes_the_latest(tmp_path):
+    store = make_store(tmp_path)
+    session = store.get_session("a")
+
+    async def run():
+        await session.add_items([{"content": "first"}, {"content": "second"}])
+        popped = await session.pop_item()
+        return popped, await session.get_items()
+
+    popped, items = asyncio.run(run())
+    assert popped == {"content": "second"} and items == [{"content": "first"}]
+    store.close()
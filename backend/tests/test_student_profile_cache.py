@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("agents")
+pytest.importorskip("openai")
+pytest.importorskip("ollama")
+pytest.importorskip("dotenv")
+
+import main_orchestrator
+from conversation_memory import ConversationMemory
+from main_orchestrator import MultiAgentOrchestrator, StudentContext
+from response_cache import SemanticResponseCache
+
+class FakeHybridAgent:
+    """Persona replies without any model; counts generated turns"""
+
+    def __init__(self):
+        self.memory = ConversationMemory()
+        self.last_usage = None
+        self.generated = 0
+
+    async def stream(self, user_input, agent_name):
+        self.generated += 1
+        for token in ("An algorithm is ", "a list of steps."):
+            yield token
+
+class FakePool:
+    def __init__(self):
+        self.agent = FakeHybridAgent()
+
+    def get(self, session_id):
+        return self.agent
+
+class FakeStore:
+    def get_session(self, session_id):
+        return None
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    monkeypatch.setattr(main_orchestrator, "agent_pool", FakePool())
+    monkeypatch.setattr(main_orchestrator, "get_session_store", FakeStore)
+    monkeypatch.setattr(main_orchestrator, "response_cache", SemanticResponseCache(enabled=True))
+    return MultiAgentOrchestrator(session_id="chainlit-session")
+
+async def turn(orch, user_input, agent_name):
+    """What a Chainlit handler does with one message: stream the reply tokens"""
+    return "".join([token async for token in orch.stream_hybrid_response(user_input, agent_name)])
+
+def test_student_answers_fill_grade_and_subject():
+    context = StudentContext()
+    assert not context.update_from_student_message("My name is Sara")
+    assert context.update_from_student_message("I'm in grade 7 and I like computer class")
+    assert (context.grade_level, context.subject) == ("7", "Computer Science")
+    context.update_from_student_message("Actually I'm in the 8th grade, English please")
+    assert (context.grade_level, context.subject) == ("8", "English")
+    context.update_from_student_message("class 40")  # Not a grade
+    assert context.grade_level == "8"
+
+def test_profile_skips_unfilled_template_values():
+    context = StudentContext()
+    context.update_profile({"name": "Ali", "grade_level": "7", "learning_style": "visual|aural|kinesthetic"})
+    assert (context.student_name, context.grade_level, context.learning_style) == ("Ali", "7", None)
+
+def test_chainlit_turns_reach_the_cache_once_the_grade_is_known(orchestrator):
+    agent = main_orchestrator.agent_pool.agent
+
+    async def session():
+        # Triage: the persona reply carries no handoff JSON - the student's answer does the work
+        orchestrator.student_context.update_from_student_message("I'm in grade 7")
+        await turn(orchestrator, "Hi, I'm in grade 7", "Olivia")
+        first = await turn(orchestrator, "What is an algorithm?", "Tutor")
+        second = await turn(orchestrator, "what is an algorithm", "Tutor")
+        return first, second
+
+    first, second = asyncio.run(session())
+    assert first == second == "An algorithm is a list of steps."
+    assert agent.generated == 2  # Triage turn + first tutor turn; the repeat was a cache hit
+    assert main_orchestrator.response_cache.stats()["hits"] == 1
+
+def test_no_cache_until_the_grade_is_known(orchestrator):
+    async def session():
+        await turn(orchestrator, "What is an algorithm?", "Tutor")
+        await turn(orchestrator, "What is an algorithm?", "Tutor")
+
+    asyncio.run(session())
+    assert main_orchestrator.agent_pool.agent.generated == 2